@@ -24,7 +24,8 @@ class ContentAggregatorAgent:
                 'approach_3': content_data.get('approach_3', {}),
                 'approach_4': content_data.get('approach_4', {}),
                 'approach_5': content_data.get('approach_5', {})
-            }
+            },
+            'youtube_content': content_data.get('youtube_content', {})
         }
         logging.info("ContentAggregatorAgent: Content aggregation complete.")
         return aggregated_content
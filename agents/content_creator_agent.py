@@ -1,31 +1,35 @@
 import logging
-from utils.llm_utils import LLMUtils
-from config.settings import Config
-import json
+from utils.llm_utils import get_llm_for_task
+from utils.research_digest import build_research_digest
+from utils.prompt_context import build_shared_context
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+APPROACH_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'title': {'type': 'string', 'minLength': 1},
+        'explanation': {'type': 'string', 'minLength': 1},
+        'code_examples': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['title', 'explanation', 'code_examples']
+}
+
 class ContentCreatorAgent:
     def __init__(self):
-        self.llm = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL)
+        self.llm = get_llm_for_task('approach')
+        self.intro_llm = get_llm_for_task('content_intro')
         logging.info("ContentCreatorAgent initialized.")
 
-    def create_content_introduction(self, topic, research_data):
-        logging.info(f"ContentCreatorAgent: Generating introduction for topic: {topic}")
-        logging.debug(f"ContentCreatorAgent: Research data for intro: {research_data}")
-        """
-        Generates a captivating and structured introduction for a YouTube video.
-        """
+    def _build_intro_prompt(self, topic, research_data, feedback=None, research_digest=None):
+        research_digest = research_digest or build_research_digest(research_data)
         prompt = f"""
+        **Role:** You are a specialized agent for creating engaging YouTube video introductions.
+
         **Objective:** Create a compelling, conversational, and educational introduction for a YouTube video on the topic of "{topic}".
 
         **Context & Tone:** The tone should be enthusiastic, engaging, and build curiosity. Assume you are speaking directly to an audience of intermediate developers. The introduction should be a script, not just a paragraph.
 
-        **Research Data for Context:**
-        ```json
-        {json.dumps(research_data, indent=2)}
-        ```
-
         **Instructions:**
         1.  **Hook:** Start with a strong, relatable question or a surprising statement that grabs the viewer's attention immediately.
         2.  **Problem Statement:** Clearly articulate the problem or challenge that understanding "{topic}" solves.
@@ -39,27 +43,39 @@ class ContentCreatorAgent:
 
         **Generate the introduction script now.**
         """
-        system_prompt = "You are a specialized agent for creating engaging YouTube video introductions."
-        intro_content = self.llm.invoke(system_prompt, prompt)
-        logging.info("ContentCreatorAgent: Introduction generated.")
-        return intro_content
+        return build_shared_context(topic, research_digest), self.llm.append_feedback(prompt, feedback)
 
-    def generate_single_approach(self, topic, research_data, approach_desc):
-        logging.info(f"ContentCreatorAgent: Generating single approach for topic: {topic}, approach: {approach_desc}")
-        logging.debug(f"ContentCreatorAgent: Research data for approach: {research_data}")
+    def create_content_introduction(self, topic, research_data, feedback=None, research_digest=None):
         """
-        Generates a single, detailed approach to explain the topic.
+        Generates a captivating and structured introduction for a YouTube video.
         """
+        logging.info(f"ContentCreatorAgent: Generating introduction for topic: {topic}")
+        logging.debug(f"ContentCreatorAgent: Research data for intro: {research_data}")
+        system_prompt, prompt = self._build_intro_prompt(topic, research_data, feedback, research_digest)
+        intro_content = self.intro_llm.invoke(system_prompt, prompt)
+        logging.info("ContentCreatorAgent: Introduction generated.")
+        return intro_content
+
+    async def acreate_content_introduction(self, topic, research_data, on_token=None, feedback=None, research_digest=None):
+        """Async variant of create_content_introduction; streams tokens to on_token when given"""
+        logging.info(f"ContentCreatorAgent: Generating introduction for topic: {topic}")
+        system_prompt, prompt = self._build_intro_prompt(topic, research_data, feedback, research_digest)
+        if on_token:
+            intro_content = await self.intro_llm.astream_collect(system_prompt, prompt, on_token)
+        else:
+            intro_content = await self.intro_llm.ainvoke(system_prompt, prompt)
+        logging.info("ContentCreatorAgent: Introduction generated.")
+        return intro_content
+
+    def _build_approach_prompt(self, topic, research_data, approach_desc, feedback=None, research_digest=None):
+        research_digest = research_digest or build_research_digest(research_data)
         base_prompt = f"""
+        **Role:** You are a specialized agent for explaining programming concepts in detail and outputting valid JSON.
+
         **Objective:** Develop a single, detailed approach to explain the programming topic: "{topic}". This approach should be tailored to the following pedagogical style: "{approach_desc}". The final output must be a clean, valid JSON object.
 
         **Context & Pedagogy:** The goal is to create a comprehensive educational unit. This approach should be self-contained and provide a complete explanation of the concept from its unique perspective.
 
-        **Research Data for Context:**
-        ```json
-        {json.dumps(research_data, indent=2)}
-        ```
-
         **Instructions:**
         1.  **Content per Approach:** The approach object **MUST** contain:
             *   `title`: A descriptive title for the approach (e.g., "The 101 Guide to {topic}", "Level Up: Practical {topic} Patterns", "Pro-Tip: Avoiding a Common {topic} Trap").
@@ -73,29 +89,49 @@ class ContentCreatorAgent:
 
         **Generate the JSON object now.**
         """
-        system_prompt = "You are a specialized agent for explaining programming concepts in detail and outputting valid JSON."
-        
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                logging.debug(f"ContentCreatorAgent: Attempt {attempt + 1} to generate single approach for {topic} ({approach_desc}).")
-                result = self.llm.invoke(system_prompt, base_prompt, parse_json=True)
-                if isinstance(result, dict) and 'title' in result and 'explanation' in result and 'code_examples' in result:
-                    logging.info(f"ContentCreatorAgent: Successfully parsed and validated approach JSON on attempt {attempt + 1}.")
-                    return result
-                else:
-                    logging.warning(f"ContentCreatorAgent: Invalid JSON structure for approach on attempt {attempt + 1}. Retrying...")
-            except Exception as e:
-                logging.error(f"ContentCreatorAgent: Error during LLM invocation or JSON parsing on attempt {attempt + 1}: {e}. Retrying...")
-            
-            # If it's the last attempt and still failing, add a stronger instruction
-            if attempt == max_retries - 1:
-                logging.warning("ContentCreatorAgent: Last attempt failed. Adding stronger JSON instruction to prompt.")
-                base_prompt += "\n\n**CRITICAL: You MUST return a valid JSON object. Do NOT include any other text or markdown outside the JSON object.**"
+        return build_shared_context(topic, research_digest), self.llm.append_feedback(base_prompt, feedback)
 
-        logging.error("ContentCreatorAgent: All retries failed for generating single approach. Returning error structure.")
+    @staticmethod
+    def _is_valid_approach(result):
+        return isinstance(result, dict) and 'title' in result and 'explanation' in result and 'code_examples' in result
+
+    @staticmethod
+    def _approach_error_structure():
         return {
             "title": "Error in Content Generation",
             "explanation": "Failed to generate valid content after multiple retries due to invalid JSON structure.",
             "code_examples": []
         }
+
+    def _approach_or_error(self, result):
+        if self._is_valid_approach(result):
+            logging.info("ContentCreatorAgent: Successfully parsed and validated approach JSON.")
+            return result
+        logging.error("ContentCreatorAgent: All retries failed for generating single approach. Returning error structure.")
+        return self._approach_error_structure()
+
+    def generate_single_approach(self, topic, research_data, approach_desc, feedback=None, research_digest=None):
+        """
+        Generates a single, detailed approach to explain the topic.
+        """
+        logging.info(f"ContentCreatorAgent: Generating single approach for topic: {topic}, approach: {approach_desc}")
+        logging.debug(f"ContentCreatorAgent: Research data for approach: {research_data}")
+        system_prompt, base_prompt = self._build_approach_prompt(topic, research_data, approach_desc, feedback, research_digest)
+        try:
+            # Output that fails the schema is re-requested by LLMUtils, which counts the retries.
+            result = self.llm.invoke(system_prompt, base_prompt, schema=APPROACH_SCHEMA)
+        except Exception as e:
+            logging.error(f"ContentCreatorAgent: Error during LLM invocation for approach: {e}")
+            result = None
+        return self._approach_or_error(result)
+
+    async def agenerate_single_approach(self, topic, research_data, approach_desc, feedback=None, research_digest=None):
+        """Async variant of generate_single_approach"""
+        logging.info(f"ContentCreatorAgent: Generating single approach for topic: {topic}, approach: {approach_desc}")
+        system_prompt, base_prompt = self._build_approach_prompt(topic, research_data, approach_desc, feedback, research_digest)
+        try:
+            result = await self.llm.ainvoke(system_prompt, base_prompt, schema=APPROACH_SCHEMA)
+        except Exception as e:
+            logging.error(f"ContentCreatorAgent: Error during LLM invocation for approach: {e}")
+            result = None
+        return self._approach_or_error(result)
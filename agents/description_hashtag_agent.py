@@ -1,41 +1,55 @@
 
+import asyncio
 import logging
-from utils.llm_utils import LLMUtils
+from utils.llm_utils import get_llm_for_task
+from utils.research_digest import build_research_digest
+from utils.prompt_context import build_shared_context
 from config.settings import Config
 from typing import Dict, Any
-import json
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class DescriptionHashtagAgent:
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=0.6)
+        self.llm_utils = get_llm_for_task('description', temperature=0.6)
+        self.hashtag_llm = get_llm_for_task('hashtags', temperature=0.6)
         logging.info("DescriptionHashtagAgent initialized.")
     
     def generate_description_and_hashtags(self, topic: str, research_data: Dict[str, Any]) -> Dict[str, Any]:
         logging.info(f"DescriptionHashtagAgent: Generating description and hashtags for topic: {topic}")
         logging.debug(f"DescriptionHashtagAgent: Research data for description/hashtags: {research_data}")
+        if Config.FUSED_METADATA_ENABLED:
+            # MetadataAgent falls back to this agent per field, so it is imported here rather than at module level.
+            from agents.metadata_agent import MetadataAgent
+            return MetadataAgent().generate_metadata(topic, research_data, fields=['description', 'hashtags'])
         description = self.generate_description(topic, research_data)
         hashtags = self.generate_hashtags(topic, research_data)
         logging.info("DescriptionHashtagAgent: Description and hashtags generation complete.")
         return {"description": description, "hashtags": hashtags}
 
-    def generate_description(self, topic, research_data):
-        logging.info(f"DescriptionHashtagAgent: Generating description for topic: {topic}")
-        """
-        Generates a concise and SEO-friendly description for the content.
-        """
+    async def agenerate_description_and_hashtags(self, topic: str, research_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant that generates the description and hashtags concurrently"""
+        logging.info(f"DescriptionHashtagAgent: Generating description and hashtags for topic: {topic}")
+        if Config.FUSED_METADATA_ENABLED:
+            from agents.metadata_agent import MetadataAgent
+            return await MetadataAgent().agenerate_metadata(topic, research_data, fields=['description', 'hashtags'])
+        description, hashtags = await asyncio.gather(
+            self.agenerate_description(topic, research_data),
+            self.agenerate_hashtags(topic, research_data)
+        )
+        logging.info("DescriptionHashtagAgent: Description and hashtags generation complete.")
+        return {"description": description, "hashtags": hashtags}
+
+    def _build_description_prompt(self, topic, research_data, feedback=None, research_digest=None):
+        research_digest = research_digest or build_research_digest(research_data)
         prompt = f"""
+        **Role:** You are a specialized agent for generating SEO-optimized content descriptions.
+
         **Objective:** Create a compelling and SEO-optimized description for educational content about "{topic}".
 
         **Context:**
         The description will be used for social media, video platforms, and blog posts. It needs to be engaging, informative, and contain relevant keywords to improve visibility. Use the provided research data to inform the description.
 
-        **Research Data:**
-        ```json
-        {json.dumps(research_data, indent=2)}
-        ```
-
         **Instructions:**
         1.  Start with a hook that clearly states what the content is about and its main benefit.
         2.  Briefly summarize the key concepts that will be covered.
@@ -48,27 +62,36 @@ class DescriptionHashtagAgent:
 
         **Generate the description now.**
         """
-        system_prompt = "You are a specialized agent for generating SEO-optimized content descriptions."
+        return build_shared_context(topic, research_digest), self.llm_utils.append_feedback(prompt, feedback)
+
+    def generate_description(self, topic, research_data, feedback=None, research_digest=None):
+        """
+        Generates a concise and SEO-friendly description for the content.
+        """
+        logging.info(f"DescriptionHashtagAgent: Generating description for topic: {topic}")
+        system_prompt, prompt = self._build_description_prompt(topic, research_data, feedback, research_digest)
         description_content = self.llm_utils.invoke(system_prompt, prompt)
         logging.info("DescriptionHashtagAgent: Description generated.")
         return description_content
 
-    def generate_hashtags(self, topic, research_data):
-        logging.info(f"DescriptionHashtagAgent: Generating hashtags for topic: {topic}")
-        """
-        Generates a list of relevant hashtags for the content.
-        """
+    async def agenerate_description(self, topic, research_data, feedback=None, research_digest=None):
+        """Async variant of generate_description"""
+        logging.info(f"DescriptionHashtagAgent: Generating description for topic: {topic}")
+        system_prompt, prompt = self._build_description_prompt(topic, research_data, feedback, research_digest)
+        description_content = await self.llm_utils.ainvoke(system_prompt, prompt)
+        logging.info("DescriptionHashtagAgent: Description generated.")
+        return description_content
+
+    def _build_hashtag_prompt(self, topic, research_data, feedback=None, research_digest=None):
+        research_digest = research_digest or build_research_digest(research_data)
         prompt = f"""
+        **Role:** You are a specialized agent for generating relevant hashtags for content.
+
         **Objective:** Generate a list of relevant and trending hashtags for content about "{topic}".
 
         **Context:**
         Hashtags are crucial for discoverability on social media and video platforms. They should be a mix of broad, niche, and specific tags related to the topic.
 
-        **Research Data:**
-        ```json
-        {json.dumps(research_data, indent=2)}
-        ```
-
         **Instructions:**
         1.  Identify the core concepts and technologies related to "{topic}".
         2.  Include a mix of popular hashtags (e.g., #programming, #developer) and more specific ones (e.g., #{topic.replace(' ', '')}, #asyncio).
@@ -94,23 +117,34 @@ class DescriptionHashtagAgent:
 
         **Generate the JSON array of hashtags now.**
         """
-        system_prompt = "You are a specialized agent for generating relevant hashtags for content."
-        response_str = self.llm_utils.invoke(system_prompt, prompt)
+        return build_shared_context(topic, research_digest), self.llm_utils.append_feedback(prompt, feedback)
+
+    def generate_hashtags(self, topic, research_data, feedback=None, research_digest=None):
+        """
+        Generates a list of relevant hashtags for the content.
+        """
+        logging.info(f"DescriptionHashtagAgent: Generating hashtags for topic: {topic}")
+        system_prompt, prompt = self._build_hashtag_prompt(topic, research_data, feedback, research_digest)
+        response_str = self.hashtag_llm.invoke(system_prompt, prompt)
+        return self._parse_hashtags(response_str)
+
+    async def agenerate_hashtags(self, topic, research_data, feedback=None, research_digest=None):
+        """Async variant of generate_hashtags"""
+        logging.info(f"DescriptionHashtagAgent: Generating hashtags for topic: {topic}")
+        system_prompt, prompt = self._build_hashtag_prompt(topic, research_data, feedback, research_digest)
+        response_str = await self.hashtag_llm.ainvoke(system_prompt, prompt)
+        return self._parse_hashtags(response_str)
+
+    def _parse_hashtags(self, response_str):
         logging.debug(f"DescriptionHashtagAgent: Raw LLM response for hashtags: {response_str}")
-        try:
-            # Clean the response to ensure it's a valid JSON string
-            start_index = response_str.find('[')
-            end_index = response_str.rfind(']') + 1
-            if start_index != -1 and end_index != -1:
-                json_str = response_str[start_index:end_index]
-                hashtags = json.loads(json_str)
+        if '[' in response_str:
+            hashtags = self.llm_utils._parse_and_repair_json(response_str, allow_list=True)
+            if isinstance(hashtags, dict):
+                # Accept {"hashtags": [...]} as well as a bare array
+                hashtags = hashtags.get('hashtags', [])
+            if isinstance(hashtags, list) and hashtags:
                 logging.info("DescriptionHashtagAgent: Successfully parsed hashtags JSON.")
-                return hashtags
-            else:
-                logging.warning("DescriptionHashtagAgent: No JSON array found in the response for hashtags. Attempting fallback.")
-                # Fallback for plain text list
-                return [tag.strip().replace('#', '') for tag in response_str.split()]
-        except json.JSONDecodeError as e:
-            logging.error(f"DescriptionHashtagAgent: JSON decoding error for hashtags: {e}. Attempting fallback.")
-            # Fallback for plain text list
-            return [tag.strip().replace('#', '') for tag in response_str.split()]
+                return [str(tag).strip().lstrip('#') for tag in hashtags]
+        logging.warning("DescriptionHashtagAgent: No JSON array found in the response for hashtags. Attempting fallback.")
+        # Fallback for plain text list
+        return [tag.strip().replace('#', '') for tag in response_str.split()]
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+from agents.title_generator_agent import TitleGeneratorAgent
+from agents.description_hashtag_agent import DescriptionHashtagAgent
+from utils.llm_utils import get_llm_for_task
+from utils.research_digest import build_research_digest
+from utils.prompt_context import build_shared_context
+from config.settings import Config
+from typing import Dict, Any, List
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+METADATA_FIELDS = ['titles', 'description', 'hashtags']
+
+# JSON schema for each field of the fused response; the requested fields form the response object.
+METADATA_SCHEMA = {
+    'titles': {'type': 'array', 'items': {'type': 'string', 'minLength': 1}, 'minItems': 3, 'maxItems': 5},
+    'description': {'type': 'string', 'minLength': 40},
+    'hashtags': {'type': 'array', 'items': {'type': 'string', 'minLength': 1}, 'minItems': 5, 'maxItems': 15}
+}
+
+
+def metadata_schema(fields: List[str]) -> Dict[str, Any]:
+    """
+    JSON schema of the fused response for the requested fields. maxItems is left out: validate_field
+    truncates long lists for free, so a few extra items must not trigger a structured-output retry.
+    """
+    return {
+        'type': 'object',
+        'properties': {
+            field: {key: value for key, value in METADATA_SCHEMA[field].items() if key != 'maxItems'}
+            for field in fields
+        },
+        'required': list(fields)
+    }
+
+
+def validate_field(field: str, value: Any):
+    """Return the value normalized to the field's schema, or None if it does not conform."""
+    schema = METADATA_SCHEMA[field]
+    if schema['type'] == 'string':
+        if not isinstance(value, str) or len(value.strip()) < schema['minLength']:
+            return None
+        return value.strip()
+    if not isinstance(value, list):
+        return None
+    items = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+    if field == 'hashtags':
+        items = [item.lstrip('#') for item in items]
+    if len(items) < schema['minItems']:
+        return None
+    return items[:schema['maxItems']]
+
+
+class MetadataAgent:
+    """
+    Generates titles, description and hashtags in one structured call. Fields still missing from the
+    response or failing the schema after LLMUtils' own retries are regenerated by the dedicated agent.
+    """
+
+    def __init__(self):
+        self.llm_utils = get_llm_for_task('metadata', temperature=0.7)
+        logging.info("MetadataAgent initialized.")
+
+    def _build_prompts(self, topic: str, research_data: Dict[str, Any], fields: List[str],
+                       feedback: List[str] = None, research_digest: str = None):
+        research_digest = research_digest or build_research_digest(research_data)
+        instructions = {
+            'titles': f'''"titles": 5 YouTube titles for {Config.CHANNEL_NAME}, 60 characters or less, click-worthy but not
+           clickbait, with relevant keywords; appeal to beginners, intermediate developers and advanced users.''',
+            'description': '''"description": one SEO-optimized block of 100-150 words that opens with a hook stating what the
+           content covers and its main benefit, then summarizes the key concepts with natural keywords.''',
+            'hashtags': f'''"hashtags": 10-15 hashtags without the leading '#', mixing broad tags (e.g. programming) with
+           specific ones (e.g. {topic.replace(' ', '')}).'''
+        }
+        fields_text = "\n        ".join(f"{number}. {instructions[field]}" for number, field in enumerate(fields, 1))
+        human_prompt = f'''
+        You are the metadata specialist for videos, social posts and blog articles about "{topic}".
+        Use the research data to make every field accurate and discoverable.
+
+        Produce these fields:
+        {fields_text}
+
+        Return only a JSON object matching this schema:
+        {json.dumps(metadata_schema(fields))}
+        '''
+        return build_shared_context(topic, research_digest), self.llm_utils.append_feedback(human_prompt, feedback)
+
+    def _validate(self, result: Any, fields: List[str]):
+        """Split the fused response into fields that passed validation and fields that need a fallback."""
+        logging.debug(f"MetadataAgent: Parsed LLM response: {result}")
+        if not isinstance(result, dict):
+            result = {}
+        metadata = {}
+        for field in fields:
+            value = validate_field(field, result.get(field))
+            if value is not None:
+                metadata[field] = value
+        failed = [field for field in fields if field not in metadata]
+        if failed:
+            logging.warning(f"MetadataAgent: Fields failed validation, falling back to dedicated agents: {failed}")
+        return metadata, failed
+
+    def generate_metadata(self, topic: str, research_data: Dict[str, Any], fields: List[str] = None,
+                          feedback: List[str] = None, research_digest: str = None) -> Dict[str, Any]:
+        """Generate the requested metadata fields (all of them by default) with one LLM call."""
+        fields = fields or METADATA_FIELDS
+        logging.info(f"MetadataAgent: Generating {fields} for topic: {topic}")
+        system_prompt, human_prompt = self._build_prompts(topic, research_data, fields, feedback, research_digest)
+        try:
+            metadata, failed = self._validate(
+                self.llm_utils.invoke(system_prompt, human_prompt, schema=metadata_schema(fields)), fields)
+        except Exception as e:
+            logging.error(f"MetadataAgent: Fused call failed: {e}")
+            metadata, failed = {}, list(fields)
+        for field in failed:
+            if field == 'titles':
+                metadata[field] = TitleGeneratorAgent().generate_titles(topic, research_data, feedback, research_digest)
+            elif field == 'description':
+                metadata[field] = DescriptionHashtagAgent().generate_description(topic, research_data, feedback, research_digest)
+            else:
+                metadata[field] = DescriptionHashtagAgent().generate_hashtags(topic, research_data, feedback, research_digest)
+        logging.info("MetadataAgent: Metadata generation complete.")
+        return metadata
+
+    async def agenerate_metadata(self, topic: str, research_data: Dict[str, Any], fields: List[str] = None,
+                                 feedback: List[str] = None, research_digest: str = None) -> Dict[str, Any]:
+        """Async variant of generate_metadata; fallbacks for several fields run concurrently."""
+        fields = fields or METADATA_FIELDS
+        logging.info(f"MetadataAgent: Generating {fields} for topic: {topic}")
+        system_prompt, human_prompt = self._build_prompts(topic, research_data, fields, feedback, research_digest)
+        try:
+            metadata, failed = self._validate(
+                await self.llm_utils.ainvoke(system_prompt, human_prompt, schema=metadata_schema(fields)), fields)
+        except Exception as e:
+            logging.error(f"MetadataAgent: Fused call failed: {e}")
+            metadata, failed = {}, list(fields)
+        fallbacks = {
+            'titles': lambda: TitleGeneratorAgent().agenerate_titles(topic, research_data, feedback, research_digest),
+            'description': lambda: DescriptionHashtagAgent().agenerate_description(topic, research_data, feedback, research_digest),
+            'hashtags': lambda: DescriptionHashtagAgent().agenerate_hashtags(topic, research_data, feedback, research_digest)
+        }
+        values = await asyncio.gather(*(fallbacks[field]() for field in failed))
+        metadata.update(zip(failed, values))
+        logging.info("MetadataAgent: Metadata generation complete.")
+        return metadata
@@ -1,21 +1,25 @@
 
 import logging
-from utils.llm_utils import LLMUtils
-from config.settings import Config
+from utils.llm_utils import get_llm_for_task
 from typing import Dict, Any
 import json
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class QualityAssuranceAgent:
+    # Sections of a content package that are scored individually and can be regenerated on their own
+    SECTION_KEYS = [
+        "titles", "description", "hashtags", "content_intro",
+        "approach_1", "approach_2", "approach_3", "approach_4", "approach_5",
+        "youtube_content"
+    ]
+
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=0.2)
+        self.llm_utils = get_llm_for_task('quality_assurance', temperature=0.2)
         logging.info("QualityAssuranceAgent initialized.")
     
-    def evaluate_content(self, content_package: Dict[str, Any]) -> Dict[str, Any]:
-        logging.info("QualityAssuranceAgent: Starting content evaluation.")
-        logging.debug(f"QualityAssuranceAgent: Content package for evaluation: {json.dumps(content_package, indent=2)}")
-        """Comprehensive quality evaluation for overall package"""
+    def _build_prompts(self, content_package: Dict[str, Any]):
+        """Build the system and human prompts for evaluation"""
         system_prompt = '''
         You are a comprehensive quality assurance agent for YouTube content packages.
         
@@ -43,9 +47,22 @@ class QualityAssuranceAgent:
             "overall_score": float_calculated_score,
             "feedback": "Detailed feedback for improvement",
             "strengths": ["strength1", "strength2"],
-            "improvements": ["improvement1", "improvement2"]
+            "improvements": ["improvement1", "improvement2"],
+            "section_scores": {
+                "titles": float_score,
+                "description": float_score,
+                "hashtags": float_score,
+                "content_intro": float_score,
+                "approach_1": float_score,
+                "approach_2": float_score,
+                "approach_3": float_score,
+                "approach_4": float_score,
+                "approach_5": float_score,
+                "youtube_content": float_score
+            }
         }
         All scores should be floats between 0.0 and 10.0.
+        "section_scores" rates each part of the package on its own, so weak parts can be rewritten individually.
         '''
         
         human_prompt = f'''
@@ -55,12 +72,30 @@ class QualityAssuranceAgent:
         
         Provide detailed scoring and actionable feedback.
         '''
-        
+        return system_prompt, human_prompt
+
+    def evaluate_content(self, content_package: Dict[str, Any]) -> Dict[str, Any]:
+        """Comprehensive quality evaluation for overall package"""
+        logging.info("QualityAssuranceAgent: Starting content evaluation.")
+        logging.debug(f"QualityAssuranceAgent: Content package for evaluation: {json.dumps(content_package, indent=2)}")
+        system_prompt, human_prompt = self._build_prompts(content_package)
         logging.debug("QualityAssuranceAgent: Invoking LLM for evaluation.")
         raw_content = self.llm_utils.invoke(system_prompt, human_prompt)
+        return self._process_evaluation(raw_content)
+
+    async def aevaluate_content(self, content_package: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of evaluate_content"""
+        logging.info("QualityAssuranceAgent: Starting content evaluation.")
+        system_prompt, human_prompt = self._build_prompts(content_package)
+        raw_content = await self.llm_utils.ainvoke(system_prompt, human_prompt)
+        return self._process_evaluation(raw_content)
+
+    def _process_evaluation(self, raw_content: str) -> Dict[str, Any]:
         logging.debug(f"QualityAssuranceAgent: Raw LLM response: {raw_content}")
         
         result = self.llm_utils._parse_and_repair_json(raw_content)
+        if not isinstance(result, dict):
+            result = {}
         logging.debug(f"QualityAssuranceAgent: Parsed and repaired JSON result: {result}")
         
         # Calculate overall score if not provided by the LLM
@@ -74,5 +109,19 @@ class QualityAssuranceAgent:
                 result.get('seo_optimization', 0) * 0.15
             )
         
+        result['section_scores'] = self._normalize_section_scores(result.get('section_scores'))
+        
         logging.info("QualityAssuranceAgent: Content evaluation complete.")
         return result
+
+    def _normalize_section_scores(self, section_scores) -> Dict[str, float]:
+        """Keep only known sections with numeric scores"""
+        if not isinstance(section_scores, dict):
+            return {}
+        normalized = {}
+        for key in self.SECTION_KEYS:
+            try:
+                normalized[key] = float(section_scores[key])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return normalized
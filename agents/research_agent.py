@@ -1,21 +1,20 @@
 
 import logging
-from utils.llm_utils import LLMUtils
+from utils.llm_utils import get_llm_for_task
 from utils.database_manager import DatabaseManager
 from config.settings import Config
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class ResearchAgent:
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=0.3)
+        self.llm_utils = get_llm_for_task('research', temperature=0.3)
         self.db_manager = DatabaseManager()
         logging.info("ResearchAgent initialized.")
     
-    def conduct_research(self, topic: str) -> Dict[str, Any]:
-        logging.info(f"ResearchAgent: Starting research for topic: {topic}")
-        """Conduct comprehensive research on the given topic"""
+    def _build_prompts(self, topic: str, related_content: List[Dict[str, Any]] = None):
+        """Build the system and human prompts for research, pointing at related content we already published"""
         system_prompt = f'''
         You are a specialized research agent for programming and tech content creation.
         Your task is to research comprehensive information about the given topic.
@@ -53,12 +52,54 @@ class ResearchAgent:
         Make sure to cover both theoretical concepts and practical implementations.
         Include specific examples, code patterns, and real-world scenarios.
         '''
-        
-        logging.debug("ResearchAgent: Invoking LLM for research.")
-        raw_content = self.llm_utils.invoke(system_prompt, human_prompt)
+        if related_content:
+            covered = "\n        ".join(f"- {item['topic']} (quality score {item['quality_score']:.1f})"
+                                        for item in related_content)
+            human_prompt += f'''
+        We already published well-received content on these related topics:
+        {covered}
+        Build on them: go deeper where they stayed general and favor angles they did not cover.
+        '''
+        return system_prompt, human_prompt
+
+    def _get_cached(self, topic: str):
+        cached_research = self.db_manager.get_cached_research(topic)
+        if cached_research:
+            logging.info(f"ResearchAgent: Using cached research for topic: {topic}")
+        return cached_research
+
+    def _process_research(self, topic: str, raw_content: str) -> Dict[str, Any]:
         logging.debug(f"ResearchAgent: Raw LLM response: {raw_content}")
-        
         research_data = self.llm_utils._parse_and_repair_json(raw_content)
+        if not isinstance(research_data, dict):
+            research_data = {}
+        if research_data:
+            self.db_manager.save_research_cache(topic, research_data)
         logging.info("ResearchAgent: Research complete.")
         logging.debug(f"ResearchAgent: Parsed research data: {research_data}")
         return research_data
+
+    def conduct_research(self, topic: str, use_cache: bool = True,
+                         related_content: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Conduct comprehensive research on the given topic, reusing fresh cached research when allowed"""
+        logging.info(f"ResearchAgent: Starting research for topic: {topic}")
+        if use_cache:
+            cached_research = self._get_cached(topic)
+            if cached_research:
+                return cached_research
+        system_prompt, human_prompt = self._build_prompts(topic, related_content)
+        logging.debug("ResearchAgent: Invoking LLM for research.")
+        raw_content = self.llm_utils.invoke(system_prompt, human_prompt)
+        return self._process_research(topic, raw_content)
+
+    async def aconduct_research(self, topic: str, use_cache: bool = True,
+                                related_content: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of conduct_research"""
+        logging.info(f"ResearchAgent: Starting research for topic: {topic}")
+        if use_cache:
+            cached_research = self._get_cached(topic)
+            if cached_research:
+                return cached_research
+        system_prompt, human_prompt = self._build_prompts(topic, related_content)
+        raw_content = await self.llm_utils.ainvoke(system_prompt, human_prompt)
+        return self._process_research(topic, raw_content)
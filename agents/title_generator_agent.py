@@ -1,6 +1,8 @@
 
 import logging
-from utils.llm_utils import LLMUtils
+from utils.llm_utils import get_llm_for_task
+from utils.research_digest import build_research_digest
+from utils.prompt_context import build_shared_context
 from config.settings import Config
 from typing import Dict, Any, List
 
@@ -8,14 +10,13 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 class TitleGeneratorAgent:
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=0.8)
+        self.llm_utils = get_llm_for_task('titles', temperature=0.8)
         logging.info("TitleGeneratorAgent initialized.")
     
-    def generate_titles(self, topic: str, research_data: Dict[str, Any]) -> List[str]:
-        logging.info(f"TitleGeneratorAgent: Generating titles for topic: {topic}")
-        logging.debug(f"TitleGeneratorAgent: Research data for titles: {research_data}")
-        """Generate 5 compelling titles for the video"""
-        system_prompt = f'''
+    def _build_prompts(self, topic: str, research_data: Dict[str, Any], feedback: List[str] = None, research_digest: str = None):
+        """Build the system and human prompts for title generation"""
+        research_digest = research_digest or build_research_digest(research_data)
+        human_prompt = f'''
         You are a YouTube title optimization expert for the tech channel {Config.CHANNEL_NAME}.
         
         Title Requirements:
@@ -31,25 +32,35 @@ class TitleGeneratorAgent:
         - Intermediate developers seeking best practices
         - Advanced users wanting expert insights
         
+        Use the technical details, difficulty analysis and industry relevance from the research data.
+        Create 5 engaging titles about "{topic}" that would make viewers want to click and learn.
+
         Return exactly 5 titles in JSON format: {{"titles": ["title1", "title2", ...]}}
         '''
-        
-        human_prompt = f'''
-        TOPIC: {topic}
-        
-        RESEARCH CONTEXT:
-        Technical Details: {research_data.get('technical_details', 'N/A')}
-        Difficulty Level: {research_data.get('difficulty_analysis', 'N/A')}
-        Industry Relevance: {research_data.get('industry_relevance', 'N/A')}
-        
-        Create 5 engaging titles that would make viewers want to click and learn.
-        '''
-        
-        logging.debug("TitleGeneratorAgent: Invoking LLM for title generation.")
-        raw_content = self.llm_utils.invoke(system_prompt, human_prompt)
+        return build_shared_context(topic, research_digest), self.llm_utils.append_feedback(human_prompt, feedback)
+
+    def _parse_titles(self, raw_content: str) -> List[str]:
         logging.debug(f"TitleGeneratorAgent: Raw LLM response: {raw_content}")
-        
-        result = self.llm_utils._parse_and_repair_json(raw_content)
+        result = self.llm_utils._parse_and_repair_json(raw_content, allow_list=True)
+        if isinstance(result, list):
+            # The model returned a bare array of titles instead of {"titles": [...]}
+            result = {'titles': result}
         logging.info("TitleGeneratorAgent: Titles generated.")
         logging.debug(f"TitleGeneratorAgent: Parsed titles: {result.get('titles', [])}")
         return result.get('titles', [])
+
+    def generate_titles(self, topic: str, research_data: Dict[str, Any], feedback: List[str] = None, research_digest: str = None) -> List[str]:
+        """Generate 5 compelling titles for the video"""
+        logging.info(f"TitleGeneratorAgent: Generating titles for topic: {topic}")
+        logging.debug(f"TitleGeneratorAgent: Research data for titles: {research_data}")
+        system_prompt, human_prompt = self._build_prompts(topic, research_data, feedback, research_digest)
+        logging.debug("TitleGeneratorAgent: Invoking LLM for title generation.")
+        raw_content = self.llm_utils.invoke(system_prompt, human_prompt)
+        return self._parse_titles(raw_content)
+
+    async def agenerate_titles(self, topic: str, research_data: Dict[str, Any], feedback: List[str] = None, research_digest: str = None) -> List[str]:
+        """Async variant of generate_titles"""
+        logging.info(f"TitleGeneratorAgent: Generating titles for topic: {topic}")
+        system_prompt, human_prompt = self._build_prompts(topic, research_data, feedback, research_digest)
+        raw_content = await self.llm_utils.ainvoke(system_prompt, human_prompt)
+        return self._parse_titles(raw_content)
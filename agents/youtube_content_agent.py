@@ -1,32 +1,36 @@
 
 import logging
-import json
-from typing import Dict, Any
-from utils.llm_utils import LLMUtils
-from config.settings import Config
+from typing import Dict, Any, List
+from utils.llm_utils import get_llm_for_task
+from utils.research_digest import build_research_digest
+from utils.prompt_context import build_shared_context
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+VIDEO_SCRIPT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'full_script': {'type': 'string', 'minLength': 1},
+        'brief_script': {'type': 'string', 'minLength': 1}
+    },
+    'required': ['full_script', 'brief_script']
+}
+
 class YouTubeContentAgent:
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=0.8)
+        self.llm_utils = get_llm_for_task('youtube_content', temperature=0.8)
         logging.info("YouTubeContentAgent initialized.")
 
-    def generate_video_content(self, topic: str, research_data: Dict[str, Any]) -> Dict[str, Any]:
-        logging.info(f"YouTubeContentAgent: Generating YouTube video content for topic: {topic}")
-        logging.debug(f"YouTubeContentAgent: Research data for video content: {research_data}")
-        try:
-            system_prompt = "You are a specialized agent for creating engaging and educational YouTube video scripts."
-            human_prompt = f"""
+    def _build_prompts(self, topic: str, research_data: Dict[str, Any], feedback: List[str] = None, research_digest: str = None):
+        """Build the system and human prompts for script generation"""
+        research_digest = research_digest or build_research_digest(research_data)
+        human_prompt = f"""
+            **Role:** You are a specialized agent for creating engaging and educational YouTube video scripts.
+
             **Objective:** Create detailed and engaging YouTube video scripts for the topic of "{topic}".
 
             **Context & Tone:** The tone should be conversational, educational, and engaging. The scripts should cater to an audience of intermediate developers. Provide two versions: a full script for a long video and a brief script for a shorter format.
 
-            **Research Data for Context:**
-            ```json
-            {json.dumps(research_data, indent=2)}
-            ```
-
             **Instructions for Full Script:**
             1. Start with a captivating hook to grab attention.
             2. Introduce the topic and its importance.
@@ -50,20 +54,43 @@ class YouTubeContentAgent:
 
             **Generate the scripts now.**
             """
-            # Explicitly instruct the LLM to return strict JSON format to avoid parsing issues
-            human_prompt += "\n\n**CRITICAL: Return ONLY a valid JSON object with 'full_script' and 'brief_script' keys. Do not include any explanatory text or markdown outside the JSON structure. Ensure the response is parseable as JSON without additional processing.**\n**IMPORTANT: All double quotes within the 'full_script' and 'brief_script' content MUST be escaped (e.g., \" becomes \\\" ).**"
+        # Explicitly instruct the LLM to return strict JSON format to avoid parsing issues
+        human_prompt += "\n\n**CRITICAL: Return ONLY a valid JSON object with 'full_script' and 'brief_script' keys. Do not include any explanatory text or markdown outside the JSON structure. Ensure the response is parseable as JSON without additional processing.**\n**IMPORTANT: All double quotes within the 'full_script' and 'brief_script' content MUST be escaped (e.g., \" becomes \\\" ).**"
+        return build_shared_context(topic, research_digest), self.llm_utils.append_feedback(human_prompt, feedback)
+
+    def _validate_video_content(self, video_content) -> Dict[str, Any]:
+        logging.debug(f"YouTubeContentAgent: Parsed video content: {video_content}")
+        if not isinstance(video_content, dict) or 'full_script' not in video_content or 'brief_script' not in video_content:
+            logging.warning("YouTubeContentAgent: Failed to parse valid JSON for video content. Returning default structure.")
+            video_content = {
+                "full_script": "Failed to generate full script due to parsing error.",
+                "brief_script": "Failed to generate brief script due to parsing error."
+            }
+        logging.info("YouTubeContentAgent: Successfully generated YouTube video content.")
+        return video_content
+
+    def generate_video_content(self, topic: str, research_data: Dict[str, Any], feedback: List[str] = None, research_digest: str = None) -> Dict[str, Any]:
+        logging.info(f"YouTubeContentAgent: Generating YouTube video content for topic: {topic}")
+        logging.debug(f"YouTubeContentAgent: Research data for video content: {research_data}")
+        try:
+            system_prompt, human_prompt = self._build_prompts(topic, research_data, feedback, research_digest)
             logging.debug("YouTubeContentAgent: Invoking LLM for video content generation.")
-            video_content = self.llm_utils.invoke(system_prompt, human_prompt, parse_json=True)
-            logging.debug(f"YouTubeContentAgent: Parsed video content: {video_content}")
+            video_content = self.llm_utils.invoke(system_prompt, human_prompt, schema=VIDEO_SCRIPT_SCHEMA)
+            return self._validate_video_content(video_content)
+        except Exception as e:
+            logging.error(f"YouTubeContentAgent: Error generating YouTube video content: {e}")
+            return {"full_script": "Error generating full script.", "brief_script": "Error generating brief script."}
 
-            if not isinstance(video_content, dict) or 'full_script' not in video_content or 'brief_script' not in video_content:
-                logging.warning("YouTubeContentAgent: Failed to parse valid JSON for video content. Returning default structure.")
-                video_content = {
-                    "full_script": "Failed to generate full script due to parsing error.",
-                    "brief_script": "Failed to generate brief script due to parsing error."
-                }
-            logging.info("YouTubeContentAgent: Successfully generated YouTube video content.")
-            return video_content
+    async def agenerate_video_content(self, topic: str, research_data: Dict[str, Any], on_token=None, feedback: List[str] = None, research_digest: str = None) -> Dict[str, Any]:
+        """Async variant of generate_video_content; streams raw tokens to on_token when given"""
+        logging.info(f"YouTubeContentAgent: Generating YouTube video content for topic: {topic}")
+        try:
+            system_prompt, human_prompt = self._build_prompts(topic, research_data, feedback, research_digest)
+            if on_token:
+                video_content = await self.llm_utils.astream_collect(system_prompt, human_prompt, on_token, schema=VIDEO_SCRIPT_SCHEMA)
+            else:
+                video_content = await self.llm_utils.ainvoke(system_prompt, human_prompt, schema=VIDEO_SCRIPT_SCHEMA)
+            return self._validate_video_content(video_content)
         except Exception as e:
             logging.error(f"YouTubeContentAgent: Error generating YouTube video content: {e}")
             return {"full_script": "Error generating full script.", "brief_script": "Error generating brief script."}
@@ -1,10 +1,16 @@
 
 import streamlit as st
-from workflow.enhanced_workflow import EnhancedContentWorkflow
+from workflow.job_runner import get_job_runner
 from utils.database_manager import DatabaseManager
 from utils.pdf_generator import PDFGenerator
 import json
+import time
 from workflow.pdf_generation_workflow import PDFGenerationWorkflow
+from utils.tracing import export_chrome_trace, summarize_latencies, summarize_model_tiers
+from utils.hedging import hedge_tracker
+from utils.rate_limiter import rate_limiter
+from utils.provider_router import provider_router
+from config.settings import Config
 
 def main():
     st.set_page_config(
@@ -61,9 +67,10 @@ def main():
     st.sidebar.title("GenKodeX Navigation")
     
     db_manager = DatabaseManager()
+    job_runner = get_job_runner()
 
     # Create tabs for different sections
-    tab1, tab2 = st.tabs(["🚀 Content Generation", "📚 Content Library"])
+    tab1, tab2, tab3 = st.tabs(["🚀 Content Generation", "📚 Content Library", "⏱️ Performance"])
 
     with tab1:
         st.markdown("<h1 class='main-header'>GenKodeX Content Studio</h1>", unsafe_allow_html=True)
@@ -74,23 +81,96 @@ def main():
 
         if st.button("Generate Content", type="primary", use_container_width=True):
             if topic:
-                with st.spinner("🚀 Launching the GenKodeX workflow..."):
-                    try:
-                        workflow = EnhancedContentWorkflow()
-                        result = workflow.run(topic)
-                        st.session_state.result = result
-                        st.success("Content generation complete!")
-                    except Exception as e:
-                        st.error(f"An error occurred: {e}")
+                # The run happens on the job runner's worker pool; this session only polls its status.
+                track_job(job_runner.submit(topic))
+                st.success(f"🚀 Queued the GenKodeX workflow for '{topic}'.")
             else:
                 st.warning("Please enter a topic to begin.")
-        
-        if 'result' in st.session_state:
-            display_results(st.session_state.result)
+
+        resume_run_id = display_incomplete_runs(db_manager)
+        if resume_run_id:
+            track_job(job_runner.submit_resume(resume_run_id))
+            st.success("⏯️ Queued the run to resume from its last checkpoint.")
+
+        # Only the jobs panel polls, and only while this session has unfinished jobs; the rest of the page stays put.
+        poll_every = Config.JOB_POLL_SECONDS if st.session_state.get('jobs_active') else None
+        st.fragment(display_jobs, run_every=poll_every)(db_manager, job_runner)
+
+        if 'result_job_id' in st.session_state:
+            result = db_manager.get_job_result(st.session_state.result_job_id)
+            if result:
+                display_results(result)
 
     with tab2:
         display_content_library(db_manager)
 
+    with tab3:
+        display_performance(db_manager)
+
+def track_job(job_id):
+    """Follow a submitted job in this session and show its result once it is done."""
+    st.session_state.setdefault('job_ids', []).append(job_id)
+    st.session_state.result_job_id = job_id
+    st.session_state.jobs_active = True
+
+def display_jobs(db_manager, job_runner):
+    """
+    List recent jobs from every session. Runs as a polling fragment while one of this session's jobs
+    is unfinished, and reruns the whole page once they are all done so the result is shown.
+    """
+    jobs = db_manager.get_recent_jobs(limit=10)
+    session_jobs = set(st.session_state.get('job_ids', []))
+    jobs_active = any(job['status'] in ('queued', 'running') and job['job_id'] in session_jobs for job in jobs)
+    if st.session_state.get('jobs_active') and not jobs_active:
+        st.session_state.jobs_active = False
+        st.rerun()
+    if not jobs:
+        return
+    st.subheader("Jobs")
+    for job in jobs:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**{job['topic']}** - {job['status']} - Submitted: {job['created_at']}")
+            if job['error']:
+                st.caption(job['error'])
+        with col2:
+            if job['status'] == 'done' and st.button("View", key=f"view_{job['job_id']}"):
+                st.session_state.result_job_id = job['job_id']
+                # The result is shown outside this fragment.
+                st.rerun()
+        if job['status'] == 'running' and job['job_id'] in session_jobs:
+            display_live_preview(job_runner.preview(job['job_id']))
+
+def display_incomplete_runs(db_manager):
+    """List failed or interrupted runs; returns the run_id whose Resume button was clicked."""
+    runs = db_manager.get_incomplete_workflow_runs()
+    if not runs:
+        return None
+    active_run_ids = set(db_manager.get_active_job_run_ids())
+    resume_run_id = None
+    with st.expander(f"⏯️ Incomplete Runs ({len(runs)})"):
+        for run in runs:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**{run['topic']}** - {run['status']} - Last update: {run['updated_at']}")
+                if run['error']:
+                    st.caption(run['error'])
+            with col2:
+                # A run that a queued or running job is working on must not be resumed twice.
+                if st.button("Resume", key=f"resume_{run['run_id']}", disabled=run['run_id'] in active_run_ids):
+                    resume_run_id = run['run_id']
+    return resume_run_id
+
+def display_live_preview(preview):
+    """Render the sections a running job has streamed so far."""
+    col_intro, col_script = st.columns(2)
+    with col_intro:
+        st.markdown("##### Introduction")
+        st.markdown(preview.get('content_intro', ''))
+    with col_script:
+        st.markdown("##### Video Script (raw)")
+        st.code(preview.get('youtube_content', ''), language='json')
+
 def display_results(result):
     st.header(f"Content for: {result['topic']}")
 
@@ -241,18 +321,78 @@ def display_content_library(db_manager):
     st.markdown("<h2 style='text-align: center; color: #4CAF50;'>📚 Your Content Library</h2>", unsafe_allow_html=True)
     st.write("Browse and manage all generated content.")
 
-    all_content = db_manager.get_all_content()
+    search_text = st.text_input("Search", placeholder="Search topics, intros, approaches, scripts and hashtags",
+                                key="library_search")
+    col_status, col_score = st.columns(2)
+    with col_status:
+        status_filter = st.selectbox("Status", ["all", "pending", "approved", "rejected"], key="library_status")
+    with col_score:
+        min_score = st.slider("Minimum quality score", 0.0, 10.0, 0.0, 0.5, key="library_min_score")
+    status = None if status_filter == "all" else status_filter
+    min_score = min_score or None
+    open_ids = st.session_state.setdefault('library_open', set())
+
+    if search_text.strip():
+        results = db_manager.search_content(search_text, status, min_score)
+        if not results:
+            st.info("No content matches your search.")
+            return
+        st.caption(f"{len(results)} best matches")
+        for summary in results:
+            display_library_item(db_manager, summary, summary['id'] in open_ids)
+        return
+
+    # Each page is fetched by keyset: the last id of the previous page. Changing a filter starts over.
+    if st.session_state.get('library_filters') != (status, min_score):
+        st.session_state.library_filters = (status, min_score)
+        st.session_state.library_cursors = [None]
+    cursors = st.session_state.library_cursors
 
-    if not all_content:
+    total = db_manager.count_content(status, min_score)
+    if not total:
         st.info("No content found in the library. Generate some content first!")
         return
 
-    for content in all_content:
-        content_id = content['id']
-        topic = content['topic']
-        quality_score = content['quality_score']
-        created_at = content['created_at']
-        
+    page = db_manager.get_content_page(status, min_score, before_id=cursors[-1], limit=Config.LIBRARY_PAGE_SIZE)
+    if not page and len(cursors) > 1:
+        # The last items of this page were deleted; step back to the previous one.
+        cursors.pop()
+        st.rerun()
+    first = (len(cursors) - 1) * Config.LIBRARY_PAGE_SIZE
+    st.caption(f"Showing {first + 1}-{first + len(page)} of {total}")
+
+    for summary in page:
+        display_library_item(db_manager, summary, summary['id'] in open_ids)
+
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if len(cursors) > 1 and st.button("← Newer", key="library_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_next:
+        if page and first + len(page) < total and st.button("Older →", key="library_next"):
+            cursors.append(page[-1]['id'])
+            st.rerun()
+
+def display_library_item(db_manager, summary, is_open):
+    """Render one library entry; its full row is only loaded once the user opens it."""
+    content_id = summary['id']
+    topic = summary['topic']
+    label = (f"**{topic}** (Score: {summary['quality_score']:.2f}) - {summary['approval_status'].title()}"
+             f" - Created: {summary['created_at']}")
+
+    with st.expander(label, expanded=is_open):
+        if not is_open:
+            if st.button("Load details", key=f"open_{content_id}"):
+                st.session_state.library_open.add(content_id)
+                st.rerun()
+            return
+
+        content = db_manager.get_content_detail(content_id)
+        if content is None:
+            st.warning(f"Content ID {content_id} no longer exists.")
+            return
+
         # Parse JSON strings back to Python objects
         try:
             titles = json.loads(content['titles'])
@@ -260,93 +400,141 @@ def display_content_library(db_manager):
             hashtags = json.loads(content['hashtags'])
             content_intro = content['content_intro']
             content_approaches = json.loads(content['content_approaches'])
-            research_data = json.loads(content['research_data'])
-            youtube_content = json.loads(content.get('youtube_content', '{}'))
+            research_data = json.loads(content['research_data'] or '{}')
+            youtube_content = {'full_script': content['full_script'] or 'N/A', 'brief_script': content['brief_script'] or 'N/A'}
         except json.JSONDecodeError:
-            st.error(f"Error decoding JSON for content ID {content_id}. Skipping display.")
-            continue
+            st.error(f"Error decoding JSON for content ID {content_id}.")
+            return
 
-        with st.expander(f"**{topic}** (Score: {quality_score:.2f}) - Created: {created_at}"):
-            st.markdown("---")
-            st.markdown("##### Suggested Titles")
-            for title in titles:
-                st.markdown(f"- {title}")
-            
-            st.markdown("##### Description")
-            st.text_area(f"Description_{content_id}", description, height=150, label_visibility="collapsed")
+        st.markdown("---")
+        st.markdown("##### Suggested Titles")
+        for title in titles:
+            st.markdown(f"- {title}")
+        
+        st.markdown("##### Description")
+        st.text_area(f"Description_{content_id}", description, height=150, label_visibility="collapsed")
 
-            st.markdown("##### Hashtags")
-            st.info(' '.join([f"#{tag}" for tag in hashtags]))
+        st.markdown("##### Hashtags")
+        st.info(' '.join([f"#{tag}" for tag in hashtags]))
 
-            st.markdown("##### Introduction")
-            st.write(content_intro)
-
-            with st.expander("**Full Video Script**", expanded=False):
-                full_script = youtube_content.get('full_script', 'N/A')
-                st.markdown(f"""
-                <div style="background-color: #f0f2f6; padding: 15px; border-radius: 8px; max-height: 400px; overflow-y: auto; font-family: 'Roboto', sans-serif; line-height: 1.6;">
-                    {full_script}
-                </div>
-                """, unsafe_allow_html=True)
-
-            with st.expander("**Brief Video Script**", expanded=False):
-                brief_script = youtube_content.get('brief_script', 'N/A')
-                st.markdown(f"""
-                <div style="background-color: #f0f2f6; padding: 15px; border-radius: 8px; max-height: 200px; overflow-y: auto; font-family: 'Roboto', sans-serif; line-height: 1.6;">
-                    {brief_script}
-                </div>
-                """, unsafe_allow_html=True)
-
-            st.markdown("##### Content Approaches")
-            for i, approach in enumerate(content_approaches.values(), 1):
-                st.markdown(f"**{i}. {approach.get('title', f'Approach {i}')}**")
-                explanation_text = approach.get('explanation')
-                if explanation_text:
-                    st.write(explanation_text)
-                else:
-                    st.write("No explanation provided.")
-                if approach.get('code_examples'):
-                    for code in approach['code_examples']:
-                        st.code(code, language='python')
-            
-            st.markdown("##### Research Data")
-            st.json(research_data)
-
-            col_dl, col_del = st.columns([0.5, 0.5])
-            with col_dl:
-                pdf_workflow_instance = PDFGenerationWorkflow() # Initialize PDFGenerationWorkflow
-                pdf_generator = PDFGenerator() # Initialize PDFGenerator
-                if st.button(f"Download PDF (ID: {content_id})", key=f"download_pdf_{content_id}", type="secondary"):
-                    with st.spinner("Generating PDF..."):
-                        try:
-                            # Reconstruct content_package for PDF generation
-                            content_package_for_pdf = {
-                                'topic': topic,
-                                'titles': titles,
-                                'description': description,
-                                'hashtags': hashtags,
-                                'content_intro': content_intro,
-                                'content_approaches': content_approaches,
-                                'research_data': research_data
-                            }
-                            structured_content = pdf_workflow_instance.run(content_package_for_pdf)
-                            pdf_bytes = pdf_generator.generate_pdf(structured_content)
-                            
-                            st.download_button(
-                                label="Click to Download PDF",
-                                data=pdf_bytes,
-                                file_name=f"{topic.replace(' ', '_')}_ID_{content_id}.pdf",
-                                mime="application/pdf",
-                                key=f"final_download_{content_id}"
-                            )
-                            st.success("PDF generated successfully!")
-                        except Exception as e:
-                            st.error(f"Error generating PDF: {e}")
-            with col_del:
-                if st.button(f"Delete Content ID: {content_id}", key=f"delete_{content_id}", type="secondary"):
-                    db_manager.delete_content(content_id)
-                    st.success(f"Content ID {content_id} deleted successfully!")
-                    st.rerun() # Rerun to refresh the list
+        st.markdown("##### Introduction")
+        st.write(content_intro)
+
+        with st.expander("**Full Video Script**", expanded=False):
+            full_script = youtube_content.get('full_script', 'N/A')
+            st.markdown(f"""
+            <div style="background-color: #f0f2f6; padding: 15px; border-radius: 8px; max-height: 400px; overflow-y: auto; font-family: 'Roboto', sans-serif; line-height: 1.6;">
+                {full_script}
+            </div>
+            """, unsafe_allow_html=True)
+
+        with st.expander("**Brief Video Script**", expanded=False):
+            brief_script = youtube_content.get('brief_script', 'N/A')
+            st.markdown(f"""
+            <div style="background-color: #f0f2f6; padding: 15px; border-radius: 8px; max-height: 200px; overflow-y: auto; font-family: 'Roboto', sans-serif; line-height: 1.6;">
+                {brief_script}
+            </div>
+            """, unsafe_allow_html=True)
+
+        st.markdown("##### Content Approaches")
+        for i, approach in enumerate(content_approaches.values(), 1):
+            st.markdown(f"**{i}. {approach.get('title', f'Approach {i}')}**")
+            explanation_text = approach.get('explanation')
+            if explanation_text:
+                st.write(explanation_text)
+            else:
+                st.write("No explanation provided.")
+            if approach.get('code_examples'):
+                for code in approach['code_examples']:
+                    st.code(code, language='python')
+        
+        st.markdown("##### Research Data")
+        st.json(research_data)
+
+        col_dl, col_del = st.columns([0.5, 0.5])
+        with col_dl:
+            pdf_workflow_instance = PDFGenerationWorkflow() # Initialize PDFGenerationWorkflow
+            pdf_generator = PDFGenerator() # Initialize PDFGenerator
+            if st.button(f"Download PDF (ID: {content_id})", key=f"download_pdf_{content_id}", type="secondary"):
+                with st.spinner("Generating PDF..."):
+                    try:
+                        # Reconstruct content_package for PDF generation
+                        content_package_for_pdf = {
+                            'topic': topic,
+                            'titles': titles,
+                            'description': description,
+                            'hashtags': hashtags,
+                            'content_intro': content_intro,
+                            'content_approaches': content_approaches,
+                            'research_data': research_data
+                        }
+                        structured_content = pdf_workflow_instance.run(content_package_for_pdf)
+                        pdf_bytes = pdf_generator.generate_pdf(structured_content)
+                        
+                        st.download_button(
+                            label="Click to Download PDF",
+                            data=pdf_bytes,
+                            file_name=f"{topic.replace(' ', '_')}_ID_{content_id}.pdf",
+                            mime="application/pdf",
+                            key=f"final_download_{content_id}"
+                        )
+                        st.success("PDF generated successfully!")
+                    except Exception as e:
+                        st.error(f"Error generating PDF: {e}")
+        with col_del:
+            if st.button(f"Delete Content ID: {content_id}", key=f"delete_{content_id}", type="secondary"):
+                db_manager.delete_content(content_id)
+                st.session_state.library_open.discard(content_id)
+                st.success(f"Content ID {content_id} deleted successfully!")
+                st.rerun() # Rerun to refresh the list
+
+def display_performance(db_manager):
+    st.markdown("<h2 style='text-align: center; color: #4CAF50;'>⏱️ Performance</h2>", unsafe_allow_html=True)
+    st.write("Latency and token usage per agent, from recorded workflow traces.")
+
+    spans = db_manager.get_span_durations()
+    summary = summarize_latencies(spans)
+    if not summary:
+        st.info("No traces recorded yet. Generate some content first!")
+        return
+
+    st.markdown("##### Latency by Agent")
+    st.dataframe(summary, use_container_width=True)
+
+    st.markdown("##### Latency & Cost by Model Tier")
+    st.dataframe(summarize_model_tiers(spans), use_container_width=True)
+
+    hedging = hedge_tracker.summary()
+    if hedging:
+        st.markdown("##### Deadlines & Hedging (this session)")
+        st.dataframe(hedging, use_container_width=True)
+
+    rate_limits = rate_limiter.stats()
+    if rate_limits:
+        st.markdown("##### Rate Limits (this session)")
+        st.dataframe(rate_limits, use_container_width=True)
+
+    provider_health = provider_router.stats()
+    if provider_health:
+        st.markdown("##### Provider Health (this session)")
+        st.dataframe(provider_health, use_container_width=True)
+
+    st.markdown("##### Recent Runs")
+    runs = db_manager.get_trace_runs()
+    for run in runs:
+        topic = json.loads(run['attributes'] or '{}').get('topic', run['name'])
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['start_time']))
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**{topic}** - {run['duration']:.1f}s ({run['status']}) - {run['retries']} retried calls - Started: {started}")
+        with col2:
+            st.download_button(
+                label="Chrome Trace",
+                data=json.dumps(export_chrome_trace(db_manager.get_trace_spans(run['run_id']))),
+                file_name=f"trace_{run['run_id']}.json",
+                mime="application/json",
+                key=f"trace_{run['run_id']}"
+            )
 
 if __name__ == "__main__":
     main()
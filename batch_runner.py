@@ -0,0 +1,143 @@
+"""
+Headless batch runner for EnhancedContentWorkflow.
+
+Usage:
+    python batch_runner.py topics.txt --concurrency 4 --max-llm-calls 8
+
+The topic file is either plain text (one topic per line, '#' starts a comment) or
+NDJSON with one {"topic": ..., "bypass_research_cache": ...} object per line.
+Progress is kept in the batch_items table: each finished result is saved there as
+soon as its topic completes and stored as content in groups. Rerunning the same
+batch stores any results left over, then resumes the remaining topics, failed and
+interrupted ones from their workflow checkpoints.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Dict, Any, List
+from config.settings import Config
+from utils.client_registry import run_async
+from utils.database_manager import DatabaseManager
+from utils.rate_limiter import request_priority, PRIORITY_BATCH
+from workflow.enhanced_workflow import EnhancedContentWorkflow
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def load_topics(path: str) -> List[Dict[str, Any]]:
+    """Read topics from a text or NDJSON file, dropping blanks, comments and duplicates."""
+    entries = []
+    seen = set()
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid NDJSON line: {e}")
+                if not entry.get('topic'):
+                    raise ValueError(f"{path}:{line_number}: NDJSON entry has no 'topic'")
+            else:
+                entry = {'topic': line}
+            if entry['topic'] in seen:
+                continue
+            seen.add(entry['topic'])
+            entries.append(entry)
+    return entries
+
+
+class BatchRunner:
+    def __init__(self, batch_name: str, concurrency: int = 4, flush_size: int = 10):
+        self.batch_name = batch_name
+        self.concurrency = concurrency
+        self.flush_size = flush_size
+        self.db_manager = DatabaseManager()
+        self.workflow = EnhancedContentWorkflow(store_results=False)
+        self._flush_lock = asyncio.Lock()
+
+    async def run(self, entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        options = {entry['topic']: entry for entry in entries}
+        self.db_manager.register_batch_topics(self.batch_name, list(options))
+        # Results a previous run finished but did not get to store.
+        await self._flush(force=True)
+        remaining = [item for item in self.db_manager.get_unfinished_batch_topics(self.batch_name) if item['topic'] in options]
+        logging.info(f"BatchRunner: {len(remaining)} of {len(options)} topics left in batch '{self.batch_name}'.")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_topic(item: Dict[str, Any]):
+            async with semaphore:
+                await self._run_topic(item, options[item['topic']])
+
+        try:
+            # Batch calls yield to interactive runs sharing this process's rate limits.
+            with request_priority(PRIORITY_BATCH):
+                await asyncio.gather(*[run_topic(item) for item in remaining])
+        finally:
+            await self._flush(force=True)
+
+        progress = self.db_manager.get_batch_progress(self.batch_name)
+        logging.info(f"BatchRunner: Batch '{self.batch_name}' progress: {progress}")
+        return progress
+
+    async def _run_topic(self, item: Dict[str, Any], entry: Dict[str, Any]):
+        topic = item['topic']
+        # A failed or interrupted attempt continues from its checkpoint instead of starting over.
+        previous_run = item['run_id'] and self.db_manager.get_workflow_run(item['run_id'])
+        run_id = previous_run['run_id'] if previous_run else uuid.uuid4().hex[:16]
+        logging.info(f"BatchRunner: {'Resuming' if previous_run else 'Starting'} topic: {topic} (run {run_id})")
+        self.db_manager.mark_batch_topic(self.batch_name, topic, 'running', run_id=run_id)
+        try:
+            if previous_run:
+                result = await self.workflow.aresume(run_id)
+            else:
+                result = await self.workflow.arun(topic, bypass_research_cache=entry.get('bypass_research_cache', False),
+                                                  run_id=run_id)
+            record = result.get('content_record')
+            if not record:
+                raise RuntimeError("Workflow finished without producing content")
+        except Exception as e:
+            logging.error(f"BatchRunner: Topic '{topic}' failed: {e}")
+            self.db_manager.mark_batch_topic(self.batch_name, topic, 'failed', error=str(e))
+            return
+        # The workflow has dropped its checkpoint by now, so the result is saved before anything else.
+        self.db_manager.save_batch_result(self.batch_name, topic, record)
+        await self._flush()
+
+    async def _flush(self, force: bool = False):
+        async with self._flush_lock:
+            finished = self.db_manager.count_batch_results(self.batch_name)
+            if not finished or (not force and finished < self.flush_size):
+                return
+            content_ids = self.db_manager.store_batch_results(self.batch_name)
+            logging.info(f"BatchRunner: Stored {len(content_ids)} results (IDs {content_ids}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate content for a file of topics without the Streamlit UI.")
+    parser.add_argument("topics_file", help="Text file with one topic per line, or NDJSON with a 'topic' key per line")
+    parser.add_argument("--batch-name", help="Name used to track and resume progress (defaults to the file name)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Topics processed at the same time")
+    parser.add_argument("--max-llm-calls", type=int, default=Config.PROVIDER_MAX_CONCURRENCY,
+                        help="Maximum in-flight LLM calls per provider across all topics")
+    parser.add_argument("--flush-size", type=int, default=10, help="Results written per database transaction")
+    args = parser.parse_args()
+
+    # Provider semaphores are created lazily, so this bounds every LLM call in the batch.
+    Config.PROVIDER_MAX_CONCURRENCY = args.max_llm_calls
+
+    entries = load_topics(args.topics_file)
+    batch_name = args.batch_name or os.path.basename(args.topics_file)
+    runner = BatchRunner(batch_name, concurrency=args.concurrency, flush_size=args.flush_size)
+    progress = run_async(runner.run(entries))
+    print(json.dumps({"batch": batch_name, "progress": progress}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Query-plan check for DatabaseManager's hot content queries.
+
+Usage:
+    python -m benchmarks.content_query_plans [--rows 2000]
+
+Seeds a temporary database, calls each list and context method while
+capturing the SQL it runs, and prints EXPLAIN QUERY PLAN for every content
+query. A query fails the check if it scans the content table without an
+index or sorts through a temporary B-tree. The exit status is non-zero when
+any query fails, so the check can gate schema changes.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from config.settings import Config
+
+HOT_QUERIES = [
+    ("get_approved_content", lambda db: db.get_approved_content(limit=10)),
+    ("get_pending_content", lambda db: db.get_pending_content(limit=10)),
+    ("get_all_content", lambda db: db.get_all_content()),
+    ("get_content_summaries", lambda db: db.get_content_summaries(limit=50)),
+    ("get_content_summaries(status)", lambda db: db.get_content_summaries(status='pending', limit=50)),
+    ("get_content_page", lambda db: db.get_content_page(before_id=1000, limit=25)),
+    ("get_content_page(filters)", lambda db: db.get_content_page(status='approved', min_score=5.0, before_id=1000)),
+    ("count_content(filters)", lambda db: db.count_content(status='approved', min_score=5.0)),
+    ("get_content_detail", lambda db: db.get_content_detail(42)),
+    ("search_content", lambda db: db.search_content("python topic", status='approved')),
+    ("get_content_context", lambda db: db.get_content_context("python asyncio")),
+]
+
+
+def _seed(db, rows):
+    statuses = ['pending', 'approved', 'rejected']
+    for i in range(rows):
+        status = statuses[i % len(statuses)]
+        db.save_content({
+            'topic': f"python topic {i}",
+            'titles': [f"Title {i}"],
+            'description': "description " * 20,
+            'hashtags': ['python'],
+            'content_intro': "intro " * 50,
+            'content_approaches': {'approach_1': {'title': 'A', 'explanation': 'B', 'code_examples': []}},
+            'quality_score': (i % 100) / 10,
+            'research_data': {'summary': "research " * 200},
+            'youtube_content': {'full_script': "script " * 500, 'brief_script': "brief " * 100},
+            'approved': status == 'approved',
+            'approval_status': status
+        })
+
+
+def _plan_problems(plan):
+    problems = []
+    for detail in plan:
+        if detail == 'SCAN content':
+            problems.append(detail)
+        if 'TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that hot content queries use indexes.")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        Config.DATABASE_PATH = os.path.join(directory, "plans.db")
+        Config.VECTOR_INDEX_PATH = os.path.join(directory, "vectors")
+        # Imported after the path override so no manager touches the configured database.
+        from utils.database_manager import DatabaseManager
+
+        db = DatabaseManager()
+        _seed(db, args.rows)
+        conn = db._connection()
+        conn.execute('ANALYZE')
+
+        failures = 0
+        for name, call in HOT_QUERIES:
+            statements = []
+            conn.set_trace_callback(statements.append)
+            try:
+                call(db)
+            finally:
+                conn.set_trace_callback(None)
+            for sql in statements:
+                if not re.search(r'^\s*SELECT\b.*\bFROM content(_fts)?\b', sql, re.DOTALL | re.IGNORECASE):
+                    continue
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                problems = _plan_problems(plan)
+                failures += bool(problems)
+                print(f"{'FAIL' if problems else 'ok  '} {name}")
+                for detail in plan:
+                    print(f"       {detail}")
+
+        if failures:
+            print(f"{failures} queries do not use the content indexes.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
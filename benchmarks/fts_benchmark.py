@@ -0,0 +1,109 @@
+"""
+Benchmark for full-text content search.
+
+Usage:
+    python -m benchmarks.fts_benchmark [--rows 20000] [--queries 200]
+
+Seeds a temporary database with synthetic content rows and times three ways
+of finding content for a topic: the LIKE predicates get_content_context used
+before the FTS5 index, BM25-ranked get_content_context, and the library's
+search_content. The result cache is cleared before every call, so each
+timing includes the query itself.
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from config.settings import Config
+
+TECH_TERMS = (
+    "python asyncio threads processes generators decorators closures typing dataclasses pydantic fastapi "
+    "django flask sqlalchemy sqlite postgres redis kafka docker kubernetes terraform ansible linux bash git "
+    "rust ownership lifetimes borrow checker traits tokio javascript typescript react vue svelte node deno "
+    "webassembly graphql rest grpc oauth jwt encryption hashing caching indexing sharding replication "
+    "pandas numpy polars pytorch tensorflow transformers embeddings vectors recursion memoization sorting "
+    "graphs trees heaps queues stacks profiling benchmarking testing mocking fixtures coverage linting"
+).split()
+
+# Word frequencies in real text are Zipf-distributed: a few words are everywhere, most are rare.
+VOCABULARY = TECH_TERMS + [f"term{n}" for n in range(20000)]
+_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def _text(rng, words):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=_CUM_WEIGHTS, k=words))
+
+
+def _seed(db, rows, rng):
+    statuses = ['pending', 'approved', 'rejected']
+    with db._connection() as conn:
+        cursor = conn.cursor()
+        for i in range(rows):
+            status = rng.choice(statuses)
+            db._insert_content(cursor, {
+                'topic': _text(rng, 3),
+                'titles': [_text(rng, 6)],
+                'description': _text(rng, 60),
+                'hashtags': _text(rng, 10).split(),
+                'content_intro': _text(rng, 80),
+                'content_approaches': {'approach_1': {'title': _text(rng, 4), 'explanation': _text(rng, 120),
+                                                      'code_examples': []}},
+                'quality_score': round(rng.uniform(5, 10), 1),
+                'research_data': {'summary': _text(rng, 150)},
+                'youtube_content': {'full_script': _text(rng, 600), 'brief_script': _text(rng, 120)},
+                'approved': status == 'approved',
+                'approval_status': status
+            })
+
+
+def _like_context(conn, topic, limit=5):
+    return conn.execute('''
+        SELECT topic, content_intro, content_approaches, quality_score, hashtags
+        FROM content
+        WHERE approved = TRUE
+        AND (topic LIKE ? OR topic LIKE ? OR topic LIKE ?)
+        ORDER BY quality_score DESC, created_at DESC
+        LIMIT ?
+    ''', (f'%{topic}%', f'%{topic.split()[0]}%', f'%{topic.split()[-1]}%', limit)).fetchall()
+
+
+def _time(call, topics, clear_cache):
+    started = time.perf_counter()
+    for topic in topics:
+        clear_cache()
+        call(topic)
+    return (time.perf_counter() - started) / len(topics)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text content search.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        Config.DATABASE_PATH = os.path.join(directory, "fts.db")
+        # Imported after the path override so no manager touches the configured database.
+        from utils import database_manager
+        from utils.database_manager import DatabaseManager
+
+        db = DatabaseManager()
+        started = time.perf_counter()
+        _seed(db, args.rows, rng)
+        print(f"Seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        # Query with mid-frequency words, like real topics; the most common words match nearly every row.
+        topics = [" ".join(rng.sample(VOCABULARY[50:5000], 2)) for _ in range(args.queries)]
+        conn = db._connection()
+        clear_cache = database_manager._content_cache.clear
+        for label, call in (("LIKE context", lambda topic: _like_context(conn, topic)),
+                            ("FTS5 context", db.get_content_context),
+                            ("FTS5 search", db.search_content)):
+            print(f"{label:>13}: {_time(call, topics, clear_cache) * 1000:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
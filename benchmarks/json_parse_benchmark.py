@@ -0,0 +1,115 @@
+"""
+Benchmark for utils.json_parser.parse_llm_json against malformed model outputs.
+
+Usage:
+    python -m benchmarks.json_parse_benchmark [--repeat 2000]
+
+Each corpus entry is a raw response in the shapes our agents receive from the
+providers, paired with the value a correct parse must produce. The report shows
+how many entries plain json.loads recovers versus the lenient parser, and the
+mean time per parse.
+"""
+import argparse
+import json
+import time
+from utils.json_parser import parse_llm_json
+
+_LONG_SCRIPT = "Hey everyone, today we're diving into asyncio! " * 200
+
+CORPUS = [
+    (
+        "fenced block with prose",
+        'Here is the approach you asked for:\n```json\n{"title": "The 101 Guide", "explanation": "Start small.", "code_examples": ["print(1)"]}\n```\nLet me know!',
+        {"title": "The 101 Guide", "explanation": "Start small.", "code_examples": ["print(1)"]}
+    ),
+    (
+        "trailing commas",
+        '{"titles": ["Async in 5 Minutes", "Await Explained",],}',
+        {"titles": ["Async in 5 Minutes", "Await Explained"]}
+    ),
+    (
+        "single quotes",
+        "{'technical_accuracy': 8.5, 'feedback': 'Solid examples', 'strengths': ['clear']}",
+        {"technical_accuracy": 8.5, "feedback": "Solid examples", "strengths": ["clear"]}
+    ),
+    (
+        "unescaped inner quotes",
+        '{"full_script": "Today we say "hello", then "goodbye" to callbacks.", "brief_script": "Quick "async" tour"}',
+        {"full_script": 'Today we say "hello", then "goodbye" to callbacks.', "brief_script": 'Quick "async" tour'}
+    ),
+    (
+        "raw newlines in strings",
+        '{"code_examples": ["import asyncio\n\nasync def main():\n    await asyncio.sleep(1)"]}',
+        {"code_examples": ["import asyncio\n\nasync def main():\n    await asyncio.sleep(1)"]}
+    ),
+    (
+        "truncated tail",
+        '{"full_script": "' + _LONG_SCRIPT + '", "brief_script": "Hey everyone, quick',
+        {"full_script": _LONG_SCRIPT, "brief_script": "Hey everyone, quick"}
+    ),
+    (
+        "truncated after key",
+        '{"overall_score": 8.1, "feedback": "Good", "improvements"',
+        {"overall_score": 8.1, "feedback": "Good"}
+    ),
+    (
+        "python literals and comments",
+        '{\n  // scores\n  "approved": True,\n  "notes": None\n}',
+        {"approved": True, "notes": None}
+    ),
+    (
+        "regex escapes in code",
+        '{"code_examples": ["re.match(r\'\\d+\', s)"]}',
+        {"code_examples": ["re.match(r'\\d+', s)"]}
+    ),
+    (
+        "bracketed prose before payload",
+        'Sure (see [1]).\n{"titles": ["a"]}',
+        {"titles": ["a"]}
+    ),
+    (
+        "valid json",
+        json.dumps({"titles": ["A", "B", "C"], "nested": {"k": [1, 2.5, None]}}),
+        {"titles": ["A", "B", "C"], "nested": {"k": [1, 2.5, None]}}
+    ),
+]
+
+
+def _strict_parse(text):
+    return json.loads(text)
+
+
+def _run(parser, repeat):
+    recovered = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        recovered = 0
+        for _, raw, expected in CORPUS:
+            try:
+                if parser(raw) == expected:
+                    recovered += 1
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - started
+    return recovered, elapsed / (repeat * len(CORPUS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM JSON parsing on malformed outputs.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, raw, expected in CORPUS:
+        try:
+            ok = parse_llm_json(raw) == expected
+        except ValueError:
+            ok = False
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+
+    for label, fn in (("json.loads", _strict_parse), ("parse_llm_json", parse_llm_json)):
+        recovered, per_parse = _run(fn, args.repeat)
+        print(f"{label:>15}: {recovered}/{len(CORPUS)} recovered, {per_parse * 1e6:.1f} us/parse")
+
+
+if __name__ == "__main__":
+    main()
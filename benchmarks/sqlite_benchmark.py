@@ -0,0 +1,105 @@
+"""
+Benchmark for DatabaseManager's per-thread SQLite connections.
+
+Usage:
+    python -m benchmarks.sqlite_benchmark [--rows 2000] [--threads 4]
+
+Compares the previous access pattern (connect, run one statement, commit and
+close on every call, default journal mode) against DatabaseManager's tuned,
+persistent per-thread connections. Each mode writes and reads research cache
+rows, first from a single thread and then from several threads at once, the
+way concurrent workflow jobs and the Streamlit library tab hit the database.
+Both modes use fresh databases in a temporary directory.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from config.settings import Config
+
+_RESEARCH = {"summary": "asyncio in practice " * 40, "sources": ["https://docs.python.org/3/library/asyncio.html"] * 5}
+
+
+class ConnectPerCall:
+    """The access pattern DatabaseManager used before: one connection per statement."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS research_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                research_data TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_research_cache_topic ON research_cache (topic, created_at)')
+        conn.commit()
+        conn.close()
+
+    def save_research_cache(self, topic, research_data):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO research_cache (topic, research_data) VALUES (?, ?)",
+                     (topic, json.dumps(research_data)))
+        conn.commit()
+        conn.close()
+
+    def get_cached_research(self, topic):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('''
+            SELECT research_data FROM research_cache WHERE topic = ? ORDER BY created_at DESC LIMIT 1
+        ''', (topic,)).fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+
+
+def _work(store, prefix, rows):
+    for i in range(rows):
+        store.save_research_cache(f"{prefix} topic {i}", _RESEARCH)
+    for i in range(rows):
+        store.get_cached_research(f"{prefix} topic {i}")
+
+
+def _run(make_store, rows, threads):
+    """Return (single-thread seconds, concurrent seconds) for rows inserts and reads per thread."""
+    store = make_store()
+    started = time.perf_counter()
+    _work(store, "single", rows)
+    single = time.perf_counter() - started
+
+    # Each thread builds its own store, as every job and Streamlit session does.
+    workers = [threading.Thread(target=lambda n=n: _work(make_store(), f"thread {n}", rows)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return single, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection handling in DatabaseManager.")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline_path = os.path.join(directory, "connect_per_call.db")
+        Config.DATABASE_PATH = os.path.join(directory, "persistent.db")
+        # Imported after the path override so no manager touches the configured database.
+        from utils.database_manager import DatabaseManager
+
+        ops = args.rows * 2
+        for label, make_store in (("connect-per-call", lambda: ConnectPerCall(baseline_path)),
+                                  ("persistent", DatabaseManager)):
+            single, concurrent = _run(make_store, args.rows, args.threads)
+            print(f"{label:>16}: {ops / single:8.0f} ops/s single thread, "
+                  f"{ops * args.threads / concurrent:8.0f} ops/s across {args.threads} threads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark for the memory-mapped content vector index.
+
+Usage:
+    python -m benchmarks.vector_search_benchmark [--rows 100000] [--queries 200]
+
+Fills a temporary index with synthetic unit vectors in batches, the same
+append path save_content uses, then times top-k cosine search over the
+memory-mapped matrix and the local embedding of a query. The index file
+size shows the on-disk cost of the library at that scale.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from config.settings import Config
+from utils.vector_index import VectorIndex, embed_text
+
+TOPICS = [
+    "python asyncio event loop", "rust ownership and borrowing", "decorators in python",
+    "kubernetes deployments", "pandas dataframe performance", "transformers attention explained"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content vector index.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=15)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(os.path.join(directory, "vectors"))
+        started = time.perf_counter()
+        for row in range(0, args.rows, 10000):
+            batch = rng.standard_normal((min(10000, args.rows - row), index.dim), dtype=np.float32)
+            index.write(row, batch / np.linalg.norm(batch, axis=1, keepdims=True))
+        print(f"Wrote {args.rows} x {index.dim} vectors ({os.path.getsize(index.path) / 2**20:.0f} MB) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        queries = [TOPICS[i % len(TOPICS)] for i in range(args.queries)]
+        started = time.perf_counter()
+        vectors = [embed_text(query) for query in queries]
+        print(f"   embed_text: {(time.perf_counter() - started) / args.queries * 1000:.3f} ms/query")
+
+        index.search(vectors[0], args.rows, args.k)  # map the file and warm the page cache
+        started = time.perf_counter()
+        for vector in vectors:
+            index.search(vector, args.rows, args.k)
+        print(f"  top-{args.k} search: {(time.perf_counter() - started) / args.queries * 1000:.3f} ms/query "
+              f"over {args.rows} rows (VECTOR_DIM={Config.VECTOR_DIM})")
+
+
+if __name__ == "__main__":
+    main()
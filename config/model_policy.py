@@ -0,0 +1,53 @@
+from typing import Dict, Any
+from config.settings import Config
+from utils.provider_router import backend_available
+
+# Which model tier serves each task, and how many tokens the task may generate.
+# Short, formulaic outputs go to the fast tier; long or judgement-heavy work to the smart or default tier.
+# Research feeds every later agent and can run long, so it keeps the general MAX_TOKENS budget.
+MODEL_POLICY = {
+    'research':          {'tier': 'smart',   'max_tokens': Config.MAX_TOKENS},
+    'titles':            {'tier': 'fast',    'max_tokens': 300},
+    'hashtags':          {'tier': 'fast',    'max_tokens': 300},
+    'description':       {'tier': 'fast',    'max_tokens': 600},
+    'metadata':          {'tier': 'fast',    'max_tokens': 1200},
+    'content_intro':     {'tier': 'fast',    'max_tokens': 800},
+    'approach':          {'tier': 'default', 'max_tokens': 3000},
+    'youtube_content':   {'tier': 'default', 'max_tokens': 6000},
+    'quality_assurance': {'tier': 'smart',   'max_tokens': 1500},
+}
+
+
+def model_tiers() -> Dict[str, Dict[str, str]]:
+    return {
+        'fast': {'provider': Config.FAST_PROVIDER, 'model': Config.FAST_MODEL},
+        'smart': {'provider': Config.SMART_PROVIDER, 'model': Config.SMART_MODEL},
+        'default': {'provider': 'openrouter', 'model': Config.DEEPSEEK_MODEL},
+    }
+
+
+def resolve_model_policy(task: str) -> Dict[str, Any]:
+    """
+    Return provider, model, max_tokens and tier for a task. LLM_MODEL_POLICY overrides entries of
+    MODEL_POLICY; a tier whose provider has no API key falls back to the default tier.
+    """
+    policy = {**MODEL_POLICY[task], **Config.LLM_MODEL_POLICY.get(task, {})}
+    tiers = model_tiers()
+    tier = policy['tier'] if policy['tier'] in tiers else 'default'
+    if not backend_available(tiers[tier]['provider']):
+        tier = 'default'
+    return {
+        'task': task,
+        'tier': tier,
+        'provider': tiers[tier]['provider'],
+        'model': tiers[tier]['model'],
+        'max_tokens': int(policy['max_tokens'])
+    }
+
+
+def tier_of(provider: str, model: str) -> str:
+    """Name of the tier a provider/model belongs to, for reporting; 'other' for fallbacks outside the policy."""
+    for name, tier in model_tiers().items():
+        if tier['provider'] == (provider or '').lower() and tier['model'] == model:
+            return name
+    return 'other'
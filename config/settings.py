@@ -1,4 +1,5 @@
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -13,12 +14,40 @@ class Config:
     MODEL_NAME = os.getenv("MODEL_NAME", "gemini-1.5-flash") # Using a Google model
     TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", 16000))
+    PROVIDER_MAX_CONCURRENCY = int(os.getenv("PROVIDER_MAX_CONCURRENCY", 8)) # Concurrent async calls per provider
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 20)) # Shared HTTP pool size per provider client
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0)) # Seconds an idle connection is kept open
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 120.0))
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 0)) # Per-call deadline for async calls, 0 disables
+    LLM_TASK_DEADLINES = json.loads(os.getenv("LLM_TASK_DEADLINES", "{}")) # Per-task overrides, e.g. {"generate_youtube_content": 180}
+    LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true" # Duplicate calls that run past the task's p95
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20)) # Latencies observed before a task is hedged
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 2.0)) # Never hedge sooner than this many seconds
+    LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", 200)) # Recent latencies kept per task
+    LLM_RATE_LIMITS = json.loads(os.getenv("LLM_RATE_LIMITS", "{}")) # e.g. {"openrouter": {"rpm": 60, "tpm": 200000}}, keys "provider" or "provider:model"
+    LLM_DEFAULT_RPM = float(os.getenv("LLM_DEFAULT_RPM", 0)) # Requests per minute when not configured, 0 means unlimited
+    LLM_DEFAULT_TPM = float(os.getenv("LLM_DEFAULT_TPM", 0)) # Tokens per minute when not configured, 0 means unlimited
+    LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", 1000)) # Added to the prompt estimate before a call
+    LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", 4)) # Retries after a 429
+    LLM_RATE_LIMIT_MAX_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_MAX_BACKOFF", 30.0)) # Cap for exponential backoff without Retry-After
+    LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", "true").lower() == "true" # Fail over between providers
+    LLM_FALLBACK_PROVIDERS = [p.strip().lower() for p in os.getenv("LLM_FALLBACK_PROVIDERS", "openrouter,google,grok").split(",") if p.strip()] # Used only if their API key is set
+    ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", 50)) # Recent calls kept per backend for latency/error rate
+    ROUTER_ERROR_PENALTY = float(os.getenv("ROUTER_ERROR_PENALTY", 4.0)) # Score = mean latency * (1 + penalty * error rate)
+    ROUTER_FAILURE_THRESHOLD = int(os.getenv("ROUTER_FAILURE_THRESHOLD", 3)) # Consecutive failures that open a backend's circuit
+    ROUTER_OPEN_SECONDS = float(os.getenv("ROUTER_OPEN_SECONDS", 30.0)) # Time an open circuit waits before a half-open probe
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+    OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     
     # Model names for different tasks
     FAST_MODEL = os.getenv("FAST_MODEL", "gemini-1.5-flash") # Using a Google model
     SMART_MODEL = os.getenv("SMART_MODEL", "gemini-1.5-pro") # Using a Google model
+    FAST_PROVIDER = os.getenv("FAST_PROVIDER", "google").lower() # Provider serving FAST_MODEL
+    SMART_PROVIDER = os.getenv("SMART_PROVIDER", "google").lower() # Provider serving SMART_MODEL
+    LLM_MODEL_POLICY = json.loads(os.getenv("LLM_MODEL_POLICY", "{}")) # Per-task overrides, e.g. {"titles": {"tier": "default", "max_tokens": 500}}
+    MODEL_PRICES = json.loads(os.getenv("MODEL_PRICES", "{}")) # USD per 1M tokens, e.g. {"gemini-1.5-flash": {"input": 0.075, "output": 0.3}}
     DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL") # A good model for code generation
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash") # Default Gemini model
     
@@ -26,13 +55,46 @@ class Config:
     CHANNEL_NAME = "GenKodex"
     FOCUS_AREAS = ["Python", "AI/ML", "Data Science", "Generative AI"]
     TARGET_AUDIENCE = ["Beginners", "Intermediate", "Advanced"]
+    RESEARCH_DIGEST_TOKEN_BUDGET = int(os.getenv("RESEARCH_DIGEST_TOKEN_BUDGET", 1500)) # Estimated tokens of research shared by generation prompts
+    STRUCTURED_OUTPUT_MODE = os.getenv("STRUCTURED_OUTPUT_MODE", "json_schema").lower() # json_schema, json_object or off (local validation only)
+    STRUCTURED_OUTPUT_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", 2)) # Re-requests of output that fails its schema
+    FUSED_METADATA_ENABLED = os.getenv("FUSED_METADATA_ENABLED", "true").lower() == "true" # Titles, description and hashtags in one structured call
     
     # Quality Assurance Thresholds
     QUALITY_THRESHOLD = float(os.getenv("QUALITY_THRESHOLD", 7.5)) # Minimum score for content to be approved
     MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", 3)) # Maximum refinement iterations
+    SECTION_QUALITY_THRESHOLD = float(os.getenv("SECTION_QUALITY_THRESHOLD", QUALITY_THRESHOLD)) # Sections scored below this are regenerated on refine
 
     # Database Settings
     DATABASE_PATH = os.getenv("DATABASE_PATH", "genkodex_content.db")
+    RESEARCH_CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL_SECONDS", 7 * 24 * 3600)) # Reuse research for a week
+    CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(DATABASE_PATH)), "genkodex_checkpoints.db")) # LangGraph checkpoints of unfinished runs
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)) # Wait this long for a locked database before failing
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 16384)) # Page cache per connection
+    CONTENT_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", 256)) # Cached library pages and item details
+    LIBRARY_PAGE_SIZE = int(os.getenv("LIBRARY_PAGE_SIZE", 25)) # Items per content library page
+
+    # Semantic Retrieval Settings
+    VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(DATABASE_PATH)), "genkodex_vectors")) # Memory-mapped embedding matrix; the width is appended to the file name
+    VECTOR_DIM = int(os.getenv("VECTOR_DIM", 512)) # Hashed embedding width; 100k items take 200 MB at 512
+    RELATED_CONTENT_LIMIT = int(os.getenv("RELATED_CONTENT_LIMIT", 3)) # Past items fed to research and generation prompts
+    RELATED_CONTENT_MIN_QUALITY = float(os.getenv("RELATED_CONTENT_MIN_QUALITY", 8.0)) # Only reuse high-scoring material
+    RELATED_CONTENT_MIN_SIMILARITY = float(os.getenv("RELATED_CONTENT_MIN_SIMILARITY", 0.3)) # Cosine similarity below this is unrelated
+    RELATED_CONTENT_TOKEN_BUDGET = int(os.getenv("RELATED_CONTENT_TOKEN_BUDGET", 600)) # Estimated tokens of past material in the shared digest
+
+    # Background Job Settings
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2)) # Workflow runs executed concurrently by the Streamlit app
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1.0)) # How often the jobs panel refreshes while jobs are active
+
+    # Tracing Settings
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true" # Record node and LLM call spans in trace_spans
+
+    # LLM Response Cache Settings
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true" # Opt-in response cache
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(DATABASE_PATH)), "genkodex_llm_cache.db"))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)) # 0 disables expiry
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000)) # LRU bound, 0 disables eviction
+    LLM_CACHE_REPLAY_ONLY = os.getenv("LLM_CACHE_REPLAY_ONLY", "false").lower() == "true" # Never call the provider
 
     # Ensure at least one API key is loaded
     
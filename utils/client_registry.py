@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Any
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolMetrics:
+    """Thread-safe counters describing how the shared HTTP pool is used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.clients_created = 0
+        self.registry_hits = 0
+        self.registry_misses = 0
+
+    def request_started(self):
+        with self._lock:
+            self.requests_total += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_lookup(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.registry_hits += 1
+            else:
+                self.registry_misses += 1
+
+    def record_client_created(self):
+        with self._lock:
+            self.clients_created += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests_total': self.requests_total,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'clients_created': self.clients_created,
+                'registry_hits': self.registry_hits,
+                'registry_misses': self.registry_misses,
+                'max_connections': Config.HTTP_MAX_CONNECTIONS,
+                'max_keepalive_connections': Config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            }
+
+
+_metrics = _PoolMetrics()
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    def handle_request(self, request):
+        _metrics.request_started()
+        try:
+            return super().handle_request(request)
+        finally:
+            _metrics.request_finished()
+
+
+class _MeteredAsyncTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        _metrics.request_started()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            _metrics.request_finished()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=Config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+_lock = threading.Lock()
+_openai_clients = {}
+# Async HTTP connections belong to the event loop that opened them, so async clients are kept per loop.
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def get_openai_client(provider: str = "openrouter") -> OpenAI:
+    """Return the process-wide OpenAI-compatible client for the provider, backed by a bounded keep-alive pool."""
+    key = provider.lower()
+    with _lock:
+        client = _openai_clients.get(key)
+        _metrics.record_lookup(client is not None)
+        if client is None:
+            if not Config.OPENROUTER_API_KEY:
+                raise ValueError("OPENROUTER_API_KEY is not set in .env")
+            logger.info(f"Creating pooled HTTP client for provider: {key}")
+            client = OpenAI(
+                api_key=Config.OPENROUTER_API_KEY,
+                base_url=Config.OPENROUTER_BASE_URL,
+                http_client=httpx.Client(
+                    transport=_MeteredTransport(limits=_pool_limits()),
+                    timeout=Config.HTTP_TIMEOUT
+                )
+            )
+            _metrics.record_client_created()
+            _openai_clients[key] = client
+        return client
+
+
+def get_async_openai_client(provider: str = "openrouter") -> AsyncOpenAI:
+    """Return the async OpenAI-compatible client for the provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = provider.lower()
+    with _lock:
+        clients = _async_openai_clients.setdefault(loop, {})
+        client = clients.get(key)
+        _metrics.record_lookup(client is not None)
+        if client is None:
+            if not Config.OPENROUTER_API_KEY:
+                raise ValueError("OPENROUTER_API_KEY is not set in .env")
+            logger.info(f"Creating pooled async HTTP client for provider: {key}")
+            client = AsyncOpenAI(
+                api_key=Config.OPENROUTER_API_KEY,
+                base_url=Config.OPENROUTER_BASE_URL,
+                http_client=httpx.AsyncClient(
+                    transport=_MeteredAsyncTransport(limits=_pool_limits()),
+                    timeout=Config.HTTP_TIMEOUT
+                )
+            )
+            _metrics.record_client_created()
+            clients[key] = client
+        return client
+
+
+async def close_async_clients():
+    """Close the running loop's async clients; their connections cannot be used once the loop is gone."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_openai_clients.pop(loop, {})
+    for client in clients.values():
+        await client.close()
+
+
+def run_async(coro):
+    """asyncio.run that closes the loop's pooled clients before the loop shuts down, so none are leaked."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_clients()
+    return asyncio.run(main())
+
+
+def record_lookup(hit: bool):
+    _metrics.record_lookup(hit)
+
+
+def record_client_created():
+    _metrics.record_client_created()
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Return a snapshot of registry and HTTP pool usage."""
+    return _metrics.snapshot()
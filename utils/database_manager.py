@@ -1,16 +1,138 @@
 
 import sqlite3
 import json
-from typing import Dict, Any, List
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import numpy as np
 from config.settings import Config
+from utils.vector_index import embed_content, embed_text, get_vector_index
+
+# One connection per (thread, database path): opening a connection and re-applying the PRAGMAs
+# costs more than most of our queries, and sqlite3 connections must stay on their own thread.
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized_paths = set()
+
+# Schema changes applied on top of the base tables, in order. PRAGMA user_version records the
+# last version a database has applied, so each migration runs exactly once per database file.
+MIGRATIONS = [
+    (1, "Content indexes for list views and context retrieval", [
+        # Covering indexes: summary lists never read the script and research columns.
+        'CREATE INDEX IF NOT EXISTS idx_content_created ON content (created_at, approval_status, quality_score, topic)',
+        'CREATE INDEX IF NOT EXISTS idx_content_status_created ON content (approval_status, created_at, quality_score, topic)',
+        'CREATE INDEX IF NOT EXISTS idx_content_approved_created ON content (approved, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_content_approved_score ON content (approved, quality_score, created_at)'
+    ]),
+    (2, "Keyset pagination indexes and a content version for cache invalidation", [
+        # Library pages walk id downwards (newest first); both indexes cover the summary columns.
+        'CREATE INDEX IF NOT EXISTS idx_content_page ON content (id, approval_status, quality_score, topic, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_content_status_page ON content (approval_status, id, quality_score, topic, created_at)',
+        # Bumped by every write to content, from any process, so cached results can tell they are stale.
+        'CREATE TABLE IF NOT EXISTS content_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)',
+        'INSERT OR IGNORE INTO content_version (id, version) VALUES (1, 0)',
+        'CREATE TRIGGER IF NOT EXISTS content_version_insert AFTER INSERT ON content '
+        'BEGIN UPDATE content_version SET version = version + 1 WHERE id = 1; END',
+        'CREATE TRIGGER IF NOT EXISTS content_version_update AFTER UPDATE ON content '
+        'BEGIN UPDATE content_version SET version = version + 1 WHERE id = 1; END',
+        'CREATE TRIGGER IF NOT EXISTS content_version_delete AFTER DELETE ON content '
+        'BEGIN UPDATE content_version SET version = version + 1 WHERE id = 1; END'
+    ]),
+    (3, "Full-text index over content", [
+        # External-content FTS5 table: it indexes the content columns without storing a second copy.
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+            topic, content_intro, content_approaches, full_script, brief_script, hashtags,
+            content='content', content_rowid='id', tokenize='porter unicode61'
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS content_fts_insert AFTER INSERT ON content BEGIN
+            INSERT INTO content_fts (rowid, topic, content_intro, content_approaches, full_script, brief_script, hashtags)
+            VALUES (new.id, new.topic, new.content_intro, new.content_approaches, new.full_script, new.brief_script, new.hashtags);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS content_fts_delete AFTER DELETE ON content BEGIN
+            INSERT INTO content_fts (content_fts, rowid, topic, content_intro, content_approaches, full_script, brief_script, hashtags)
+            VALUES ('delete', old.id, old.topic, old.content_intro, old.content_approaches, old.full_script, old.brief_script, old.hashtags);
+        END''',
+        # Approval changes leave the indexed text alone, so only text updates re-index the row.
+        '''CREATE TRIGGER IF NOT EXISTS content_fts_update
+        AFTER UPDATE OF topic, content_intro, content_approaches, full_script, brief_script, hashtags ON content BEGIN
+            INSERT INTO content_fts (content_fts, rowid, topic, content_intro, content_approaches, full_script, brief_script, hashtags)
+            VALUES ('delete', old.id, old.topic, old.content_intro, old.content_approaches, old.full_script, old.brief_script, old.hashtags);
+            INSERT INTO content_fts (rowid, topic, content_intro, content_approaches, full_script, brief_script, hashtags)
+            VALUES (new.id, new.topic, new.content_intro, new.content_approaches, new.full_script, new.brief_script, new.hashtags);
+        END''',
+        # Default ranking, weights in column order: a topic match counts most, the long scripts least.
+        "INSERT INTO content_fts (content_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0, 1.0, 1.5, 3.0)')",
+        # Index the rows written before this migration.
+        "INSERT INTO content_fts (content_fts) VALUES ('rebuild')"
+    ]),
+    (4, "Row map of the content vector index", [
+        # row is the vector's position in the index file; seq never repeats, so readers can
+        # pick up new rows incrementally even after a rebuild reuses positions.
+        '''CREATE TABLE IF NOT EXISTS content_vectors (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            row INTEGER NOT NULL UNIQUE,
+            content_id INTEGER NOT NULL
+        )'''
+    ]),
+    (5, "Batch topics keep their run id and finished result", [
+        # A finished result waits in result until it is stored with the next group of content rows,
+        # so a crash before that loses nothing; run_id lets a failed or interrupted topic resume.
+        'ALTER TABLE batch_items ADD COLUMN run_id TEXT',
+        'ALTER TABLE batch_items ADD COLUMN result TEXT'
+    ]),
+]
+
+# Columns list views need; everything else is loaded per item.
+CONTENT_SUMMARY_COLUMNS = ['id', 'topic', 'quality_score', 'created_at', 'approval_status']
+
+# Content id of every vector index row, per database, loaded incrementally by seq.
+_vector_rows = {}
+_vector_rows_lock = threading.Lock()
+
+# Library pages and item details, shared by every session and keyed on the content version they were read at.
+_content_cache = OrderedDict()
+_content_cache_lock = threading.Lock()
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    # WAL lets the UI read while job threads write; NORMAL sync is durable across app crashes in WAL mode.
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{int(Config.SQLITE_CACHE_SIZE_KB)}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """The calling thread's tuned connection to db_path, opened on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = _open_connection(db_path)
+    return conn
+
 
 class DatabaseManager:
     def __init__(self):
         self.db_path = Config.DATABASE_PATH
-        self.init_database()
+        # Agents and jobs create managers freely; the schema only needs creating once per database file.
+        with _schema_lock:
+            if self.db_path not in _initialized_paths:
+                self.init_database()
+                _initialized_paths.add(self.db_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Reads use it directly; writes use it as a context manager, which commits or rolls back."""
+        return get_connection(self.db_path)
     
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         # Content table
@@ -42,6 +164,80 @@ class DatabaseManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_research_cache_topic ON research_cache (topic, created_at)')
+        
+        # Batch progress table so interrupted batch runs can resume
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_items (
+                batch_name TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                content_id INTEGER,
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (batch_name, topic)
+            )
+        ''')
+        
+        # Workflow runs, so failed or interrupted runs can be resumed from their checkpoints
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS workflow_runs (
+                run_id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                bypass_research_cache BOOLEAN DEFAULT FALSE,
+                status TEXT NOT NULL DEFAULT 'running',
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_workflow_runs_status ON workflow_runs (status, updated_at)')
+        
+        # Background generation jobs submitted from the UI; results are loaded by job id
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                run_id TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                error TEXT,
+                content_id INTEGER,
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+        
+        # Trace spans for workflow nodes and LLM calls
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trace_spans (
+                span_id TEXT PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                parent_id TEXT,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                agent TEXT,
+                start_time REAL NOT NULL,
+                duration REAL NOT NULL,
+                queue_wait REAL DEFAULT 0,
+                provider TEXT,
+                model TEXT,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                cached_tokens INTEGER,
+                retries INTEGER DEFAULT 0,
+                parse_failures INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'ok',
+                attributes TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trace_spans_run ON trace_spans (run_id, start_time)')
+        # Databases created before prompt cache reporting lack the cached_tokens column.
+        trace_columns = {row[1] for row in cursor.execute('PRAGMA table_info(trace_spans)')}
+        if 'cached_tokens' not in trace_columns:
+            cursor.execute('ALTER TABLE trace_spans ADD COLUMN cached_tokens INTEGER')
         
         # Content patterns table for context
         cursor.execute('''
@@ -57,12 +253,27 @@ class DatabaseManager:
         ''')
         
         conn.commit()
-        conn.close()
+        self._migrate(conn)
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Apply the migrations this database has not seen yet, each in its own transaction"""
+        for version, description, statements in MIGRATIONS:
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+                continue
+            # IMMEDIATE takes the write lock up front, so a concurrent process waits and then skips the migration.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('PRAGMA user_version').fetchone()[0] < version:
+                    for statement in statements:
+                        conn.execute(statement)
+                    conn.execute(f'PRAGMA user_version = {int(version)}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
     
-    def save_content(self, content_data: Dict[str, Any]) -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def _insert_content(self, cursor, content_data: Dict[str, Any]) -> int:
         cursor.execute('''
             INSERT INTO content (topic, titles, description, hashtags, content_intro, 
                                content_approaches, quality_score, research_data, full_script, brief_script, approved, approval_status)
@@ -81,14 +292,271 @@ class DatabaseManager:
             content_data.get('approved', False),
             content_data.get('approval_status', 'pending')
         ))
-        
-        content_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        return cursor.lastrowid
+
+    def save_content(self, content_data: Dict[str, Any]) -> int:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            content_id = self._insert_content(cursor, content_data)
+        self._index_content([(content_id, content_data)])
         return content_id
+
+    def register_batch_topics(self, batch_name: str, topics: List[str]):
+        """Record the topics of a batch; topics already known keep their status"""
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO batch_items (batch_name, topic) VALUES (?, ?)",
+                [(batch_name, topic) for topic in topics]
+            )
+
+    def get_unfinished_batch_topics(self, batch_name: str) -> List[Dict[str, Any]]:
+        """Topics of the batch that still need a workflow run, including ones interrupted mid-run, with their last run id"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT topic, status, run_id FROM batch_items
+            WHERE batch_name = ? AND status NOT IN ('finished', 'done')
+            ORDER BY rowid
+        ''', (batch_name,))
+        columns = [description[0] for description in cursor.description]
+        topics = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return topics
+
+    def mark_batch_topic(self, batch_name: str, topic: str, status: str, error: str = None, run_id: str = None):
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE batch_items SET status = ?, error = ?, run_id = COALESCE(?, run_id), updated_at = CURRENT_TIMESTAMP
+                WHERE batch_name = ? AND topic = ?
+            ''', (status, error, run_id, batch_name, topic))
+
+    def save_batch_result(self, batch_name: str, topic: str, content_data: Dict[str, Any]):
+        """Keep a finished topic's content until store_batch_results writes it with the rest of its group"""
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE batch_items SET status = 'finished', result = ?, error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE batch_name = ? AND topic = ?
+            ''', (json.dumps(content_data), batch_name, topic))
+
+    def count_batch_results(self, batch_name: str) -> int:
+        """Finished topics whose content has not been stored yet"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM batch_items WHERE batch_name = ? AND status = 'finished'", (batch_name,))
+        return cursor.fetchone()[0]
+
+    def store_batch_results(self, batch_name: str) -> List[int]:
+        """Store the content of every finished batch topic and mark the topics done in a single transaction"""
+        content_ids = []
+        results = []
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT topic, result FROM batch_items WHERE batch_name = ? AND status = 'finished' ORDER BY rowid
+            ''', (batch_name,))
+            for topic, result in cursor.fetchall():
+                content_data = json.loads(result)
+                content_id = self._insert_content(cursor, content_data)
+                cursor.execute('''
+                    UPDATE batch_items SET status = 'done', content_id = ?, result = NULL, error = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                    WHERE batch_name = ? AND topic = ?
+                ''', (content_id, batch_name, topic))
+                content_ids.append(content_id)
+                results.append(content_data)
+        self._index_content(list(zip(content_ids, results)))
+        return content_ids
+
+    def get_batch_progress(self, batch_name: str) -> Dict[str, int]:
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT status, COUNT(*) FROM batch_items WHERE batch_name = ? GROUP BY status
+        ''', (batch_name,))
+        progress = dict(cursor.fetchall())
+        return progress
+    
+    def save_workflow_run(self, run_id: str, topic: str, bypass_research_cache: bool = False):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO workflow_runs (run_id, topic, bypass_research_cache) VALUES (?, ?, ?)",
+                (run_id, topic, bypass_research_cache)
+            )
+
+    def mark_workflow_run(self, run_id: str, status: str, error: str = None):
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE workflow_runs SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP WHERE run_id = ?
+            ''', (status, error, run_id))
+
+    def get_workflow_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM workflow_runs WHERE run_id = ?", (run_id,))
+        row = cursor.fetchone()
+        columns = [description[0] for description in cursor.description]
+        return dict(zip(columns, row)) if row else None
+
+    def get_incomplete_workflow_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Runs that failed, were interrupted, or never reported back (e.g. the process died mid-run)"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM workflow_runs WHERE status != 'completed'
+            ORDER BY updated_at DESC LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def create_job(self, job_id: str, topic: str, run_id: str):
+        with self._connection() as conn:
+            conn.execute("INSERT INTO jobs (job_id, topic, run_id) VALUES (?, ?, ?)", (job_id, topic, run_id))
+
+    def mark_job(self, job_id: str, status: str, error: str = None):
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, error = ?,
+                    started_at = CASE WHEN ? = 'running' THEN CURRENT_TIMESTAMP ELSE started_at END,
+                    finished_at = CASE WHEN ? IN ('done', 'failed') THEN CURRENT_TIMESTAMP ELSE finished_at END
+                WHERE job_id = ?
+            ''', (status, error, status, status, job_id))
+
+    def save_job_result(self, job_id: str, result: Dict[str, Any]):
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = 'done', error = NULL, content_id = ?, result = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ?
+            ''', (result.get('content_id'), json.dumps(result, default=str), job_id))
+
+    def get_recent_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Latest jobs without their (large) result payload"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT job_id, topic, run_id, status, error, content_id, created_at, started_at, finished_at
+            FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_job_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT result FROM jobs WHERE job_id = ? AND status = 'done'", (job_id,))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def get_active_job_run_ids(self) -> List[str]:
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT run_id FROM jobs WHERE status IN ('queued', 'running')")
+        run_ids = [row[0] for row in cursor.fetchall()]
+        return run_ids
+
+    def fail_orphaned_jobs(self) -> int:
+        """Fail jobs a previous process left queued or running; their workflow runs become resumable"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE workflow_runs SET status = 'interrupted', error = 'Worker process stopped', updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'running' AND run_id IN (SELECT run_id FROM jobs WHERE status IN ('queued', 'running'))
+            ''')
+            cursor.execute('''
+                UPDATE jobs SET status = 'failed', error = 'Worker process stopped', finished_at = CURRENT_TIMESTAMP
+                WHERE status IN ('queued', 'running')
+            ''')
+            orphaned = cursor.rowcount
+        return orphaned
+
+    @staticmethod
+    def normalize_topic(topic: str) -> str:
+        """Normalize a topic so trivially different spellings share one cache entry"""
+        return ' '.join(topic.lower().split())
+
+    def get_cached_research(self, topic: str, ttl_seconds: int = None) -> Optional[Dict[str, Any]]:
+        """Return cached research for the topic if it is younger than the TTL"""
+        if ttl_seconds is None:
+            ttl_seconds = Config.RESEARCH_CACHE_TTL_SECONDS
+        conn = self._connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT research_data FROM research_cache
+            WHERE topic = ? AND created_at >= datetime('now', ?)
+            ORDER BY created_at DESC LIMIT 1
+        ''', (self.normalize_topic(topic), f'-{int(ttl_seconds)} seconds'))
+        
+        row = cursor.fetchone()
+        
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+
+    def save_research_cache(self, topic: str, research_data: Dict[str, Any]):
+        """Replace the cached research for the topic"""
+        normalized_topic = self.normalize_topic(topic)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM research_cache WHERE topic = ?", (normalized_topic,))
+            cursor.execute('''
+                INSERT INTO research_cache (topic, research_data) VALUES (?, ?)
+            ''', (normalized_topic, json.dumps(research_data)))
+    
+    def save_trace_spans(self, spans: List[Dict[str, Any]]):
+        """Persist the finished spans of one trace in a single transaction"""
+        with self._connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO trace_spans (span_id, run_id, parent_id, name, kind, agent, start_time, duration,
+                                                    queue_wait, provider, model, prompt_tokens, completion_tokens,
+                                                    cached_tokens, retries, parse_failures, status, attributes)
+                VALUES (:span_id, :run_id, :parent_id, :name, :kind, :agent, :start_time, :duration,
+                        :queue_wait, :provider, :model, :prompt_tokens, :completion_tokens,
+                        :cached_tokens, :retries, :parse_failures, :status, :attributes)
+            ''', spans)
+
+    def get_trace_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent root spans, one per traced run, with the number of retried LLM calls in the run"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT run_id, name, start_time, duration, status, attributes,
+                   (SELECT COALESCE(SUM(retries), 0) FROM trace_spans AS child WHERE child.run_id = root.run_id) AS retries
+            FROM trace_spans AS root
+            WHERE parent_id IS NULL
+            ORDER BY start_time DESC LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_trace_spans(self, run_id: str) -> List[Dict[str, Any]]:
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM trace_spans WHERE run_id = ? ORDER BY start_time", (run_id,))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_span_durations(self, limit: int = 5000) -> List[Dict[str, Any]]:
+        """Recent node and LLM span timings for latency percentiles"""
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT kind, agent, provider, model, duration, queue_wait, prompt_tokens, completion_tokens, cached_tokens,
+                   retries, parse_failures
+            FROM trace_spans WHERE kind IN ('node', 'llm')
+            ORDER BY start_time DESC LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
     
     def get_approved_content(self, limit: int = 10) -> List[Dict[str, Any]]:
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -97,13 +565,12 @@ class DatabaseManager:
         ''', (limit,))
         
         rows = cursor.fetchall()
-        conn.close()
         
         columns = [description[0] for description in cursor.description]
         return [dict(zip(columns, row)) for row in rows]
     
     def get_pending_content(self, limit: int = 10) -> List[Dict[str, Any]]:
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -112,59 +579,258 @@ class DatabaseManager:
         ''', (limit,))
         
         rows = cursor.fetchall()
-        conn.close()
         
         columns = [description[0] for description in cursor.description]
         return [dict(zip(columns, row)) for row in rows]
     
     def update_approval_status(self, content_id: int, approved: bool, status: str = None):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        if status is None:
-            status = 'approved' if approved else 'rejected'
+            if status is None:
+                status = 'approved' if approved else 'rejected'
         
-        cursor.execute('''
-            UPDATE content 
-            SET approved = ?, approval_status = ? 
-            WHERE id = ?
-        ''', (approved, status, content_id))
+            cursor.execute('''
+                UPDATE content 
+                SET approved = ?, approval_status = ? 
+                WHERE id = ?
+            ''', (approved, status, content_id))
         
-        conn.commit()
-        conn.close()
     
     def delete_content(self, content_id: int):
-        conn = sqlite3.connect(self.db_path)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM content WHERE id = ?", (content_id,))
+
+    def get_content_summaries(self, status: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest content as summary rows, answered from the covering indexes without touching the scripts"""
+        conn = self._connection()
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM content WHERE id = ?", (content_id,))
-        conn.commit()
-        conn.close()
+        columns = ', '.join(CONTENT_SUMMARY_COLUMNS)
+        if status is None:
+            cursor.execute(f"SELECT {columns} FROM content ORDER BY created_at DESC LIMIT ?", (limit,))
+        else:
+            cursor.execute(f'''
+                SELECT {columns} FROM content WHERE approval_status = ?
+                ORDER BY created_at DESC LIMIT ?
+            ''', (status, limit))
+        return [dict(zip(CONTENT_SUMMARY_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def _cached_content(self, key: tuple, load):
+        """Return load(conn), reusing the cached result unless content was written since it was read.
+        Cached results are shared between sessions, so callers must not mutate them."""
+        conn = self._connection()
+        # Read the version before the data: a write in between makes the entry stale, never wrongly fresh.
+        version = conn.execute('SELECT version FROM content_version WHERE id = 1').fetchone()[0]
+        cache_key = (self.db_path,) + key
+        with _content_cache_lock:
+            entry = _content_cache.get(cache_key)
+            if entry is not None and entry[0] == version:
+                _content_cache.move_to_end(cache_key)
+                return entry[1]
+        result = load(conn)
+        with _content_cache_lock:
+            _content_cache[cache_key] = (version, result)
+            _content_cache.move_to_end(cache_key)
+            while len(_content_cache) > Config.CONTENT_CACHE_MAX_ENTRIES:
+                _content_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _content_filters(status: str = None, min_score: float = None):
+        conditions, params = [], []
+        if status is not None:
+            conditions.append('approval_status = ?')
+            params.append(status)
+        if min_score is not None:
+            conditions.append('quality_score >= ?')
+            params.append(min_score)
+        return conditions, params
+
+    def get_content_page(self, status: str = None, min_score: float = None, before_id: int = None,
+                         limit: int = None) -> List[Dict[str, Any]]:
+        """One page of summary rows, newest first. Pass the last id of a page as before_id to get the next one"""
+        limit = limit or Config.LIBRARY_PAGE_SIZE
+        conditions, params = self._content_filters(status, min_score)
+        if before_id is not None:
+            conditions.append('id < ?')
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        def load(conn):
+            rows = conn.execute(f'''
+                SELECT {', '.join(CONTENT_SUMMARY_COLUMNS)} FROM content {where}
+                ORDER BY id DESC LIMIT ?
+            ''', params + [limit]).fetchall()
+            return [dict(zip(CONTENT_SUMMARY_COLUMNS, row)) for row in rows]
+
+        return self._cached_content(('page', status, min_score, before_id, limit), load)
+
+    def count_content(self, status: str = None, min_score: float = None) -> int:
+        conditions, params = self._content_filters(status, min_score)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._cached_content(
+            ('count', status, min_score),
+            lambda conn: conn.execute(f"SELECT COUNT(*) FROM content {where}", params).fetchone()[0]
+        )
+
+    def get_content_detail(self, content_id: int) -> Optional[Dict[str, Any]]:
+        """The full row of one content item, for when it is opened in the library"""
+        def load(conn):
+            cursor = conn.execute("SELECT * FROM content WHERE id = ?", (content_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [description[0] for description in cursor.description]
+            return dict(zip(columns, row))
+
+        return self._cached_content(('detail', content_id), load)
+
+    @staticmethod
+    def fts_query(text: str, match_any: bool = False) -> str:
+        """Turn free text into an FTS5 query of quoted terms, so user input never hits FTS5 syntax errors"""
+        terms = [f'"{term}"' for term in re.findall(r'\w+', text.lower())]
+        return (' OR ' if match_any else ' ').join(terms)
+
+    def search_content(self, text: str, status: str = None, min_score: float = None,
+                       limit: int = 50) -> List[Dict[str, Any]]:
+        """Summary rows of the content matching every term of text, most relevant first"""
+        query = self.fts_query(text)
+        if not query:
+            return []
+        conditions, params = self._content_filters(status, min_score)
+        where = ''.join(f' AND c.{condition}' for condition in conditions)
+        columns = ', '.join(f'c.{column}' for column in CONTENT_SUMMARY_COLUMNS)
+
+        def load(conn):
+            rows = conn.execute(f'''
+                SELECT {columns} FROM content_fts JOIN content c ON c.id = content_fts.rowid
+                WHERE content_fts MATCH ?{where}
+                ORDER BY content_fts.rank LIMIT ?
+            ''', [query] + params + [limit]).fetchall()
+            return [dict(zip(CONTENT_SUMMARY_COLUMNS, row)) for row in rows]
+
+        return self._cached_content(('search', query, status, min_score, limit), load)
+
+    def _index_content(self, items: List[tuple]):
+        """Append (content_id, content_data) items to the vector index; a failure leaves the content saved"""
+        try:
+            vectors = np.vstack([embed_content(content_data) for _, content_data in items])
+            conn = self._connection()
+            # The write lock serializes row allocation and the file write across processes.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM content_vectors').fetchone()[0]
+                get_vector_index().write(row, vectors)
+                conn.executemany('INSERT INTO content_vectors (row, content_id) VALUES (?, ?)',
+                                 [(row + offset, content_id) for offset, (content_id, _) in enumerate(items)])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        except Exception as e:
+            logging.warning(f"DatabaseManager: Could not index content {[content_id for content_id, _ in items]}: {e}")
+
+    def rebuild_vector_index(self) -> int:
+        """Re-embed all content into the vector index from row 0, dropping rows of deleted content"""
+        columns = 'id, topic, titles, hashtags, content_intro, content_approaches'
+
+        def embed_rows(rows):
+            return [row[0] for row in rows], [embed_content(dict(zip(columns.split(', '), row))) for row in rows]
+
+        conn = self._connection()
+        # Embed outside the write lock; rows saved meanwhile are picked up once the lock is held.
+        content_ids, vectors = embed_rows(conn.execute(f"SELECT {columns} FROM content ORDER BY id").fetchall())
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            new_ids, new_vectors = embed_rows(conn.execute(
+                f"SELECT {columns} FROM content WHERE id > ? ORDER BY id", (content_ids[-1] if content_ids else 0,)
+            ).fetchall())
+            content_ids += new_ids
+            vectors += new_vectors
+            conn.execute('DELETE FROM content_vectors')
+            if vectors:
+                get_vector_index().write(0, np.vstack(vectors))
+                conn.executemany('INSERT INTO content_vectors (row, content_id) VALUES (?, ?)', enumerate(content_ids))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logging.info(f"DatabaseManager: Rebuilt the vector index with {len(content_ids)} items.")
+        return len(content_ids)
+
+    def _vector_row_ids(self, conn: sqlite3.Connection) -> np.ndarray:
+        """Content id of each live vector index row, refreshed with only the rows added since the last call"""
+        with _vector_rows_lock:
+            state = _vector_rows.setdefault(self.db_path, {'seq': 0, 'ids': np.zeros(0, dtype=np.int64)})
+            added = conn.execute('SELECT seq, row, content_id FROM content_vectors WHERE seq > ? ORDER BY seq',
+                                 (state['seq'],)).fetchall()
+            if added:
+                added = np.array(added, dtype=np.int64)
+                size = int(added[:, 1].max()) + 1
+                if size > len(state['ids']):
+                    state['ids'] = np.concatenate([state['ids'], np.zeros(size - len(state['ids']), dtype=np.int64)])
+                state['ids'][added[:, 1]] = added[:, 2]
+                state['seq'] = int(added[-1, 0])
+            count = conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM content_vectors').fetchone()[0]
+            return state['ids'][:count]
+
+    def get_related_content(self, topic: str, limit: int = None, min_quality: float = None) -> List[Dict[str, Any]]:
+        """
+        Earlier content semantically closest to the topic with a quality score of at least min_quality,
+        most similar first, for research and generation to build on
+        """
+        limit = limit or Config.RELATED_CONTENT_LIMIT
+        min_quality = Config.RELATED_CONTENT_MIN_QUALITY if min_quality is None else min_quality
+        conn = self._connection()
+        index = get_vector_index()
+        row_ids = self._vector_row_ids(conn)
+        # Content that predates the index, or an index file lost or written at another width, is rebuilt once.
+        if (not len(row_ids) and conn.execute('SELECT EXISTS (SELECT 1 FROM content)').fetchone()[0]) \
+                or index.rows_on_disk() < len(row_ids):
+            self.rebuild_vector_index()
+            row_ids = self._vector_row_ids(conn)
+
+        # Over-fetch: deleted and low-scoring content is filtered out after the search.
+        rows, similarities = index.search(embed_text(topic), len(row_ids), limit * 5)
+        candidates = {int(row_ids[row]): float(similarity) for row, similarity in zip(rows, similarities)
+                      if similarity >= Config.RELATED_CONTENT_MIN_SIMILARITY}
+        if not candidates:
+            return []
+        cursor = conn.execute(f'''
+            SELECT id, topic, quality_score, content_intro, content_approaches, hashtags FROM content
+            WHERE id IN ({', '.join('?' * len(candidates))}) AND quality_score >= ?
+        ''', list(candidates) + [min_quality])
+        columns = [description[0] for description in cursor.description]
+        related = [dict(zip(columns, row), similarity=candidates[row[0]]) for row in cursor.fetchall()]
+        related.sort(key=lambda item: item['similarity'], reverse=True)
+        return related[:limit]
 
     def get_all_content(self) -> List[Dict[str, Any]]:
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM content ORDER BY created_at DESC")
         rows = cursor.fetchall()
-        conn.close()
         columns = [description[0] for description in cursor.description]
         return [dict(zip(columns, row)) for row in rows]
 
     def get_content_context(self, topic: str, limit: int = 5) -> Dict[str, Any]:
         """Get context from similar approved content"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
-        # Get similar approved content
-        cursor.execute('''
-            SELECT topic, content_intro, content_approaches, quality_score, hashtags
-            FROM content 
-            WHERE approved = TRUE 
-            AND (topic LIKE ? OR topic LIKE ? OR topic LIKE ?)
-            ORDER BY quality_score DESC, created_at DESC 
-            LIMIT ?
-        ''', (f'%{topic}%', f'%{topic.split()[0]}%', f'%{topic.split()[-1]}%', limit))
-        
-        similar_content = cursor.fetchall()
+        # Get similar approved content, best BM25 match first; any topic term may match
+        similar_content = []
+        query = self.fts_query(topic, match_any=True)
+        if query:
+            cursor.execute('''
+                SELECT c.topic, c.content_intro, c.content_approaches, c.quality_score, c.hashtags
+                FROM content_fts JOIN content c ON c.id = content_fts.rowid
+                WHERE content_fts MATCH ? AND c.approved = TRUE
+                ORDER BY content_fts.rank
+                LIMIT ?
+            ''', (query, limit))
+            similar_content = cursor.fetchall()
         
         # Get overall successful patterns
         cursor.execute('''
@@ -177,7 +843,6 @@ class DatabaseManager:
         
         high_quality_content = cursor.fetchall()
         
-        conn.close()
         
         return {
             'similar_content': similar_content,
@@ -0,0 +1,149 @@
+import asyncio
+import re
+import threading
+from collections import deque
+from typing import Awaitable, Callable
+from config.settings import Config
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when an LLM call does not finish within its task deadline."""
+
+
+def task_type(name: str) -> str:
+    """Collapse numbered variants (e.g. generate_approach_3) into one task type."""
+    return re.sub(r'_\d+$', '', name or 'default')
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class _TaskStats:
+    def __init__(self):
+        self.latencies = deque(maxlen=Config.LLM_HEDGE_WINDOW)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.saved_seconds = 0.0
+
+
+class HedgeTracker:
+    """Per-task latency windows and hedging counters for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def _stats(self, task: str) -> _TaskStats:
+        if task not in self._tasks:
+            self._tasks[task] = _TaskStats()
+        return self._tasks[task]
+
+    def hedge_delay(self, task: str):
+        """Observed p95 for the task, or None while there are too few samples to hedge on."""
+        with self._lock:
+            latencies = sorted(self._stats(task).latencies)
+        if len(latencies) < Config.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(_percentile(latencies, 0.95), Config.LLM_HEDGE_MIN_DELAY)
+
+    def record(self, task: str, latency: float, hedged: bool = False, hedge_won: bool = False,
+               deadline_exceeded: bool = False, failed: bool = False):
+        with self._lock:
+            stats = self._stats(task)
+            stats.calls += 1
+            stats.hedged += hedged
+            stats.deadline_exceeded += deadline_exceeded
+            if hedge_won:
+                stats.hedge_wins += 1
+                # The primary was still running when the hedge answered; estimate how much longer it
+                # would have taken from the observed tail beyond this point.
+                tail = [value for value in stats.latencies if value > latency]
+                if tail:
+                    stats.saved_seconds += sum(tail) / len(tail) - latency
+            if not (deadline_exceeded or failed):
+                stats.latencies.append(latency)
+
+    def summary(self) -> list:
+        with self._lock:
+            rows = []
+            for task, stats in sorted(self._tasks.items()):
+                latencies = sorted(stats.latencies)
+                rows.append({
+                    'task': task,
+                    'calls': stats.calls,
+                    'hedge_rate': round(stats.hedged / stats.calls, 3) if stats.calls else 0.0,
+                    'hedge_wins': stats.hedge_wins,
+                    'deadline_exceeded': stats.deadline_exceeded,
+                    'p50_s': round(_percentile(latencies, 0.50), 3) if latencies else 0.0,
+                    'p95_s': round(_percentile(latencies, 0.95), 3) if latencies else 0.0,
+                    'p99_s': round(_percentile(latencies, 0.99), 3) if latencies else 0.0,
+                    'estimated_saved_s': round(stats.saved_seconds, 3)
+                })
+            return rows
+
+
+hedge_tracker = HedgeTracker()
+
+
+def task_deadline(task: str):
+    """Deadline in seconds for a task type; per-task overrides win over LLM_DEADLINE_SECONDS. None means no deadline."""
+    deadline = Config.LLM_TASK_DEADLINES.get(task, Config.LLM_DEADLINE_SECONDS)
+    return deadline if deadline and deadline > 0 else None
+
+
+async def call_with_deadline(task: str, make_call: Callable[[], Awaitable], llm_span=None, can_hedge: bool = True):
+    """
+    Await make_call() within the task's deadline. With hedging enabled, a duplicate call is started
+    once the first one runs past the task's observed p95; the first successful result wins and the
+    other call is cancelled.
+    """
+    deadline = task_deadline(task)
+    delay = hedge_tracker.hedge_delay(task) if Config.LLM_HEDGING_ENABLED and can_hedge else None
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    def remaining():
+        return None if deadline is None else max(0.0, started + deadline - loop.time())
+
+    primary = asyncio.ensure_future(make_call())
+    attempts = {primary}
+    hedge = None
+    try:
+        if delay is not None and (deadline is None or delay < deadline):
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                hedge = asyncio.ensure_future(make_call())
+                attempts.add(hedge)
+        last_error = None
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for attempt in done:
+                if attempt.cancelled():
+                    continue
+                if attempt.exception() is not None:
+                    last_error = attempt.exception()
+                    continue
+                latency = loop.time() - started
+                hedge_won = attempt is hedge
+                hedge_tracker.record(task, latency, hedged=hedge is not None, hedge_won=hedge_won)
+                if llm_span is not None:
+                    llm_span.set(task=task, hedged=hedge is not None, hedge_won=hedge_won)
+                return attempt.result()
+        if not attempts:
+            # Every attempt failed before the deadline.
+            hedge_tracker.record(task, loop.time() - started, hedged=hedge is not None, failed=True)
+            raise last_error or RuntimeError(f"LLM call for task '{task}' was cancelled")
+        hedge_tracker.record(task, loop.time() - started, hedged=hedge is not None, deadline_exceeded=True)
+        if llm_span is not None:
+            llm_span.set(task=task, hedged=hedge is not None, deadline_exceeded=True)
+        raise DeadlineExceededError(f"LLM call for task '{task}' exceeded its {deadline:g}s deadline")
+    finally:
+        for attempt in (primary, hedge):
+            if attempt is not None and not attempt.done():
+                attempt.cancel()
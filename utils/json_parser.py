@@ -0,0 +1,267 @@
+import json
+import re
+from typing import Any
+
+_VALUE_STARTS = '"\'{[]}-0123456789'
+_LITERALS = {
+    'true': True, 'false': False, 'null': None,
+    'True': True, 'False': False, 'None': None
+}
+# Deeper nesting is cut off as if the output were truncated there, instead of exhausting the stack.
+_MAX_DEPTH = 200
+_BRACKET = re.compile(r'[{\[]')
+_decoder = json.JSONDecoder()
+
+
+class _LenientJSONParser:
+    """
+    Single-pass recursive-descent parser for the almost-JSON that LLMs produce.
+
+    Tolerates markdown fences and surrounding prose, trailing or missing commas,
+    single-quoted and bare keys, single-quoted strings, unescaped quotes inside
+    strings, raw newlines, comments, Python literals and truncated output. Nesting
+    deeper than _MAX_DEPTH ends the value there, as truncated output would.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.pos = 0
+        self.depth = 0
+
+    def parse_from(self, start: int):
+        """Parse the value opening at start; returns (value, position after it)."""
+        self.pos = start
+        self.depth = 0
+        value = self._parse_value()
+        return value, self.pos
+
+    def _skip_whitespace(self):
+        text = self.text
+        while self.pos < self.length:
+            char = text[self.pos]
+            if char in ' \t\r\n':
+                self.pos += 1
+            elif text.startswith('//', self.pos):
+                end = text.find('\n', self.pos)
+                self.pos = self.length if end == -1 else end + 1
+            elif text.startswith('/*', self.pos):
+                end = text.find('*/', self.pos + 2)
+                self.pos = self.length if end == -1 else end + 2
+            else:
+                break
+
+    def _peek(self):
+        self._skip_whitespace()
+        return self.text[self.pos] if self.pos < self.length else ''
+
+    def _parse_value(self) -> Any:
+        char = self._peek()
+        if char in '{[':
+            if self.depth >= _MAX_DEPTH:
+                self.pos = self.length
+                return None
+            self.depth += 1
+            try:
+                return self._parse_object() if char == '{' else self._parse_array()
+            finally:
+                self.depth -= 1
+        if char in '"\'':
+            return self._parse_string(char, is_key=False)
+        if char == '-' or char.isdigit():
+            return self._parse_number()
+        if char == '':
+            return None
+        return self._parse_bare_word()
+
+    def _parse_object(self) -> dict:
+        result = {}
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char == '' or char == '}':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.pos += 1
+                continue
+            if char == ']':
+                # Mismatched bracket from a truncated or sloppy response; close the object here.
+                return result
+            if char in '"\'':
+                key = self._parse_string(char, is_key=True)
+            else:
+                key = str(self._parse_bare_word())
+            if self._peek() == ':':
+                self.pos += 1
+            else:
+                # Key without a value (e.g. truncated right after the key); drop it.
+                if self._peek() == '':
+                    return result
+                continue
+            if self._peek() == '':
+                return result
+            result[key] = self._parse_value()
+
+    def _parse_array(self) -> list:
+        result = []
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char == '' or char == ']':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.pos += 1
+                continue
+            if char == '}':
+                return result
+            result.append(self._parse_value())
+
+    def _parse_string(self, quote: str, is_key: bool) -> str:
+        text = self.text
+        self.pos += 1
+        chunks = []
+        chunk_start = self.pos
+        # Jump between quote and backslash positions instead of stepping per character.
+        next_quote = text.find(quote, self.pos)
+        next_escape = text.find('\\', self.pos)
+        while next_quote != -1 or next_escape != -1:
+            if next_escape != -1 and (next_quote == -1 or next_escape < next_quote):
+                chunks.append(text[chunk_start:next_escape])
+                self.pos = next_escape
+                chunks.append(self._parse_escape())
+                chunk_start = self.pos
+                next_escape = text.find('\\', self.pos)
+                if next_quote != -1 and next_quote < self.pos:
+                    next_quote = text.find(quote, self.pos)
+                continue
+            self.pos = next_quote
+            if self._is_string_end(is_key):
+                chunks.append(text[chunk_start:self.pos])
+                self.pos += 1
+                return ''.join(chunks)
+            next_quote = text.find(quote, self.pos + 1)
+        # Truncated inside a string: keep what was written.
+        self.pos = self.length
+        chunks.append(text[chunk_start:])
+        return ''.join(chunks)
+
+    def _is_string_end(self, is_key: bool) -> bool:
+        """Decide whether a quote closes the string or is an unescaped quote inside it."""
+        text = self.text
+        i = self.pos + 1
+        while i < self.length and text[i] in ' \t\r\n':
+            i += 1
+        if i >= self.length:
+            return True
+        char = text[i]
+        if is_key:
+            return char == ':'
+        if char in '}]:':
+            return True
+        if char != ',':
+            return False
+        # A comma only ends the string if what follows looks like the next key or value.
+        i += 1
+        while i < self.length and text[i] in ' \t\r\n':
+            i += 1
+        if i >= self.length or text[i] in _VALUE_STARTS or text.startswith('//', i):
+            return True
+        if any(text.startswith(word, i) for word in _LITERALS):
+            return True
+        # Bare key of the next member, e.g. `"value", next_key: ...`
+        j = i
+        while j < self.length and (text[j].isalnum() or text[j] == '_'):
+            j += 1
+        while j < self.length and text[j] in ' \t':
+            j += 1
+        return j > i and j < self.length and text[j] == ':'
+
+    def _parse_escape(self) -> str:
+        text = self.text
+        self.pos += 1
+        if self.pos >= self.length:
+            return ''
+        char = text[self.pos]
+        self.pos += 1
+        simple = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '/': '/', '\\': '\\', '"': '"', "'": "'"}
+        if char in simple:
+            return simple[char]
+        if char == 'u':
+            digits = text[self.pos:self.pos + 4]
+            try:
+                code = int(digits, 16)
+            except ValueError:
+                return 'u'
+            self.pos += 4
+            return chr(code)
+        # Unknown escape such as \d inside a regex example: keep it verbatim.
+        return '\\' + char
+
+    def _parse_number(self):
+        text = self.text
+        start = self.pos
+        self.pos += 1
+        while self.pos < self.length and text[self.pos] in '0123456789+-.eE':
+            self.pos += 1
+        token = text[start:self.pos]
+        try:
+            return int(token)
+        except ValueError:
+            try:
+                return float(token)
+            except ValueError:
+                return token
+
+    def _parse_bare_word(self):
+        text = self.text
+        start = self.pos
+        while self.pos < self.length and (text[self.pos].isalnum() or text[self.pos] in '_-$.'):
+            self.pos += 1
+        if self.pos == start:
+            # Stray punctuation; skip it so parsing always makes progress.
+            self.pos += 1
+            return None
+        word = text[start:self.pos]
+        return _LITERALS.get(word, word)
+
+
+def _search_ranges(text: str):
+    """The body of a fenced block first, then the text before it; the whole text if unfenced."""
+    fence = text.find('```')
+    if fence == -1:
+        return [(0, len(text))]
+    newline = text.find('\n', fence)
+    body = newline + 1 if newline != -1 else fence + 3
+    return [(body, len(text)), (0, body)]
+
+
+def parse_llm_json(text: str) -> Any:
+    """
+    Parse JSON from raw LLM output.
+
+    Each opening bracket is tried in turn, through the C json decoder and, if that fails, the
+    lenient parser. The first non-empty object wins, so bracketed prose such as "(see [1])"
+    ahead of the payload is skipped; an empty object or an array is returned only when the
+    text holds no other object. Raises ValueError if the text holds no object or array.
+    """
+    lenient = _LenientJSONParser(text)
+    fallback = None
+    for begin, stop in _search_ranges(text):
+        match = _BRACKET.search(text, begin, stop)
+        while match:
+            start = match.start()
+            try:
+                value, end = _decoder.raw_decode(text, start)
+            except (json.JSONDecodeError, RecursionError):
+                value, end = lenient.parse_from(start)
+            if isinstance(value, dict) and value:
+                return value
+            if fallback is None or (isinstance(value, dict) and not isinstance(fallback, dict)):
+                fallback = value
+            # Skip past the parsed value, so the objects of a top-level array are not tried on their own.
+            match = _BRACKET.search(text, max(end, start + 1), stop)
+    if fallback is None:
+        raise ValueError("No JSON object or array found in LLM output")
+    return fallback
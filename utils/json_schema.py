@@ -0,0 +1,58 @@
+from typing import Any, Dict, List
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool
+}
+
+# Keywords Gemini's response_schema accepts; the rest of a schema is only checked locally.
+_GOOGLE_KEYWORDS = {'type', 'properties', 'required', 'items', 'enum', 'description', 'nullable'}
+
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """
+    Validate value against the subset of JSON schema the agents use (type, properties, required,
+    items, enum, minItems/maxItems, minLength). Returns readable errors; an empty list means valid.
+    """
+    expected = schema.get('type')
+    if expected:
+        python_type = _TYPES[expected]
+        # bool is an int subclass, but never a valid number here.
+        if not isinstance(value, python_type) or (isinstance(value, bool) and expected != 'boolean'):
+            return [f"{path} should be of type {expected}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path} should be one of {schema['enum']}"]
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}.{key} is required")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f"{path}.{key}"))
+    elif isinstance(value, list):
+        if len(value) < schema.get('minItems', 0):
+            errors.append(f"{path} should have at least {schema['minItems']} items")
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            errors.append(f"{path} should have at most {schema['maxItems']} items")
+        if 'items' in schema:
+            for index, item in enumerate(value):
+                errors.extend(schema_errors(item, schema['items'], f"{path}[{index}]"))
+    elif isinstance(value, str):
+        if len(value.strip()) < schema.get('minLength', 0):
+            errors.append(f"{path} should be at least {schema['minLength']} characters")
+    return errors
+
+
+def google_response_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip the keywords Gemini rejects from a schema before sending it as response_schema."""
+    stripped = {key: value for key, value in schema.items() if key in _GOOGLE_KEYWORDS}
+    if 'properties' in stripped:
+        stripped['properties'] = {key: google_response_schema(value) for key, value in stripped['properties'].items()}
+    if 'items' in stripped:
+        stripped['items'] = google_response_schema(stripped['items'])
+    return stripped
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from config.settings import Config
+from utils.database_manager import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay-only mode when a prompt has no cached response."""
+
+
+class LLMCache:
+    """Content-addressed, on-disk cache of raw LLM responses.
+
+    Entries are keyed on a hash of everything that influences the provider's
+    answer, expire after a TTL, and are evicted least-recently-used once the
+    table grows past ``max_entries``.
+    """
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = None, max_entries: int = None,
+                 replay_only: bool = None):
+        self.db_path = db_path or Config.LLM_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.LLM_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else Config.LLM_CACHE_MAX_ENTRIES
+        self.replay_only = replay_only if replay_only is not None else Config.LLM_CACHE_REPLAY_ONLY
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.init_cache()
+
+    def init_cache(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        with get_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache (last_accessed)')
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, max_tokens: int,
+                 system_prompt: str, human_prompt: str) -> str:
+        """Hash the full request so identical calls map to the same entry."""
+        payload = json.dumps(
+            [provider.lower(), model, float(temperature), int(max_tokens), system_prompt, human_prompt],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Return the cached response, or None if it is missing or expired."""
+        now = time.time()
+        conn = get_connection(self.db_path)
+        row = conn.execute('SELECT response, created_at FROM llm_cache WHERE cache_key = ?', (cache_key,)).fetchone()
+
+        if row and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+            with conn:
+                conn.execute('DELETE FROM llm_cache WHERE cache_key = ?', (cache_key,))
+            row = None
+
+        if row:
+            with conn:
+                conn.execute('UPDATE llm_cache SET last_accessed = ? WHERE cache_key = ?', (now, cache_key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if row:
+            logger.info(f"LLM cache hit: {cache_key[:12]}")
+            return row[0]
+        logger.info(f"LLM cache miss: {cache_key[:12]}")
+        return None
+
+    def set(self, cache_key: str, provider: str, model: str, response: str):
+        """Store a response and evict the least recently used entries beyond the size bound."""
+        now = time.time()
+        with get_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO llm_cache (cache_key, provider, model, response, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (cache_key, provider, model, response, now, now))
+
+            if self.max_entries > 0:
+                cursor.execute('''
+                    DELETE FROM llm_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_cache
+                        ORDER BY last_accessed DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+                if cursor.rowcount > 0:
+                    with self._lock:
+                        self.evictions += cursor.rowcount
+                    logger.debug(f"LLM cache evicted {cursor.rowcount} entries")
+
+    def clear(self):
+        with get_connection(self.db_path) as conn:
+            conn.execute('DELETE FROM llm_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        entries = get_connection(self.db_path).execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'replay_only': self.replay_only
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide cache so hit/miss counters cover every agent."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMCache()
+        return _shared_cache
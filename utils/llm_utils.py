@@ -1,14 +1,27 @@
 from config.settings import Config # Import Config here
+from config.model_policy import resolve_model_policy
 
 import logging
 from logging import StreamHandler # Import StreamHandler
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import SystemMessage, HumanMessage
 from langchain_xai import ChatXAI
+from utils.llm_cache import get_llm_cache, CacheMissError
+from utils.json_parser import parse_llm_json
+from utils.json_schema import schema_errors, google_response_schema
+from utils.client_registry import get_openai_client, get_async_openai_client, record_lookup, record_client_created
+from utils.tracing import span, record, current_span
+from utils.hedging import call_with_deadline, task_type, task_deadline, DeadlineExceededError
+from utils.rate_limiter import rate_limiter, backoff_for
+from utils.research_digest import estimate_tokens
+from utils.provider_router import provider_router, backend_available, default_model
 
+import asyncio
+import itertools
 import json
-import re
-from openai import OpenAI  # Import OpenAI client for OpenRouter
+import threading
+import time
+import weakref
 
 
 # Configure logging
@@ -22,16 +35,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# asyncio semaphores are bound to the event loop that first uses them, so keep one set per loop.
+_provider_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Return the semaphore limiting concurrent async calls to a provider on the running loop."""
+    loop = asyncio.get_running_loop()
+    semaphores = _provider_semaphores.setdefault(loop, {})
+    key = provider.lower()
+    if key not in semaphores:
+        semaphores[key] = asyncio.Semaphore(Config.PROVIDER_MAX_CONCURRENCY)
+    return semaphores[key]
+
+
+def _default_model_name(provider: str) -> str:
+    # OpenRouter has always meant DeepSeek here; MODEL_NAME is a Google model name.
+    return Config.DEEPSEEK_MODEL if provider.lower() == "openrouter" else Config.MODEL_NAME
+
 
 class LLMUtils:
-    def __init__(self, provider: str = None, model_name: str = None, temperature: float = None, max_tokens: int = None):
-        self.provider = provider or Config.LLM_PROVIDER
+    def __init__(self, provider: str = None, model_name: str = None, temperature: float = None, max_tokens: int = None, use_cache: bool = None):
         self.provider = provider or Config.LLM_PROVIDER
-        self.model_name = model_name or Config.MODEL_NAME
+        self.model_name = model_name or _default_model_name(self.provider)
         self.temperature = temperature if temperature is not None else Config.TEMPERATURE
         self.max_tokens = max_tokens if max_tokens is not None else Config.MAX_TOKENS
-        logger.info(f"Initializing LLM: provider={self.provider}, model={self.model_name}, temperature={self.temperature}, max_tokens={self.max_tokens}")
-        self.llm = self._initialize_llm()
+        if use_cache is None:
+            use_cache = Config.LLM_CACHE_ENABLED or Config.LLM_CACHE_REPLAY_ONLY
+        self.cache = get_llm_cache() if use_cache else None
+        logger.info(f"Initializing LLM: provider={self.provider}, model={self.model_name}, temperature={self.temperature}, max_tokens={self.max_tokens}, cache={'on' if self.cache else 'off'}")
+        if self.cache and self.cache.replay_only:
+            # Replay-only runs are served entirely from the cache, so no provider client is needed.
+            logger.info("LLM cache is in replay-only mode; skipping provider client initialization")
+            self.llm = None
+        else:
+            self.llm = self._initialize_llm()
+
+    def _resolved_model(self) -> str:
+        """Return the model name actually sent to the provider."""
+        if self.provider.lower() == "grok":
+            return Config.GROK_MODEL
+        return self.model_name
 
     def _initialize_llm(self):
         """Initialize the LLM based on the provider."""
@@ -60,7 +104,14 @@ class LLMUtils:
                     max_tokens=self.max_tokens
                 )
 
-            
+            elif self.provider.lower() == "openrouter":
+                if not Config.OPENROUTER_API_KEY:
+                    logger.error("OPENROUTER_API_KEY is not set in .env")
+                    raise ValueError("OPENROUTER_API_KEY is not set in .env")
+                logger.debug("Using pooled OpenRouter client")
+                return get_openai_client(self.provider)
+
+            else:
                 logger.error(f"Unsupported LLM provider: {self.provider}")
                 raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
@@ -68,86 +119,465 @@ class LLMUtils:
             logger.exception(f"Failed to initialize LLM: {str(e)}")
             raise RuntimeError(f"Failed to initialize LLM: {str(e)}")
 
-    def invoke(self, system_prompt: str, human_prompt: str, parse_json: bool = False):
-        """Invoke the LLM with system and human prompts."""
+    def _lookup_cache(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        """Return (cache_key, cached_content) for the prompts; both are None when caching is off."""
+        if not self.cache:
+            return None, None
+        if schema is not None:
+            # A schema changes the request, so it is part of the key.
+            human_prompt += json.dumps(schema, sort_keys=True)
+        cache_key = self.cache.make_key(self.provider, self._resolved_model(), self.temperature,
+                                        self.max_tokens, system_prompt, human_prompt)
+        content = self.cache.get(cache_key)
+        if content is None and self.cache.replay_only:
+            raise CacheMissError(f"No cached response for key {cache_key[:12]} in replay-only mode")
+        return cache_key, content
+
+    def _store_cache(self, cache_key: str, content: str, schema: dict = None):
+        """Cache a response; structured responses only once they validate, so bad output is never replayed."""
+        if not cache_key:
+            return
+        if schema is not None:
+            try:
+                if schema_errors(parse_llm_json(content), schema):
+                    return
+            except ValueError:
+                return
+        self.cache.set(cache_key, self.provider, self._resolved_model(), content)
+
+    def _structured_kwargs(self, schema: dict) -> dict:
+        """Request options that put the provider in JSON mode, constrained to the schema where supported."""
+        mode = Config.STRUCTURED_OUTPUT_MODE
+        if schema is None or mode == 'off':
+            return {}
+        if self.provider.lower() == 'google':
+            if mode == 'json_object':
+                return {'response_mime_type': 'application/json'}
+            return {'response_mime_type': 'application/json', 'response_schema': google_response_schema(schema)}
+        if mode == 'json_object':
+            return {'response_format': {'type': 'json_object'}}
+        return {'response_format': {'type': 'json_schema', 'json_schema': {'name': 'response', 'schema': schema}}}
+
+    def _chat_model(self, schema: dict = None):
+        """The LangChain chat model, bound to the structured-output options for the schema."""
+        kwargs = self._structured_kwargs(schema)
+        return self.llm.bind(**kwargs) if kwargs else self.llm
+
+    def _validate_structured(self, content: str, schema: dict):
+        """Parse a structured response and check it against the schema locally; returns (result, errors)."""
+        result = self._parse_and_repair_json(content)
+        errors = schema_errors(result, schema)
+        if errors:
+            logger.warning(f"Structured output failed schema validation: {errors[:5]}")
+        return result, errors
+
+    @staticmethod
+    def _schema_correction(human_prompt: str, schema: dict, errors: list) -> str:
+        """The original prompt plus the validation errors of the previous attempt."""
+        problems = "\n".join(f"        - {error}" for error in errors[:10])
+        return human_prompt + f"""
+
+        **Your previous response did not match the required JSON schema:**
+{problems}
+        Return only a JSON object matching this schema: {json.dumps(schema)}
+        """
+
+    def _finalize_response(self, content: str, parse_json: bool):
+        logger.debug(f"Raw LLM response: {content[:1000]}...")
+
+        if parse_json:
+            logger.info("Attempting to parse response as JSON")
+            return self._parse_and_repair_json(content)
+
+        logger.info("Returning raw response content")
+        return content
+
+    def _llm_span(self, name: str):
+        return span(name, kind='llm', activate=False, provider=self.provider, model=self._resolved_model())
+
+    @staticmethod
+    def _record_usage(llm_span, response):
+        """Copy token usage, including prompt tokens served from the provider's prefix cache, onto the span."""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            llm_span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+                         cached_tokens=(getattr(details, 'cached_tokens', None) or 0) if details else 0)
+            return
+        metadata = getattr(response, 'usage_metadata', None)
+        if metadata:
+            # LangChain reports usage per chunk when streaming, so accumulate.
+            cache_read = (metadata.get('input_token_details') or {}).get('cache_read', 0) or 0
+            llm_span.set(
+                prompt_tokens=(llm_span.attributes.get('prompt_tokens') or 0) + metadata.get('input_tokens', 0),
+                completion_tokens=(llm_span.attributes.get('completion_tokens') or 0) + metadata.get('output_tokens', 0),
+                cached_tokens=(llm_span.attributes.get('cached_tokens') or 0) + cache_read
+            )
+
+    def _estimate_request_tokens(self, system_prompt: str, human_prompt: str) -> int:
+        """Pre-call token estimate charged against the tokens-per-minute budget."""
+        return (estimate_tokens(system_prompt) + estimate_tokens(human_prompt)
+                + min(self.max_tokens, Config.LLM_EXPECTED_COMPLETION_TOKENS))
+
+    def _settle_usage(self, llm_span, estimated: int):
+        actual = (llm_span.attributes.get('prompt_tokens') or 0) + (llm_span.attributes.get('completion_tokens') or 0)
+        rate_limiter.settle(self.provider, self._resolved_model(), estimated, actual)
+
+    def _rate_limited(self, error: Exception, attempt: int, llm_span):
+        """Return the backoff delay if error is a retryable 429, otherwise None."""
+        delay = backoff_for(error, self.provider, self._resolved_model(), attempt)
+        if delay is not None:
+            logger.warning(f"Rate limited by {self.provider}; retrying in {delay:.1f}s (attempt {attempt + 1})")
+            llm_span.increment('retries')
+        return delay
+
+    def _invoke_once(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        if self.provider.lower() == "openrouter":
+            # Handle OpenRouter invocation
+            response = self.llm.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": human_prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                **self._structured_kwargs(schema)
+            )
+            return response, response.choices[0].message.content
+        # Existing logic for Google and Grok
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=human_prompt)
+        ]
+        logger.info("Invoking LLM")
+        response = self._chat_model(schema).invoke(messages)
+        return response, response.content
+
+    def invoke(self, system_prompt: str, human_prompt: str, parse_json: bool = False, schema: dict = None):
+        """
+        Invoke the LLM with system and human prompts, within the provider's rate limits.
+        Given a JSON schema, the provider's structured-output mode is used where it has one and the
+        parsed result is validated locally; output that fails validation is requested again, up to
+        STRUCTURED_OUTPUT_RETRIES times, and the last parsed result is returned either way.
+        """
+        if schema is None:
+            return self._finalize_response(self._invoke_text(system_prompt, human_prompt), parse_json)
+        prompt = human_prompt
+        for attempt in range(Config.STRUCTURED_OUTPUT_RETRIES + 1):
+            if attempt:
+                record('retries')
+            result, errors = self._validate_structured(self._invoke_text(system_prompt, prompt, schema), schema)
+            if not errors:
+                return result
+            prompt = self._schema_correction(human_prompt, schema, errors)
+        return result
+
+    def _invoke_text(self, system_prompt: str, human_prompt: str, schema: dict = None) -> str:
         try:
             logger.debug(f"System prompt: {system_prompt[:500]}...")
             logger.debug(f"Human prompt: {human_prompt[:500]}...")
-            
-            if self.provider.lower() == "openrouter":
-                # Handle OpenRouter invocation
-                client = self.llm
-                response = client.chat.completions.create(
-                    model=Config.DEEPSEEK_MODEL,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": human_prompt}
-                    ],
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
-                )
-                content = response.choices[0].message.content
-            else:
-                # Existing logic for Google and Grok
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=human_prompt)
-                ]
-                logger.info("Invoking LLM")
-                response = self.llm.invoke(messages)
-                content = response.content
-
-            logger.debug(f"Raw LLM response: {content[:1000]}...")
-            
-            if parse_json:
-                logger.info("Attempting to parse response as JSON")
-                return self._parse_and_repair_json(content)
-            
-            logger.info("Returning raw response content")
+
+            with self._llm_span("llm.invoke") as llm_span:
+                cache_key, content = self._lookup_cache(system_prompt, human_prompt, schema)
+                llm_span.set(cache_hit=content is not None)
+                if content is not None:
+                    logger.info("Returning cached LLM response")
+                    return content
+
+                estimated = self._estimate_request_tokens(system_prompt, human_prompt)
+                for attempt in itertools.count():
+                    rate_limiter.acquire_sync(self.provider, self._resolved_model(), estimated)
+                    try:
+                        response, content = self._invoke_once(system_prompt, human_prompt, schema)
+                        break
+                    except Exception as e:
+                        if self._rate_limited(e, attempt, llm_span) is None:
+                            raise
+                self._record_usage(llm_span, response)
+                self._settle_usage(llm_span, estimated)
+
+            self._store_cache(cache_key, content, schema)
             return content
-            
+
+        except CacheMissError:
+            raise
         except Exception as e:
             logger.exception(f"LLM invocation failed: {str(e)}")
             raise RuntimeError(f"LLM invocation failed: {str(e)}")
 
-    def _parse_and_repair_json(self, raw_json_string: str) -> dict:
+    async def _ainvoke_once(self, system_prompt: str, human_prompt: str, llm_span, estimated: int, schema: dict = None):
+        """One provider request: admitted by the rate limiter, bounded by the concurrency limit, retried on 429."""
+        for attempt in itertools.count():
+            waiting_since = time.perf_counter()
+            await rate_limiter.acquire(self.provider, self._resolved_model(), estimated)
+            async with _get_provider_semaphore(self.provider):
+                if 'queue_wait' not in llm_span.attributes:
+                    llm_span.set(queue_wait=time.perf_counter() - waiting_since)
+                try:
+                    if self.provider.lower() == "openrouter":
+                        client = get_async_openai_client(self.provider)
+                        response = await client.chat.completions.create(
+                            model=self.model_name,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": human_prompt}
+                            ],
+                            temperature=self.temperature,
+                            max_tokens=self.max_tokens,
+                            **self._structured_kwargs(schema)
+                        )
+                        return response, response.choices[0].message.content
+                    messages = [
+                        SystemMessage(content=system_prompt),
+                        HumanMessage(content=human_prompt)
+                    ]
+                    logger.info("Invoking LLM asynchronously")
+                    response = await self._chat_model(schema).ainvoke(messages)
+                    return response, response.content
+                except Exception as e:
+                    if self._rate_limited(e, attempt, llm_span) is None:
+                        raise
+
+    async def ainvoke(self, system_prompt: str, human_prompt: str, parse_json: bool = False, schema: dict = None):
         """
-        Parses a raw string that is expected to be a JSON object.
-        Attempts to repair common LLM output issues like markdown code blocks, unescaped quotes, and incomplete JSON.
+        Asynchronously invoke the LLM, bounded by the per-provider concurrency limit and the
+        task's deadline. Calls that run past their task's p95 may be hedged (see utils.hedging).
+        A schema is handled as in invoke.
         """
-        cleaned_string = raw_json_string.strip()
+        if schema is None:
+            return self._finalize_response(await self._ainvoke_text(system_prompt, human_prompt), parse_json)
+        prompt = human_prompt
+        for attempt in range(Config.STRUCTURED_OUTPUT_RETRIES + 1):
+            if attempt:
+                record('retries')
+            result, errors = self._validate_structured(await self._ainvoke_text(system_prompt, prompt, schema), schema)
+            if not errors:
+                return result
+            prompt = self._schema_correction(human_prompt, schema, errors)
+        return result
 
-        # 1. Attempt to extract JSON from markdown code blocks
-        match_json_block = re.search(r'```json\s*([\s\S]*?)\s*```', cleaned_string)
-        match_generic_block = re.search(r'```\s*([\s\S]*?)\s*```', cleaned_string)
+    async def _ainvoke_text(self, system_prompt: str, human_prompt: str, schema: dict = None) -> str:
+        try:
+            logger.debug(f"System prompt: {system_prompt[:500]}...")
+            logger.debug(f"Human prompt: {human_prompt[:500]}...")
 
-        if match_json_block:
-            json_str = match_json_block.group(1).strip()
-        elif match_generic_block:
-            json_str = match_generic_block.group(1).strip()
-        else:
-            json_str = cleaned_string
+            with self._llm_span("llm.ainvoke") as llm_span:
+                cache_key, content = self._lookup_cache(system_prompt, human_prompt, schema)
+                llm_span.set(cache_hit=content is not None)
+                if content is not None:
+                    logger.info("Returning cached LLM response")
+                    return content
+
+                # A hedge would only queue behind the primary when the provider is already saturated.
+                can_hedge = not _get_provider_semaphore(self.provider).locked()
+                estimated = self._estimate_request_tokens(system_prompt, human_prompt)
+                response, content = await call_with_deadline(
+                    task_type(llm_span.agent),
+                    lambda: self._ainvoke_once(system_prompt, human_prompt, llm_span, estimated, schema),
+                    llm_span=llm_span,
+                    can_hedge=can_hedge
+                )
+                self._record_usage(llm_span, response)
+                self._settle_usage(llm_span, estimated)
 
-        # 2. Attempt to parse directly
+            self._store_cache(cache_key, content, schema)
+            return content
+
+        except CacheMissError:
+            raise
+        except Exception as e:
+            logger.exception(f"Async LLM invocation failed: {str(e)}")
+            raise RuntimeError(f"LLM invocation failed: {str(e)}")
+
+    def stream(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        """Yield response text chunks as the provider produces them; a schema selects structured output."""
         try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.warning(f"Initial JSON decode failed: {e}. Attempting repair...")
-
-            # 3. Try to repair common issues (e.g., unescaped quotes, trailing commas, comments)
-            # This is a basic attempt; for more complex cases, a dedicated JSON repair library might be needed.
-            repaired_json_str = json_str
-            # Remove trailing commas (simple cases)
-            repaired_json_str = re.sub(r',\s*([}\]])', r'\1', repaired_json_str)
-            # Replace single quotes with double quotes for keys and string values
-            repaired_json_str = re.sub(r"'([a-zA-Z0-9_]+)':", r'"\1":', repaired_json_str) # for keys
-            repaired_json_str = re.sub(r":\s*'(.*?)'", r': "\1"', repaired_json_str) # for values
-            
-            
-            # Escape unescaped double quotes within string values
-            # Escape unescaped double quotes within string values more carefully
-            # This is a complex problem, and a simple regex might not cover all edge cases.
-            # A common issue is when the LLM generates JSON with unescaped quotes inside string values.
+            with self._llm_span("llm.stream") as llm_span:
+                cache_key, content = self._lookup_cache(system_prompt, human_prompt, schema)
+                llm_span.set(cache_hit=content is not None)
+                if content is not None:
+                    logger.info("Streaming cached LLM response")
+                    yield content
+                    return
+
+                chunks = []
+                estimated = self._estimate_request_tokens(system_prompt, human_prompt)
+                rate_limiter.acquire_sync(self.provider, self._resolved_model(), estimated)
+                if self.provider.lower() == "openrouter":
+                    response = self.llm.chat.completions.create(
+                        model=self.model_name,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": human_prompt}
+                        ],
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **self._structured_kwargs(schema)
+                    )
+                    for chunk in response:
+                        self._record_usage(llm_span, chunk)
+                        token = chunk.choices[0].delta.content if chunk.choices else None
+                        if token:
+                            chunks.append(token)
+                            yield token
+                else:
+                    messages = [
+                        SystemMessage(content=system_prompt),
+                        HumanMessage(content=human_prompt)
+                    ]
+                    logger.info("Streaming LLM response")
+                    for chunk in self._chat_model(schema).stream(messages):
+                        self._record_usage(llm_span, chunk)
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            yield chunk.content
+                self._settle_usage(llm_span, estimated)
+
+            self._store_cache(cache_key, "".join(chunks), schema)
+
+        except CacheMissError:
+            raise
+        except Exception as e:
+            # Streams are not retried, but a 429 still pauses every other caller of this model.
+            backoff_for(e, self.provider, self._resolved_model(), 0)
+            logger.exception(f"LLM streaming failed: {str(e)}")
+            raise RuntimeError(f"LLM streaming failed: {str(e)}")
+
+    async def astream(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        """
+        Async generator yielding response text chunks, bounded by the per-provider concurrency limit.
+        A schema selects structured output.
+        """
+        try:
+            with self._llm_span("llm.astream") as llm_span:
+                cache_key, content = self._lookup_cache(system_prompt, human_prompt, schema)
+                llm_span.set(cache_hit=content is not None)
+                if content is not None:
+                    logger.info("Streaming cached LLM response")
+                    yield content
+                    return
+
+                chunks = []
+                estimated = self._estimate_request_tokens(system_prompt, human_prompt)
+                waiting_since = time.perf_counter()
+                await rate_limiter.acquire(self.provider, self._resolved_model(), estimated)
+                async with _get_provider_semaphore(self.provider):
+                    llm_span.set(queue_wait=time.perf_counter() - waiting_since)
+                    if self.provider.lower() == "openrouter":
+                        client = get_async_openai_client(self.provider)
+                        response = await client.chat.completions.create(
+                            model=self.model_name,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": human_prompt}
+                            ],
+                            temperature=self.temperature,
+                            max_tokens=self.max_tokens,
+                            stream=True,
+                            stream_options={"include_usage": True},
+                            **self._structured_kwargs(schema)
+                        )
+                        async for chunk in response:
+                            self._record_usage(llm_span, chunk)
+                            token = chunk.choices[0].delta.content if chunk.choices else None
+                            if token:
+                                chunks.append(token)
+                                yield token
+                    else:
+                        messages = [
+                            SystemMessage(content=system_prompt),
+                            HumanMessage(content=human_prompt)
+                        ]
+                        logger.info("Streaming LLM response asynchronously")
+                        async for chunk in self._chat_model(schema).astream(messages):
+                            self._record_usage(llm_span, chunk)
+                            if chunk.content:
+                                chunks.append(chunk.content)
+                                yield chunk.content
+                self._settle_usage(llm_span, estimated)
+
+            self._store_cache(cache_key, "".join(chunks), schema)
+
+        except CacheMissError:
+            raise
+        except Exception as e:
+            # Streams are not retried, but a 429 still pauses every other caller of this model.
+            backoff_for(e, self.provider, self._resolved_model(), 0)
+            logger.exception(f"Async LLM streaming failed: {str(e)}")
+            raise RuntimeError(f"LLM streaming failed: {str(e)}")
+
+    async def astream_collect(self, system_prompt: str, human_prompt: str, on_token, parse_json: bool = False,
+                              schema: dict = None):
+        """
+        Stream the response into on_token(chunk) and return the full result like ainvoke.
+        The task deadline applies; streams are never hedged since their tokens are already shown.
+        A schema is handled as in invoke; on_token(None) is sent before an invalid response is retried.
+        """
+        if schema is None:
+            return self._finalize_response(await self._astream_text(system_prompt, human_prompt, on_token), parse_json)
+        prompt = human_prompt
+        for attempt in range(Config.STRUCTURED_OUTPUT_RETRIES + 1):
+            if attempt:
+                record('retries')
+                on_token(None)
+            content = await self._astream_text(system_prompt, prompt, on_token, schema)
+            result, errors = self._validate_structured(content, schema)
+            if not errors:
+                return result
+            prompt = self._schema_correction(human_prompt, schema, errors)
+        return result
+
+    async def _astream_text(self, system_prompt: str, human_prompt: str, on_token, schema: dict = None) -> str:
+        chunks = []
+
+        async def collect():
+            async for token in self.astream(system_prompt, human_prompt, schema):
+                chunks.append(token)
+                on_token(token)
+
+        active = current_span()
+        task = task_type(active.agent if active else None)
+        deadline = task_deadline(task)
+        try:
+            await asyncio.wait_for(collect(), deadline)
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(f"LLM stream for task '{task}' exceeded its {deadline:g}s deadline")
+        return "".join(chunks)
+
+    @staticmethod
+    def append_feedback(prompt: str, feedback: list = None) -> str:
+        """Append reviewer feedback from a previous QA pass to a prompt, if there is any."""
+        if not feedback:
+            return prompt
+        points = "\n".join(f"        - {point}" for point in feedback)
+        return prompt + f"""
+
+        **Reviewer Feedback on the Previous Draft (address every point):**
+{points}
+        """
+
+    def _parse_and_repair_json(self, raw_json_string: str, allow_list: bool = False):
+        """
+        Parses a raw string that is expected to be a JSON object.
+        Repairs common LLM output issues (markdown code blocks, trailing commas, single quotes,
+        unescaped inner quotes, truncated output) in a single pass; returns {} if nothing is recoverable.
+        A bare array is only returned when allow_list is set, for callers that accept one.
+        """
+        try:
+            result = parse_llm_json(raw_json_string)
+        except ValueError as e:
+            logger.error(f"JSON repair failed: {e}. Returning empty result.")
+            record('parse_failures')
+            return {}
+        if isinstance(result, dict) or (allow_list and isinstance(result, list)):
+            return result
+        logger.error(f"Expected a JSON object, got {type(result).__name__}. Returning empty result.")
+        record('parse_failures')
+        return {}
+
     def _generate_main_title_section(self, topic: str) -> dict:
         """Generate main title section for PDF"""
         return {
@@ -287,20 +717,186 @@ class LLMUtils:
         })
         
         return {"content": content}
-            # We'll try to replace " with \" only if it's not already escaped.
-            # This regex looks for a quote that is not preceded by an odd number of backslashes.
-            temp_str = []
-            i = 0
-            while i < len(repaired_json_str):
-                if repaired_json_str[i] == '\\' and i + 1 < len(repaired_json_str) and repaired_json_str[i+1] == '"':
-                    temp_str.append(repaired_json_str[i]) # Keep the backslash
-                    temp_str.append(repaired_json_str[i+1]) # Keep the escaped quote
-                    i += 2
-                elif repaired_json_str[i] == '"':
-                    temp_str.append('\\') # Add escape character
-                    temp_str.append(repaired_json_str[i]) # Add the quote
-                    i += 1
-                else:
-                    temp_str.append(repaired_json_str[i])
-                    i += 1
-            repaired_json_str = "".join(temp_str)
\ No newline at end of file
+
+
+class RoutedLLM:
+    """
+    LLMUtils-compatible front end that sends each call to the healthiest of several backends.
+
+    Backends are tried in the order utils.provider_router picks; a failed call (including a missed
+    deadline) is recorded against its backend and retried on the next one, so a slow or failing
+    provider does not fail the whole graph. Streams only fail over before their first token.
+    Everything else (JSON parsing, append_feedback, ...) is delegated to the configured backend.
+    """
+
+    def __init__(self, backends, temperature: float, max_tokens: int):
+        self.backends = backends
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.primary = self._backend_llm(backends[0])
+
+    def __getattr__(self, name):
+        if name == 'primary':
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def _backend_llm(self, backend) -> LLMUtils:
+        return _get_backend_llm(backend[0], backend[1], self.temperature, self.max_tokens)
+
+    def _failed(self, backend, started: float, error: Exception):
+        provider_router.record(backend, time.perf_counter() - started, ok=False)
+        logger.warning(f"Router: {backend[0]}/{backend[1]} failed ({error}); trying the next backend")
+
+    def invoke(self, system_prompt: str, human_prompt: str, parse_json: bool = False, schema: dict = None):
+        last_error = None
+        for backend in provider_router.order(self.backends):
+            started = time.perf_counter()
+            try:
+                result = self._backend_llm(backend).invoke(system_prompt, human_prompt, parse_json=parse_json, schema=schema)
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self._failed(backend, started, e)
+                last_error = e
+                continue
+            provider_router.record(backend, time.perf_counter() - started, ok=True)
+            return result
+        raise last_error
+
+    async def ainvoke(self, system_prompt: str, human_prompt: str, parse_json: bool = False, schema: dict = None):
+        last_error = None
+        for backend in provider_router.order(self.backends):
+            started = time.perf_counter()
+            try:
+                result = await self._backend_llm(backend).ainvoke(
+                    system_prompt, human_prompt, parse_json=parse_json, schema=schema)
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self._failed(backend, started, e)
+                last_error = e
+                continue
+            provider_router.record(backend, time.perf_counter() - started, ok=True)
+            return result
+        raise last_error
+
+    def stream(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        last_error = None
+        for backend in provider_router.order(self.backends):
+            started = time.perf_counter()
+            emitted = False
+            try:
+                for token in self._backend_llm(backend).stream(system_prompt, human_prompt, schema):
+                    emitted = True
+                    yield token
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self._failed(backend, started, e)
+                if emitted:
+                    raise
+                last_error = e
+                continue
+            provider_router.record(backend, time.perf_counter() - started, ok=True)
+            return
+        raise last_error
+
+    async def astream(self, system_prompt: str, human_prompt: str, schema: dict = None):
+        last_error = None
+        for backend in provider_router.order(self.backends):
+            started = time.perf_counter()
+            emitted = False
+            try:
+                async for token in self._backend_llm(backend).astream(system_prompt, human_prompt, schema):
+                    emitted = True
+                    yield token
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self._failed(backend, started, e)
+                if emitted:
+                    raise
+                last_error = e
+                continue
+            provider_router.record(backend, time.perf_counter() - started, ok=True)
+            return
+        raise last_error
+
+    async def astream_collect(self, system_prompt: str, human_prompt: str, on_token, parse_json: bool = False,
+                              schema: dict = None):
+        """Like LLMUtils.astream_collect; on_token(None) is sent before the stream restarts on another backend."""
+        last_error = None
+        for attempt, backend in enumerate(provider_router.order(self.backends)):
+            if attempt:
+                on_token(None)
+            started = time.perf_counter()
+            try:
+                result = await self._backend_llm(backend).astream_collect(
+                    system_prompt, human_prompt, on_token, parse_json=parse_json, schema=schema)
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self._failed(backend, started, e)
+                last_error = e
+                continue
+            provider_router.record(backend, time.perf_counter() - started, ok=True)
+            return result
+        raise last_error
+
+
+def _routing_backends(provider: str, model_name: str):
+    """The configured backend followed by every other eligible fallback provider."""
+    backends = [(provider.lower(), model_name)]
+    if not Config.LLM_ROUTING_ENABLED or Config.LLM_CACHE_REPLAY_ONLY:
+        # Replayed runs must hit the provider the responses were recorded from.
+        return backends
+    for fallback in Config.LLM_FALLBACK_PROVIDERS:
+        if fallback != provider.lower() and backend_available(fallback) and default_model(fallback):
+            backends.append((fallback, default_model(fallback)))
+    return backends
+
+
+_llm_registry = {}
+_llm_registry_lock = threading.Lock()
+
+
+def _get_backend_llm(provider: str, model_name: str, temperature: float, max_tokens: int) -> LLMUtils:
+    key = (provider.lower(), model_name, float(temperature), int(max_tokens))
+    with _llm_registry_lock:
+        llm_utils = _llm_registry.get(key)
+        record_lookup(llm_utils is not None)
+        if llm_utils is None:
+            llm_utils = LLMUtils(provider=provider, model_name=model_name, temperature=temperature, max_tokens=max_tokens)
+            record_client_created()
+            _llm_registry[key] = llm_utils
+        return llm_utils
+
+
+def get_llm_for_task(task: str, temperature: float = None) -> LLMUtils:
+    """Return the LLM the model policy assigns to a task (see config.model_policy.MODEL_POLICY)."""
+    policy = resolve_model_policy(task)
+    return get_llm_utils(provider=policy['provider'], model_name=policy['model'],
+                         temperature=temperature, max_tokens=policy['max_tokens'])
+
+
+def get_llm_utils(provider: str = None, model_name: str = None, temperature: float = None, max_tokens: int = None) -> LLMUtils:
+    """
+    Return a shared LLMUtils for the given settings, creating it on first use.
+    Agents, refine iterations and Streamlit reruns in one process all reuse the same clients.
+    When fallback providers are configured, the result is a RoutedLLM with the same interface.
+    """
+    provider = provider or Config.LLM_PROVIDER
+    model_name = model_name or _default_model_name(provider)
+    temperature = temperature if temperature is not None else Config.TEMPERATURE
+    max_tokens = max_tokens if max_tokens is not None else Config.MAX_TOKENS
+    backends = _routing_backends(provider, model_name)
+    if len(backends) == 1:
+        return _get_backend_llm(provider, model_name, temperature, max_tokens)
+    key = ('routed', tuple(backends), float(temperature), int(max_tokens))
+    with _llm_registry_lock:
+        routed = _llm_registry.get(key)
+    if routed is None:
+        routed = RoutedLLM(backends, temperature, max_tokens)
+        with _llm_registry_lock:
+            routed = _llm_registry.setdefault(key, routed)
+    return routed
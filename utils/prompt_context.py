@@ -0,0 +1,21 @@
+from config.settings import Config
+
+
+def build_shared_context(topic: str, research_digest: str) -> str:
+    """
+    System prompt shared by every generation call of a run.
+
+    It holds only run-constant content (channel context and the research digest) and is
+    built in one place, so all calls start with a byte-identical prefix that provider
+    prompt caches can reuse. Task-specific instructions belong in the human prompt.
+    """
+    return (
+        f"You are part of the content team for {Config.CHANNEL_NAME}, an educational tech channel.\n"
+        f"Focus areas: {', '.join(Config.FOCUS_AREAS)}\n"
+        f"Audience: {', '.join(Config.TARGET_AUDIENCE)} developers\n"
+        f"Topic: {topic}\n"
+        f"Research data (JSON):\n{research_digest}\n"
+        "If the research data has prior_content, those are our earlier high-scoring pieces on related topics: "
+        "reuse what worked in them, but do not repeat them.\n"
+        "Follow the task instructions in the user message exactly, including its output format."
+    )
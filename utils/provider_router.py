@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from typing import List, Tuple
+from config.settings import Config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+Backend = Tuple[str, str]
+
+
+def backend_available(provider: str) -> bool:
+    """A backend is eligible only if its API key is configured."""
+    keys = {
+        'openrouter': Config.OPENROUTER_API_KEY,
+        'google': Config.GOOGLE_API_KEY,
+        'grok': Config.GROK_API_KEY
+    }
+    return bool(keys.get(provider.lower()))
+
+
+def default_model(provider: str) -> str:
+    """Model used when a provider serves as a fallback for a call configured for another provider."""
+    return {
+        'openrouter': Config.DEEPSEEK_MODEL,
+        'google': Config.GEMINI_MODEL,
+        'grok': Config.GROK_MODEL
+    }.get(provider.lower())
+
+
+class BackendHealth:
+    """Rolling latency/error window and circuit-breaker state for one provider/model."""
+
+    def __init__(self):
+        self.outcomes = deque(maxlen=Config.ROUTER_WINDOW)
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.calls = 0
+        self.failures = 0
+
+    def mean_latency(self):
+        latencies = [latency for latency, ok in self.outcomes if ok]
+        return sum(latencies) / len(latencies) if latencies else None
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def score(self):
+        """Lower is better; None while there is no successful sample yet."""
+        latency = self.mean_latency()
+        if latency is None:
+            return None
+        return latency * (1 + Config.ROUTER_ERROR_PENALTY * self.error_rate())
+
+
+class ProviderRouter:
+    """
+    Orders candidate backends for each call by observed health.
+
+    Closed backends are ranked by mean latency inflated by their error rate. A backend that fails
+    ROUTER_FAILURE_THRESHOLD times in a row opens its circuit and is skipped for ROUTER_OPEN_SECONDS;
+    after that it is half-open and a single probe call decides whether it closes or opens again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._health = {}
+
+    def _get(self, backend: Backend) -> BackendHealth:
+        if backend not in self._health:
+            self._health[backend] = BackendHealth()
+        return self._health[backend]
+
+    def _refresh_state(self, health: BackendHealth, now: float):
+        if health.state == OPEN and now - health.opened_at >= Config.ROUTER_OPEN_SECONDS:
+            health.state = HALF_OPEN
+            health.probe_started = None
+
+    def _claim_probe(self, health: BackendHealth, now: float) -> bool:
+        # A probe that never reported back (e.g. cancelled) is given up after one open period.
+        if health.probe_started is None or now - health.probe_started >= Config.ROUTER_OPEN_SECONDS:
+            health.probe_started = now
+            return True
+        return False
+
+    def order(self, backends: List[Backend]) -> List[Backend]:
+        """Return the backends to try, best first. The first entry is the configured (preferred) backend."""
+        now = time.monotonic()
+        with self._lock:
+            closed, probes, opened = [], [], []
+            for index, backend in enumerate(backends):
+                health = self._get(backend)
+                self._refresh_state(health, now)
+                if health.state == CLOSED:
+                    score = health.score()
+                    # Untried backends rank after measured ones, keeping the configured order among themselves.
+                    closed.append(((score is None, score or 0.0, index), backend))
+                elif health.state == HALF_OPEN and self._claim_probe(health, now):
+                    probes.append(backend)
+                else:
+                    opened.append((health.opened_at, backend))
+            ordered = [backend for _, backend in sorted(closed)]
+            if probes and probes[0] == backends[0]:
+                # Probe the preferred backend with real traffic; healthy backends remain as fallbacks.
+                ordered = [probes.pop(0)] + ordered
+            ordered += probes
+            if not ordered:
+                # Every circuit is open: try them anyway, oldest outage first, rather than fail outright.
+                ordered = [backend for _, backend in sorted(opened)]
+            return ordered
+
+    def record(self, backend: Backend, latency: float, ok: bool):
+        with self._lock:
+            health = self._get(backend)
+            health.calls += 1
+            health.outcomes.append((latency, ok))
+            if ok:
+                health.consecutive_failures = 0
+                health.state = CLOSED
+                health.probe_started = None
+                return
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.state == HALF_OPEN or health.consecutive_failures >= Config.ROUTER_FAILURE_THRESHOLD:
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probe_started = None
+
+    def stats(self) -> list:
+        with self._lock:
+            rows = []
+            for (provider, model), health in sorted(self._health.items(), key=lambda item: str(item[0])):
+                latency = health.mean_latency()
+                rows.append({
+                    'provider': provider,
+                    'model': model,
+                    'state': health.state,
+                    'calls': health.calls,
+                    'failures': health.failures,
+                    'error_rate': round(health.error_rate(), 3),
+                    'mean_latency_s': round(latency, 3) if latency is not None else None
+                })
+            return rows
+
+
+provider_router = ProviderRouter()
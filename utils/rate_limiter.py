@@ -0,0 +1,229 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config.settings import Config
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+_request_priority = contextvars.ContextVar('genkodex_request_priority', default=PRIORITY_INTERACTIVE)
+
+# How long a waiter that is not at the head of the queue sleeps before checking again.
+_POLL_INTERVAL = 0.05
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the enclosed LLM calls (and tasks started inside) at the given priority; lower goes first."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to one minute of allowance. A rate of 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket is let through once the bucket is full.
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed * 60.0 / self.capacity
+
+    def consume(self, amount: float, now: float):
+        if self.capacity:
+            self._refill(now)
+            # Allowed to go negative: the debt is paid back before the next request is admitted.
+            self.level -= amount
+
+
+class _ProviderLimits:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.waiters = []
+        self.rate_limited = 0
+        self.admitted = 0
+        self.wait_seconds = 0.0
+
+
+def _limits_for(provider: str, model: str) -> Dict[str, float]:
+    """Resolve RPM/TPM from LLM_RATE_LIMITS ('provider:model' beats 'provider'), falling back to the defaults."""
+    configured = Config.LLM_RATE_LIMITS.get(f"{provider}:{model}") or Config.LLM_RATE_LIMITS.get(provider) or {}
+    return {
+        'rpm': configured.get('rpm', Config.LLM_DEFAULT_RPM),
+        'tpm': configured.get('tpm', Config.LLM_DEFAULT_TPM)
+    }
+
+
+class RateLimiter:
+    """
+    Process-wide admission control for provider calls.
+
+    Each (provider, model) pair has a requests-per-minute and a tokens-per-minute bucket and a
+    priority queue of waiting calls; only the head of the queue is admitted, so interactive calls
+    overtake queued batch calls. A 429 puts the pair into a cooldown that every caller honours.
+    State is guarded by a thread lock so calls from any thread or event loop share the budget.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers = {}
+        self._sequence = itertools.count()
+
+    def _get(self, key) -> _ProviderLimits:
+        if key not in self._providers:
+            limits = _limits_for(*key)
+            self._providers[key] = _ProviderLimits(limits['rpm'], limits['tpm'])
+        return self._providers[key]
+
+    def _enqueue(self, key, priority: int):
+        ticket = (priority, next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._get(key).waiters, ticket)
+        return ticket
+
+    def _try_admit(self, key, ticket, tokens: int) -> float:
+        """Admit the ticket and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            limits = self._get(key)
+            if limits.waiters[0] != ticket:
+                return _POLL_INTERVAL
+            now = time.monotonic()
+            wait = max(limits.cooldown_until - now,
+                       limits.requests.time_until(1, now),
+                       limits.tokens.time_until(tokens, now))
+            if wait > 0:
+                return wait
+            limits.requests.consume(1, now)
+            limits.tokens.consume(tokens, now)
+            heapq.heappop(limits.waiters)
+            limits.admitted += 1
+            return 0.0
+
+    def _abandon(self, key, ticket):
+        with self._lock:
+            waiters = self._get(key).waiters
+            if ticket in waiters:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+
+    async def acquire(self, provider: str, model: str, tokens: int, priority: Optional[int] = None):
+        """Wait until a call estimated at `tokens` tokens may be sent."""
+        key = (provider.lower(), model)
+        ticket = self._enqueue(key, _request_priority.get() if priority is None else priority)
+        started = time.monotonic()
+        try:
+            while True:
+                wait = self._try_admit(key, ticket, tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            self._abandon(key, ticket)
+            raise
+        self._add_wait(key, time.monotonic() - started)
+
+    def acquire_sync(self, provider: str, model: str, tokens: int, priority: Optional[int] = None):
+        """Blocking variant of acquire for the synchronous call paths."""
+        key = (provider.lower(), model)
+        ticket = self._enqueue(key, _request_priority.get() if priority is None else priority)
+        started = time.monotonic()
+        try:
+            while True:
+                wait = self._try_admit(key, ticket, tokens)
+                if not wait:
+                    break
+                time.sleep(min(wait, 1.0))
+        except BaseException:
+            self._abandon(key, ticket)
+            raise
+        self._add_wait(key, time.monotonic() - started)
+
+    def _add_wait(self, key, seconds: float):
+        with self._lock:
+            self._get(key).wait_seconds += seconds
+
+    def settle(self, provider: str, model: str, estimated: int, actual: int):
+        """Correct the token bucket once the provider reports the real usage of an admitted call."""
+        if not actual:
+            return
+        with self._lock:
+            self._get((provider.lower(), model)).tokens.consume(actual - estimated, time.monotonic())
+
+    def backoff(self, provider: str, model: str, retry_after: Optional[float], attempt: int) -> float:
+        """Record a 429 and pause the provider/model for Retry-After, or exponential backoff with jitter."""
+        if retry_after is None:
+            retry_after = min(Config.LLM_RATE_LIMIT_MAX_BACKOFF, 2 ** attempt) * (1 + random.random())
+        with self._lock:
+            limits = self._get((provider.lower(), model))
+            limits.rate_limited += 1
+            limits.cooldown_until = max(limits.cooldown_until, time.monotonic() + retry_after)
+        return retry_after
+
+    def stats(self) -> list:
+        with self._lock:
+            return [{
+                'provider': provider,
+                'model': model,
+                'admitted': limits.admitted,
+                'rate_limited': limits.rate_limited,
+                'queued': len(limits.waiters),
+                'total_wait_s': round(limits.wait_seconds, 3),
+                'rpm_limit': limits.requests.capacity,
+                'tpm_limit': limits.tokens.capacity
+            } for (provider, model), limits in sorted(self._providers.items(), key=lambda item: str(item[0]))]
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """
+    Return the delay the provider asked for if `error` is a rate-limit (429) error.
+    Returns -1 for a 429 without a usable Retry-After header and None for any other error.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None) or getattr(error, 'code', None)
+    if status != 429 and type(error).__name__ not in ('RateLimitError', 'ResourceExhausted', 'TooManyRequests'):
+        return None
+    headers = getattr(response, 'headers', None) or {}
+    for header, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return float(value) * scale
+        except (TypeError, ValueError):
+            continue
+    return -1
+
+
+def backoff_for(error: Exception, provider: str, model: str, attempt: int) -> Optional[float]:
+    """If error is a 429 and retries remain, register the backoff and return its delay; otherwise None."""
+    retry_after = rate_limit_retry_after(error)
+    if retry_after is None:
+        return None
+    # Other callers of this provider/model should back off even when this one gives up.
+    delay = rate_limiter.backoff(provider, model, None if retry_after < 0 else retry_after, attempt)
+    return delay if attempt < Config.LLM_RATE_LIMIT_RETRIES else None
@@ -0,0 +1,97 @@
+import json
+import math
+import re
+from typing import Dict, Any, List
+from config.settings import Config
+
+# Research keys the generation agents read, most useful first. Every generation call
+# shares one digest so the prompt prefix carrying it is byte-identical across the fan-out.
+GENERATION_KEYS = [
+    'technical_details', 'best_practices', 'common_issues', 'practical_examples', 'misconceptions',
+    'difficulty_analysis', 'prerequisites', 'industry_relevance', 'related_topics', 'learning_path'
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WHITESPACE_RUN = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate: one per punctuation mark, about one per four characters of a word."""
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def _compact_text(text: str) -> str:
+    return _BLANK_LINES.sub("\n", _WHITESPACE_RUN.sub(" ", text)).strip()
+
+
+def _trim(value: Any, budget: int):
+    """Return value cut down to roughly budget tokens, or None if nothing useful fits."""
+    if budget <= 0:
+        return None
+    if isinstance(value, str):
+        text = _compact_text(value)
+        if estimate_tokens(text) <= budget:
+            return text
+        cut = text[:budget * 4].rsplit(' ', 1)[0]
+        return cut + '…' if cut else None
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            trimmed = _trim(item, budget)
+            if trimmed is None:
+                break
+            items.append(trimmed)
+            budget -= estimate_tokens(json.dumps(trimmed, ensure_ascii=False)) + 1
+        return items or None
+    if isinstance(value, dict):
+        members = {}
+        for key, item in value.items():
+            trimmed = _trim(item, budget - estimate_tokens(key) - 2)
+            if trimmed is None:
+                break
+            members[key] = trimmed
+            budget -= estimate_tokens(json.dumps({key: trimmed}, ensure_ascii=False))
+        return members or None
+    return value
+
+
+def _related_digest(related_content: List[Dict[str, Any]]):
+    """Past high-scoring items as topic, score, intro and approach titles, within their own token budget."""
+    items = []
+    for item in related_content:
+        try:
+            approaches = json.loads(item.get('content_approaches') or '{}')
+        except json.JSONDecodeError:
+            approaches = {}
+        items.append({
+            'topic': item['topic'],
+            'quality_score': item['quality_score'],
+            'intro': item.get('content_intro') or '',
+            'approaches': [approach.get('title') for approach in approaches.values()
+                           if isinstance(approach, dict) and approach.get('title')]
+        })
+    return _trim(items, Config.RELATED_CONTENT_TOKEN_BUDGET)
+
+
+def build_research_digest(research_data: Dict[str, Any], related_content: List[Dict[str, Any]] = None) -> str:
+    """
+    Project research data onto the keys the generation agents need and serialize it as compact
+    JSON within Config.RESEARCH_DIGEST_TOKEN_BUDGET. Unknown research layouts fall back to every key.
+    Related past content (DatabaseManager.get_related_content) is added as "prior_content".
+    """
+    research_data = research_data if isinstance(research_data, dict) else {}
+    selected = ([key for key in GENERATION_KEYS if research_data.get(key)]
+                or [key for key in research_data if research_data[key]])
+    budget = Config.RESEARCH_DIGEST_TOKEN_BUDGET
+    digest = {}
+    for key in selected:
+        trimmed = _trim(research_data[key], budget - estimate_tokens(key) - 2)
+        if trimmed is None:
+            break
+        digest[key] = trimmed
+        budget -= estimate_tokens(json.dumps({key: trimmed}, ensure_ascii=False))
+    prior_content = _related_digest(related_content) if related_content else None
+    if prior_content:
+        digest['prior_content'] = prior_content
+    return json.dumps(digest, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,261 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, List
+from config.settings import Config
+from config.model_policy import tier_of
+from utils.database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('genkodex_current_span', default=None)
+
+
+class Span:
+    """One timed unit of work: a traced run, a graph node, or an LLM call."""
+
+    def __init__(self, name: str, kind: str, parent: 'Span' = None, **attributes):
+        self.span_id = uuid.uuid4().hex[:16]
+        # A root span may continue an existing run (e.g. a resumed workflow) by passing its run_id.
+        run_id = attributes.pop('run_id', None)
+        self.run_id = parent.run_id if parent else run_id or self.span_id
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        # LLM calls are attributed to the node they run under.
+        self.agent = attributes.pop('agent', None) or (parent.agent if parent and kind == 'llm' else name)
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = 0.0
+        self.status = 'ok'
+        self.counters = {'retries': 0, 'parse_failures': 0}
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def increment(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def to_row(self) -> Dict[str, Any]:
+        attributes = dict(self.attributes)
+        return {
+            'span_id': self.span_id,
+            'run_id': self.run_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'agent': self.agent,
+            'start_time': self.start_time,
+            'duration': self.duration,
+            'queue_wait': attributes.pop('queue_wait', 0.0),
+            'provider': attributes.pop('provider', None),
+            'model': attributes.pop('model', None),
+            'prompt_tokens': attributes.pop('prompt_tokens', None),
+            'completion_tokens': attributes.pop('completion_tokens', None),
+            'cached_tokens': attributes.pop('cached_tokens', None),
+            'retries': self.counters.get('retries', 0),
+            'parse_failures': self.counters.get('parse_failures', 0),
+            'status': self.status,
+            'attributes': json.dumps(attributes, default=str)
+        }
+
+
+class Tracer:
+    """Collects spans per run and persists each run's spans when its root span ends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._db_manager = None
+
+    def _store(self, rows: List[Dict[str, Any]]):
+        try:
+            if self._db_manager is None:
+                self._db_manager = DatabaseManager()
+            self._db_manager.save_trace_spans(rows)
+        except Exception as e:
+            logger.error(f"Tracer: Failed to persist {len(rows)} spans: {e}")
+
+    @contextmanager
+    def span(self, name: str, kind: str = 'node', activate: bool = True, **attributes):
+        """
+        Time the enclosed block as a child of the current span.
+        activate=False records a leaf span without making it the parent of later spans,
+        which keeps it safe to use inside generators that may be abandoned mid-way.
+        """
+        if not Config.TRACING_ENABLED:
+            yield Span(name, kind, **attributes)
+            return
+        parent = _current_span.get()
+        span = Span(name, kind, parent=parent, **attributes)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except (GeneratorExit, asyncio.CancelledError):
+            span.status = 'cancelled'
+            raise
+        except BaseException as e:
+            span.status = 'error'
+            span.set(error=str(e))
+            raise
+        finally:
+            span.duration = time.perf_counter() - span._started
+            if token is not None:
+                _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._pending.setdefault(span.run_id, []).append(span.to_row())
+            if span.parent_id is not None:
+                return
+            rows = self._pending.pop(span.run_id)
+        self._store(rows)
+
+
+tracer = Tracer()
+
+
+def span(name: str, kind: str = 'node', activate: bool = True, **attributes):
+    return tracer.span(name, kind=kind, activate=activate, **attributes)
+
+
+def current_span() -> Span:
+    return _current_span.get()
+
+
+def record(counter: str, amount: int = 1):
+    """Increment a counter (e.g. 'retries', 'parse_failures') on the active span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.increment(counter, amount)
+
+
+def traced_node(name: str, func):
+    """Wrap a LangGraph node so every execution is recorded as a 'node' span."""
+    accepts_config = 'config' in inspect.signature(func).parameters
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_node(state, config=None):
+            with span(name, kind='node'):
+                return await (func(state, config) if accepts_config else func(state))
+        async_node.__signature__ = _node_signature()
+        return async_node
+
+    @functools.wraps(func)
+    def node(state, config=None):
+        with span(name, kind='node'):
+            return func(state, config) if accepts_config else func(state)
+    node.__signature__ = _node_signature()
+    return node
+
+
+def _node_signature():
+    # LangGraph inspects node signatures to decide whether to pass the run config.
+    return inspect.Signature([
+        inspect.Parameter('state', inspect.Parameter.POSITIONAL_OR_KEYWORD),
+        inspect.Parameter('config', inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None)
+    ])
+
+
+def export_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert stored span rows into Chrome trace-event JSON (load it in chrome://tracing or Perfetto)."""
+    lanes = {}
+    events = []
+    for row in spans:
+        lane = lanes.setdefault(row['agent'] or row['name'], len(lanes) + 1)
+        args = {key: row[key] for key in ('kind', 'provider', 'model', 'prompt_tokens', 'completion_tokens',
+                                          'cached_tokens', 'queue_wait', 'retries', 'parse_failures', 'status') if row.get(key) is not None}
+        events.append({
+            'name': row['name'],
+            'cat': row['kind'],
+            'ph': 'X',
+            'ts': int(row['start_time'] * 1e6),
+            'dur': int(row['duration'] * 1e6),
+            'pid': 1,
+            'tid': lane,
+            'args': args
+        })
+    for lane_name, tid in lanes.items():
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': lane_name}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_latencies(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Group span rows by (kind, agent) and compute p50/p95 latency, token totals and prompt cache hit rate."""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row['kind'], row['agent']), []).append(row)
+    summary = []
+    for (kind, agent), group in sorted(groups.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+        durations = sorted(row['duration'] for row in group)
+        prompt_tokens = sum(row['prompt_tokens'] or 0 for row in group)
+        cached_tokens = sum(row.get('cached_tokens') or 0 for row in group)
+        summary.append({
+            'kind': kind,
+            'agent': agent,
+            'count': len(group),
+            'p50_s': round(_percentile(durations, 0.50), 3),
+            'p95_s': round(_percentile(durations, 0.95), 3),
+            'mean_queue_wait_s': round(sum(row['queue_wait'] or 0 for row in group) / len(group), 3),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': sum(row['completion_tokens'] or 0 for row in group),
+            'cached_tokens': cached_tokens,
+            'cache_hit_rate': round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+            'retries': sum(row['retries'] or 0 for row in group),
+            'parse_failures': sum(row['parse_failures'] or 0 for row in group)
+        })
+    return summary
+
+
+def _estimated_cost(model: str, prompt_tokens: int, completion_tokens: int):
+    prices = Config.MODEL_PRICES.get(model)
+    if not prices:
+        return None
+    return (prompt_tokens * prices.get('input', 0) + completion_tokens * prices.get('output', 0)) / 1_000_000
+
+
+def summarize_model_tiers(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Compare LLM calls per model tier: latency percentiles, tokens and cost (when MODEL_PRICES has the model)."""
+    groups = {}
+    for row in rows:
+        if row['kind'] != 'llm':
+            continue
+        groups.setdefault((tier_of(row['provider'], row['model']), row['provider'], row['model']), []).append(row)
+    summary = []
+    for (tier, provider, model), group in sorted(groups.items(), key=lambda item: tuple(str(part) for part in item[0])):
+        durations = sorted(row['duration'] for row in group)
+        prompt_tokens = sum(row['prompt_tokens'] or 0 for row in group)
+        completion_tokens = sum(row['completion_tokens'] or 0 for row in group)
+        cost = _estimated_cost(model, prompt_tokens, completion_tokens)
+        summary.append({
+            'tier': tier,
+            'provider': provider,
+            'model': model,
+            'calls': len(group),
+            'p50_s': round(_percentile(durations, 0.50), 3),
+            'p95_s': round(_percentile(durations, 0.95), 3),
+            'tasks': ', '.join(sorted({row['agent'] or '' for row in group})),
+            'completion_tokens_per_call': round(completion_tokens / len(group), 1),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cost_usd': round(cost, 4) if cost is not None else None,
+            'cost_per_call_usd': round(cost / len(group), 5) if cost is not None else None
+        })
+    return summary
@@ -0,0 +1,143 @@
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, Tuple
+import numpy as np
+from config.settings import Config
+
+_WORD = re.compile(r"\w+")
+
+# Hashed vectors carry no corpus statistics to discount common words, so function words are
+# dropped up front; otherwise "asyncio in python" sits closer to "decorators in python".
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how in into is it its of on or our that the this to "
+    "vs we what when where which while why with without you your".split()
+)
+
+# Character trigrams only smooth over word variants; at full weight the many trigrams of common
+# words like "python" would outweigh the words that actually tell two topics apart.
+_TRIGRAM_WEIGHT = 0.2
+
+
+def _features(text: str) -> Counter:
+    """Words, word bigrams and character trigrams, so 'async' still lands near 'asyncio'."""
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+    features = Counter(words)
+    features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        features.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def embed_text(text: str, dim: int = None) -> np.ndarray:
+    """
+    Unit-length hashed embedding of text, computed locally with no model or network.
+
+    Each feature is hashed into one of dim buckets with a hash-derived sign, so collisions cancel
+    out on average; counts are damped with 1 + log(tf). crc32 keeps the buckets stable across
+    processes, which Python's salted hash() would not.
+    """
+    dim = dim or Config.VECTOR_DIM
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in _features(text).items():
+        bucket = zlib.crc32(feature.encode('utf-8'))
+        weight = (1.0 + math.log(count)) * (_TRIGRAM_WEIGHT if feature.startswith('#') else 1.0)
+        vector[bucket % dim] += weight if bucket & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Share of a content vector taken by its topic, titles and hashtags. Queries are topics, and
+# a long intro would otherwise drown out the few words that say what an item is about.
+_HEAD_WEIGHT = 0.7
+
+
+def embed_content(content_data: Dict[str, Any], dim: int = None) -> np.ndarray:
+    """
+    Unit-length embedding of a content item, as passed to save_content or read back from the
+    content table (JSON columns still encoded): a blend of its head and its intro and approaches.
+    """
+    def loaded(value):
+        return json.loads(value) if isinstance(value, str) else value
+
+    approaches = loaded(content_data.get('content_approaches')) or {}
+    head = " ".join([
+        content_data.get('topic') or '',
+        " ".join(loaded(content_data.get('titles')) or []),
+        " ".join(loaded(content_data.get('hashtags')) or [])
+    ])
+    body = " ".join([content_data.get('content_intro') or ''] + [
+        f"{approach.get('title', '')} {approach.get('explanation', '')}"
+        for approach in approaches.values() if isinstance(approach, dict)
+    ])
+    vector = _HEAD_WEIGHT * embed_text(head, dim) + (1 - _HEAD_WEIGHT) * embed_text(body, dim)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """
+    Contiguous float32 matrix of embeddings in a flat file, memory-mapped for search.
+
+    Row positions are allocated by the caller (DatabaseManager maps rows to content ids and
+    serializes appends through its database lock), so the file holds nothing but vectors.
+    The file only ever grows: another process may have it mapped, and shrinking a mapped
+    file crashes its readers. A rebuild overwrites rows from the start instead.
+    """
+
+    def __init__(self, path: str = None, dim: int = None):
+        self.dim = dim or Config.VECTOR_DIM
+        # The width is part of the file name: a different VECTOR_DIM starts an index of its own.
+        self.path = f"{path or Config.VECTOR_INDEX_PATH}_{self.dim}.f32"
+        self._lock = threading.Lock()
+        self._matrix = None
+
+    def rows_on_disk(self) -> int:
+        try:
+            return os.path.getsize(self.path) // (self.dim * 4)
+        except OSError:
+            return 0
+
+    def write(self, row: int, vectors: np.ndarray):
+        """Write vectors starting at row; rows past the end extend the file."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            with open(self.path, 'r+b' if os.path.exists(self.path) else 'wb') as f:
+                f.seek(row * self.dim * 4)
+                f.write(vectors.tobytes())
+            self._matrix = None
+
+    def _rows(self, count: int) -> np.ndarray:
+        """The first count rows, memory-mapped once and re-mapped only when the index grows."""
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[0] < count:
+                self._matrix = np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.rows_on_disk(), self.dim))
+            return self._matrix[:count]
+
+    def search(self, vector: np.ndarray, count: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows among the first count by cosine similarity (vectors are unit length), best first."""
+        if count <= 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self._rows(count) @ vector.astype(np.float32)
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(path: str = None) -> VectorIndex:
+    """The process-wide index for path, so every manager shares one memory map."""
+    path = path or Config.VECTOR_INDEX_PATH
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = VectorIndex(path)
+        return _indexes[path]
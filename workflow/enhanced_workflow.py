@@ -1,27 +1,59 @@
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from agents.research_agent import ResearchAgent
 from agents.title_generator_agent import TitleGeneratorAgent
 from agents.description_hashtag_agent import DescriptionHashtagAgent
+from agents.metadata_agent import MetadataAgent, METADATA_FIELDS
 from agents.content_creator_agent import ContentCreatorAgent
 from agents.youtube_content_agent import YouTubeContentAgent
 from agents.content_aggregator_agent import ContentAggregatorAgent
 from agents.quality_assurance_agent import QualityAssuranceAgent
 from utils.database_manager import DatabaseManager
-from typing import TypedDict, List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+from utils.client_registry import run_async
+from utils.tracing import span, traced_node
+from utils.research_digest import build_research_digest
+from config.settings import Config
+from typing import TypedDict, List, Dict, Any, Callable, Annotated
+from langchain_core.runnables import RunnableConfig
+import asyncio
 import logging
+import time
+import uuid
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# The different pedagogical approaches for content generation
+APPROACH_TYPES = {
+    "approach_1": "The Absolute Beginner's Way",
+    "approach_2": "The Intermediate Level",
+    "approach_3": "The Advanced Technique",
+    "approach_4": "The Professional/Real-World Implementation",
+    "approach_5": "The Expert's Insight/Common Pitfall"
+}
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer letting parallel branches each contribute keys to one dict."""
+    return {**(left or {}), **(right or {})}
+
+
+def merge_timings(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer merging per-iteration timing dicts written by parallel branches."""
+    merged = dict(left or {})
+    for iteration, sections in (right or {}).items():
+        merged[iteration] = {**merged.get(iteration, {}), **sections}
+    return merged
+
 # Define the state for the graph
 class ContentGenerationState(TypedDict):
     topic: str
     research_data: Dict[str, Any]
+    research_digest: str
     titles: List[str]
     description: str
     hashtags: List[str]
     content_intro: str
-    content_approaches: Dict[str, Any]
+    content_approaches: Annotated[Dict[str, Any], merge_dicts]
     youtube_content: Dict[str, str]
     content_package: Dict[str, Any]
     quality_feedback: Dict[str, Any]
@@ -29,37 +61,64 @@ class ContentGenerationState(TypedDict):
     stored: bool
     content_id: int
     iteration: int
+    bypass_research_cache: bool
+    content_record: Dict[str, Any]
+    sections_to_generate: List[str]
+    generation_started_at: float
+    generation_timings: Annotated[Dict[str, Any], merge_timings]
+    generation_summary: Dict[str, Any]
 
 class EnhancedContentWorkflow:
-    def __init__(self):
+    def __init__(self, store_results: bool = True):
+        """
+        store_results=False leaves the prepared database row in state['content_record']
+        instead of writing it, so callers such as the batch runner can persist in bulk.
+        """
         logging.info("EnhancedContentWorkflow: Initializing workflow.")
+        self.store_results = store_results
         self.workflow = StateGraph(ContentGenerationState)
         self._build_graph()
-        self.app = self.workflow.compile()
         self.db_manager = DatabaseManager()
-        logging.info("EnhancedContentWorkflow: Workflow initialized and compiled.")
+        logging.info("EnhancedContentWorkflow: Workflow initialized.")
+
+    def _add_node(self, name: str, node):
+        # Every node runs inside a trace span so LLM calls are attributed to it.
+        self.workflow.add_node(name, traced_node(name, node))
 
     def _build_graph(self):
         logging.info("EnhancedContentWorkflow: Building graph nodes and edges.")
         # 1. Define the nodes (agents)
-        self.workflow.add_node("research", self.run_research_agent)
-        self.workflow.add_node("orchestrate_parallel_generation", self.orchestrate_parallel_generation_node)
-        self.workflow.add_node("aggregate_content", self.run_content_aggregator_agent)
-        self.workflow.add_node("quality_assurance", self.run_quality_assurance_agent)
-        self.workflow.add_node("store_content", self.store_content_in_db)
+        self._add_node("research", self.run_research_agent)
+        self._add_node("plan_generation", self.plan_generation_node)
+        for section in QualityAssuranceAgent.SECTION_KEYS:
+            self._add_node(f"generate_{section}", self._make_section_node(section))
+        self._add_node("generate_metadata", self._make_section_node("metadata"))
+        self._add_node("join_generation", self.join_generation_node)
+        self._add_node("aggregate_content", self.run_content_aggregator_agent)
+        self._add_node("quality_assurance", self.run_quality_assurance_agent)
+        self._add_node("store_content", self.store_content_in_db)
         logging.info("EnhancedContentWorkflow: Nodes added.")
 
         # 2. Define the edges (flow)
         self.workflow.set_entry_point("research")
-        self.workflow.add_edge("research", "orchestrate_parallel_generation")
-        self.workflow.add_edge("orchestrate_parallel_generation", "aggregate_content")
+        self.workflow.add_edge("research", "plan_generation")
+        # Each section is its own branch that only depends on research data, so every
+        # scheduled branch starts as soon as planning is done and joins before aggregation.
+        self.workflow.add_conditional_edges(
+            "plan_generation",
+            self.route_generation,
+            [f"generate_{section}" for section in QualityAssuranceAgent.SECTION_KEYS] + ["generate_metadata"]
+        )
+        for section in QualityAssuranceAgent.SECTION_KEYS + ["metadata"]:
+            self.workflow.add_edge(f"generate_{section}", "join_generation")
+        self.workflow.add_edge("join_generation", "aggregate_content")
         self.workflow.add_edge("aggregate_content", "quality_assurance")
         self.workflow.add_conditional_edges(
             "quality_assurance",
             self.quality_decision,
             {
                 "approve": "store_content",
-                "refine": "orchestrate_parallel_generation"
+                "refine": "plan_generation"
             }
         )
         self.workflow.add_edge("store_content", END)
@@ -67,84 +126,151 @@ class EnhancedContentWorkflow:
 
     # --- Agent Execution Methods ---
 
-    def run_research_agent(self, state):
+    async def run_research_agent(self, state):
         logging.info("--- Running Research Agent ---")
         topic = state['topic']
+        related_content = self._related_content(topic)
+        use_cache = not state.get('bypass_research_cache', False)
+        if use_cache:
+            # A fresh cache hit skips building the agent and its LLM client entirely.
+            cached_research = self.db_manager.get_cached_research(topic)
+            if cached_research:
+                logging.info(f"Research Agent: Using cached research for topic: {topic}")
+                return {"research_data": cached_research,
+                        "research_digest": build_research_digest(cached_research, related_content)}
         agent = ResearchAgent()
-        research_data = agent.conduct_research(topic)
+        research_data = await agent.aconduct_research(topic, use_cache=False, related_content=related_content)
         logging.debug(f"Research Agent: Research data generated: {research_data.keys()}")
-        return {"research_data": research_data}
+        # Every generation branch shares one compact, budgeted projection instead of the full research blob.
+        return {"research_data": research_data, "research_digest": build_research_digest(research_data, related_content)}
 
-    def orchestrate_parallel_generation_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Orchestrate parallel generation of YouTube content, intro, approaches, and metadata."""
-        logging.info("--- Orchestrating Parallel Content Generation ---")
-        topic = state['topic']
-        research_data = state['research_data']
-        iteration = state.get('iteration', 1)
-        logging.info(f"Orchestrator: Current iteration: {iteration}")
-
-        # Initialize agents
-        title_agent = TitleGeneratorAgent()
-        desc_agent = DescriptionHashtagAgent()
-        content_creator = ContentCreatorAgent()
-        youtube_agent = YouTubeContentAgent()
-
-        # Define the different pedagogical approaches for content generation
-        approach_types = {
-            "approach_1": "The Absolute Beginner's Way",
-            "approach_2": "The Intermediate Level",
-            "approach_3": "The Advanced Technique",
-            "approach_4": "The Professional/Real-World Implementation",
-            "approach_5": "The Expert's Insight/Common Pitfall"
+    def _related_content(self, topic: str) -> List[Dict[str, Any]]:
+        """High-scoring past content close to the topic; retrieval problems never block a run."""
+        try:
+            related_content = self.db_manager.get_related_content(topic)
+        except Exception as e:
+            logging.warning(f"Research Agent: Related content lookup failed: {e}")
+            return []
+        if related_content:
+            logging.info(f"Research Agent: Building on related content: {[item['topic'] for item in related_content]}")
+        return related_content
+
+    def plan_generation_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide which sections this pass generates; the branches fan out from here."""
+        logging.info("--- Planning Content Generation ---")
+        # Re-entering after QA means this is a refine pass; LangGraph only keeps node return
+        # values, so the iteration count is advanced here rather than in quality_decision.
+        quality_feedback = state.get('quality_feedback')
+        iteration = state.get('iteration', 1) + (1 if quality_feedback else 0)
+        sections = self._sections_to_generate(quality_feedback)
+        logging.info(f"Planner: Iteration {iteration}, generating sections: {sections}")
+        return {
+            "iteration": iteration,
+            "sections_to_generate": sections,
+            "generation_started_at": time.monotonic()
         }
 
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            logging.info("Orchestrator: Submitting parallel content generation tasks.")
-            # --- Submit all tasks to the executor ---
-            
-            # Submit metadata generation tasks
-            title_future = executor.submit(title_agent.generate_titles, topic, research_data)
-            desc_future = executor.submit(desc_agent.generate_description_and_hashtags, topic, research_data)
-            
-            # Submit content generation tasks
-            intro_future = executor.submit(content_creator.create_content_introduction, topic, research_data)
-            approach_futures = {
-                key: executor.submit(content_creator.generate_single_approach, topic, research_data, desc)
-                for key, desc in approach_types.items()
+    def route_generation(self, state: Dict[str, Any]) -> List[str]:
+        """
+        Send the pass to one branch per section; all of them run in the same superstep. With fused
+        metadata, two or more scheduled metadata sections share a single generate_metadata branch.
+        """
+        sections = state['sections_to_generate']
+        metadata = [section for section in sections if section in METADATA_FIELDS]
+        if Config.FUSED_METADATA_ENABLED and len(metadata) > 1:
+            sections = [section for section in sections if section not in METADATA_FIELDS] + ["metadata"]
+        return [f"generate_{section}" for section in sections]
+
+    def _sections_to_generate(self, quality_feedback: Dict[str, Any] = None) -> List[str]:
+        """Return every section on the first pass, and only the sections QA scored below threshold on a refine pass."""
+        if not quality_feedback:
+            return list(QualityAssuranceAgent.SECTION_KEYS)
+        section_scores = quality_feedback.get('section_scores') or {}
+        if not section_scores:
+            logging.warning("Planner: QA returned no section scores; regenerating every section.")
+            return list(QualityAssuranceAgent.SECTION_KEYS)
+        weak_sections = [key for key, score in section_scores.items() if score < Config.SECTION_QUALITY_THRESHOLD]
+        if not weak_sections:
+            # The overall score failed even though every section passed, so rework the lowest-rated one.
+            weak_sections = [min(section_scores, key=section_scores.get)]
+        return weak_sections
+
+    def _make_section_node(self, section: str):
+        """Build the graph node that generates a single section."""
+        async def generate_section_node(state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
+            started_at = time.monotonic()
+            update = await self._generate_section(section, state, config)
+            finished_at = time.monotonic()
+            offset = state.get('generation_started_at', started_at)
+            update['generation_timings'] = {
+                str(state.get('iteration', 1)): {
+                    section: {
+                        "start": round(started_at - offset, 3),
+                        "end": round(finished_at - offset, 3),
+                        "duration": round(finished_at - started_at, 3)
+                    }
+                }
             }
+            return update
+        return generate_section_node
 
-            # --- Retrieve results from futures ---
-            logging.info("Orchestrator: Retrieving results from parallel tasks.")
-            # Retrieve metadata
-            titles = title_future.result()
-            desc_hashtags = desc_future.result()
-            
-            # Retrieve core content
-            content_intro = intro_future.result()
-            content_approaches = {key: future.result() for key, future in approach_futures.items()}
-
-            # --- Generate YouTube scripts based on the generated content ---
-            
-            # This task depends on the intro and approaches, so it runs after they are complete.
-            # We can submit it to the same executor.
-            youtube_future = executor.submit(
-                youtube_agent.generate_video_content, 
-                topic, 
-                research_data
-            )
-            youtube_content = youtube_future.result()
-
-        # --- Package the results ---
-        logging.info("Orchestrator: Packaging generated content.")
-        return {
-            "titles": titles,
-            "description": desc_hashtags.get('description', ''),
-            "hashtags": desc_hashtags.get('hashtags', []),
-            "content_intro": content_intro,
-            "content_approaches": content_approaches,
-            "youtube_content": youtube_content,
-            "iteration": iteration  # Carry over the iteration count
+    async def _generate_section(self, section: str, state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
+        topic = state['topic']
+        research_data = state['research_data']
+        research_digest = state.get('research_digest')
+        quality_feedback = state.get('quality_feedback')
+        feedback = quality_feedback.get('improvements') if quality_feedback else None
+
+        # Optional on_token(section, token) callback for live rendering of streamed sections.
+        on_token = (config or {}).get('configurable', {}).get('on_token')
+        stream = None
+        if on_token and section in ('content_intro', 'youtube_content'):
+            # A None token tells the listener that the section is (re)starting.
+            on_token(section, None)
+            stream = lambda token: on_token(section, token)
+
+        logging.info(f"--- Generating Section: {section} ---")
+        if section == 'metadata':
+            fields = [field for field in METADATA_FIELDS if field in state['sections_to_generate']]
+            return await MetadataAgent().agenerate_metadata(
+                topic, research_data, fields=fields, feedback=feedback, research_digest=research_digest)
+        if section == 'titles':
+            return {"titles": await TitleGeneratorAgent().agenerate_titles(
+                topic, research_data, feedback=feedback, research_digest=research_digest)}
+        if section == 'description':
+            return {"description": await DescriptionHashtagAgent().agenerate_description(
+                topic, research_data, feedback=feedback, research_digest=research_digest)}
+        if section == 'hashtags':
+            return {"hashtags": await DescriptionHashtagAgent().agenerate_hashtags(
+                topic, research_data, feedback=feedback, research_digest=research_digest)}
+        if section == 'content_intro':
+            content_intro = await ContentCreatorAgent().acreate_content_introduction(
+                topic, research_data, on_token=stream, feedback=feedback, research_digest=research_digest)
+            return {"content_intro": content_intro}
+        if section == 'youtube_content':
+            youtube_content = await YouTubeContentAgent().agenerate_video_content(
+                topic, research_data, on_token=stream, feedback=feedback, research_digest=research_digest)
+            return {"youtube_content": youtube_content}
+        if section in APPROACH_TYPES:
+            approach = await ContentCreatorAgent().agenerate_single_approach(
+                topic, research_data, APPROACH_TYPES[section], feedback=feedback, research_digest=research_digest)
+            return {"content_approaches": {section: approach}}
+        raise ValueError(f"Unknown content section: {section}")
+
+    def join_generation_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for every branch of the pass and report where its wall time went."""
+        iteration = str(state.get('iteration', 1))
+        timings = state.get('generation_timings', {}).get(iteration, {})
+        wall_time = round(time.monotonic() - state.get('generation_started_at', time.monotonic()), 3)
+        critical_section = max(timings, key=lambda key: timings[key]['end']) if timings else None
+        summary = {
+            "iteration": int(iteration),
+            "wall_time": wall_time,
+            "critical_section": critical_section,
+            "section_durations": {key: value['duration'] for key, value in timings.items()}
         }
+        logging.info(f"Join: Generation pass {iteration} took {wall_time:.2f}s; critical path: {critical_section}")
+        return {"generation_summary": summary}
 
     def run_content_aggregator_agent(self, state):
         logging.info("--- Running Content Aggregator Agent ---")
@@ -170,11 +296,11 @@ class EnhancedContentWorkflow:
         logging.debug(f"Content Aggregator Agent: Aggregated content package keys: {content_package.keys()}")
         return {"content_package": content_package}
 
-    def run_quality_assurance_agent(self, state):
+    async def run_quality_assurance_agent(self, state):
         logging.info("--- Running Quality Assurance Agent ---")
         content_package = state['content_package']
         agent = QualityAssuranceAgent()
-        quality_feedback = agent.evaluate_content(content_package)
+        quality_feedback = await agent.aevaluate_content(content_package)
         
         average_score = quality_feedback.get('overall_score', 0.0)
         logging.info(f"Quality Assurance Agent: Content evaluated with overall score: {average_score:.2f}")
@@ -193,7 +319,6 @@ class EnhancedContentWorkflow:
             return "approve"
         else:
             logging.info(f"Content quality score is {quality_score:.2f}. Refining content, iteration {iteration + 1}.")
-            state['iteration'] = iteration + 1
             return "refine"
 
     def store_content_in_db(self, state):
@@ -212,34 +337,87 @@ class EnhancedContentWorkflow:
             'approved': False, # Default value, can be updated later
             'approval_status': 'pending' # Default value, can be updated later
         }
+        if not self.store_results:
+            logging.info("Content prepared for deferred storage.")
+            state['stored'] = False
+            state['content_record'] = content_data_to_save
+            return state
         content_id = self.db_manager.save_content(content_data_to_save)
         logging.info(f"Content stored in DB with ID: {content_id}")
         state['stored'] = True
         state['content_id'] = content_id
         return state
 
-    def run(self, topic: str):
+    def run(self, topic: str, bypass_research_cache: bool = False, on_token: Callable[[str, str], None] = None):
         """
         Executes the entire content generation workflow.
+        Set bypass_research_cache to force fresh research even if a cached result exists.
+        Pass on_token(section, token) to receive the intro ('content_intro') and raw script
+        JSON ('youtube_content') as they are generated; a None token means the section restarts.
         """
-        logging.info(f"EnhancedContentWorkflow: Starting run for topic: {topic}")
-        initial_state = {"topic": topic, "iteration": 1}
-        final_state = initial_state
-        for s in self.app.stream(initial_state):
-            # LangGraph stream yields updates, so merge them into final_state
-            for key, value in s.items():
-                final_state[key] = value
-            logging.debug(f"EnhancedContentWorkflow: Current state after node execution: {list(s.keys())[0]}")
-
-        if final_state:
-            logging.info(f"EnhancedContentWorkflow: Workflow finished. Final state: {final_state.keys()}")
-            # Return a comprehensive result for app.py
-            return {
-                "topic": final_state["topic"],
-                "content_package": final_state.get("aggregate_content", {}).get("content_package", {}),
-                "quality_score": final_state.get("quality_score", 0.0),
-                "quality_feedback": final_state.get("quality_feedback", {}),
-                "content_id": final_state.get("content_id", None)
-            }
-        logging.warning("EnhancedContentWorkflow: Workflow finished without a final state.")
-        return {}
+        return run_async(self.arun(topic, bypass_research_cache=bypass_research_cache, on_token=on_token))
+
+    def resume(self, run_id: str, on_token: Callable[[str, str], None] = None):
+        """Continue a failed or interrupted run from its last checkpoint."""
+        return run_async(self.aresume(run_id, on_token=on_token))
+
+    async def arun(self, topic: str, bypass_research_cache: bool = False, on_token: Callable[[str, str], None] = None,
+                   run_id: str = None):
+        """
+        Async entry point; lets a caller drive several topic runs on one event loop.
+        Callers that need the run id before the run finishes (e.g. the job runner) may supply it.
+        """
+        run_id = run_id or uuid.uuid4().hex[:16]
+        logging.info(f"EnhancedContentWorkflow: Starting run {run_id} for topic: {topic}")
+        self.db_manager.save_workflow_run(run_id, topic, bypass_research_cache)
+        return await self._execute(run_id, topic, bypass_research_cache, on_token)
+
+    async def aresume(self, run_id: str, on_token: Callable[[str, str], None] = None):
+        """Async variant of resume; nodes that completed before the failure are not run again."""
+        run = self.db_manager.get_workflow_run(run_id)
+        if run is None:
+            raise ValueError(f"Unknown workflow run: {run_id}")
+        logging.info(f"EnhancedContentWorkflow: Resuming run {run_id} for topic: {run['topic']}")
+        return await self._execute(run_id, run['topic'], bool(run['bypass_research_cache']), on_token, resumed=True)
+
+    async def _execute(self, run_id: str, topic: str, bypass_research_cache: bool,
+                       on_token: Callable[[str, str], None] = None, resumed: bool = False):
+        # The run id is the checkpoint thread, so every completed superstep (and every finished
+        # branch of an interrupted one) is saved and replayed from the checkpoint on resume.
+        config = {"configurable": {"thread_id": run_id}}
+        if on_token:
+            config["configurable"]["on_token"] = on_token
+        self.db_manager.mark_workflow_run(run_id, 'running')
+        try:
+            async with AsyncSqliteSaver.from_conn_string(Config.CHECKPOINT_DB_PATH) as checkpointer:
+                app = self.workflow.compile(checkpointer=checkpointer)
+                snapshot = await app.aget_state(config)
+                # Without a checkpoint (a fresh run, or one that failed before research finished) start from the top.
+                graph_input = None if snapshot.values else {
+                    "topic": topic, "iteration": 1, "bypass_research_cache": bypass_research_cache
+                }
+                with span("workflow.run", kind='run', run_id=run_id, topic=topic, resumed=resumed):
+                    async for update in app.astream(graph_input, config=config):
+                        logging.debug(f"EnhancedContentWorkflow: Current state after node execution: {list(update.keys())[0]}")
+                final_state = (await app.aget_state(config)).values
+                # A finished run is never resumed, so its checkpoints are dropped.
+                await checkpointer.adelete_thread(run_id)
+        except BaseException as e:
+            status = 'interrupted' if isinstance(e, (asyncio.CancelledError, KeyboardInterrupt)) else 'failed'
+            self.db_manager.mark_workflow_run(run_id, status, error=str(e) or type(e).__name__)
+            raise
+        self.db_manager.mark_workflow_run(run_id, 'completed')
+
+        logging.info(f"EnhancedContentWorkflow: Workflow finished. Final state: {final_state.keys()}")
+        # Return a comprehensive result for app.py
+        return {
+            "topic": topic,
+            "content_package": final_state.get("content_package", {}),
+            "quality_score": final_state.get("quality_score", 0.0),
+            "quality_feedback": final_state.get("quality_feedback", {}),
+            "content_id": final_state.get("content_id"),
+            "stored": final_state.get("stored", False),
+            "content_record": final_state.get("content_record"),
+            "generation_summary": final_state.get("generation_summary", {}),
+            "run_id": run_id
+        }
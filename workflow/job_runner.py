@@ -0,0 +1,103 @@
+from workflow.enhanced_workflow import EnhancedContentWorkflow
+from utils.database_manager import DatabaseManager
+from config.settings import Config
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+import asyncio
+import logging
+import threading
+import uuid
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class JobRunner:
+    """
+    Runs content generation on a local worker pool so the Streamlit script thread never waits on a workflow.
+
+    Job state lives in the jobs table (queued/running/done/failed), so any session or browser tab can
+    poll it and load a finished result by job id. Streamed sections are buffered in memory for the
+    live preview of running jobs.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.db_manager = DatabaseManager()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or Config.JOB_WORKERS,
+                                            thread_name_prefix='genkodex-job')
+        self._lock = threading.Lock()
+        self._previews = {}
+        self._local = threading.local()
+        # Jobs a previous app process left behind can never finish; their runs stay resumable from checkpoints.
+        orphaned = self.db_manager.fail_orphaned_jobs()
+        if orphaned:
+            logging.warning(f"JobRunner: Marked {orphaned} jobs from a previous process as failed.")
+
+    def submit(self, topic: str, bypass_research_cache: bool = False) -> str:
+        """Queue a new workflow run for the topic and return its job id."""
+        run_id = uuid.uuid4().hex[:16]
+        return self._submit(topic, run_id, lambda workflow, on_token: workflow.arun(
+            topic, bypass_research_cache=bypass_research_cache, on_token=on_token, run_id=run_id))
+
+    def submit_resume(self, run_id: str) -> str:
+        """Queue the resumption of a failed or interrupted workflow run and return its job id."""
+        run = self.db_manager.get_workflow_run(run_id)
+        if run is None:
+            raise ValueError(f"Unknown workflow run: {run_id}")
+        return self._submit(run['topic'], run_id, lambda workflow, on_token: workflow.aresume(run_id, on_token=on_token))
+
+    def _submit(self, topic: str, run_id: str, start) -> str:
+        job_id = uuid.uuid4().hex[:16]
+        self.db_manager.create_job(job_id, topic, run_id)
+        self._executor.submit(self._run, job_id, start)
+        logging.info(f"JobRunner: Queued job {job_id} for topic: {topic}")
+        return job_id
+
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        """The worker thread's event loop, kept across jobs so its pooled HTTP connections are reused."""
+        loop = getattr(self._local, 'loop', None)
+        if loop is None:
+            loop = self._local.loop = asyncio.new_event_loop()
+        return loop
+
+    def _run(self, job_id: str, start):
+        self.db_manager.mark_job(job_id, 'running')
+        with self._lock:
+            preview = self._previews[job_id] = {}
+
+        def on_token(section: str, token: str):
+            with self._lock:
+                if token is None:
+                    preview[section] = []
+                else:
+                    preview.setdefault(section, []).append(token)
+
+        try:
+            # Jobs on a worker thread share its event loop, and with it the loop's async clients.
+            result = self._loop().run_until_complete(start(EnhancedContentWorkflow(), on_token))
+        except Exception as e:
+            logging.exception(f"JobRunner: Job {job_id} failed: {e}")
+            self.db_manager.mark_job(job_id, 'failed', error=str(e))
+        else:
+            self.db_manager.save_job_result(job_id, result)
+            logging.info(f"JobRunner: Job {job_id} done.")
+        finally:
+            with self._lock:
+                self._previews.pop(job_id, None)
+
+    def preview(self, job_id: str) -> Dict[str, str]:
+        """Text streamed so far for each previewed section of a running job."""
+        with self._lock:
+            return {section: "".join(tokens) for section, tokens in self._previews.get(job_id, {}).items()}
+
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """The process-wide job runner; Streamlit sessions and reruns all share it."""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner()
+        return _job_runner
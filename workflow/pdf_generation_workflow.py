@@ -1,13 +1,13 @@
 from langgraph.graph import StateGraph, END
 from typing import Any
 from typing import Dict
-from utils.llm_utils import LLMUtils
+from utils.llm_utils import get_llm_utils
 from config.settings import Config # Import Config
 from concurrent.futures import ThreadPoolExecutor
 
 class PDFGenerationWorkflow:
     def __init__(self):
-        self.llm_utils = LLMUtils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=Config.TEMPERATURE, max_tokens=Config.MAX_TOKENS)
+        self.llm_utils = get_llm_utils(provider="openrouter", model_name=Config.DEEPSEEK_MODEL, temperature=Config.TEMPERATURE, max_tokens=Config.MAX_TOKENS)
         self.workflow = self.build_workflow()
 
     def build_workflow(self) -> StateGraph: